@@ -0,0 +1,330 @@
+import bisect
+import csv
+import difflib
+import math
+import os
+import re
+import threading
+import unicodedata
+
+from geo_index import KDTree, haversine_km
+
+# Bundled airport dataset (IATA code, name, city, country, coordinates, annual passengers in millions):
+# every airport with an IATA code, from the airportsdata project (MIT License,
+# https://github.com/mborsetti/airportsdata). Passenger counts are only filled in for the
+# major commercial airports; the rest are left blank and never suggested as alternates.
+AIRPORTS_CSV = os.environ.get(
+    "WANDER_AIRPORTS_CSV", os.path.join(os.path.dirname(os.path.abspath(__file__)), "airports.csv")
+)
+# "strict" rejects codes missing from the dataset before any SerpApi call; "lenient" searches any
+# well-formed 3-letter code as given (for airports newer than the dataset) unless the destination
+# named elsewhere (e.g. the hotel query) says otherwise
+AIRPORT_VALIDATION = os.environ.get("WANDER_AIRPORT_VALIDATION", "strict")
+# Minimum similarity (0-1) for fuzzy name matches
+FUZZY_CUTOFF = float(os.environ.get("WANDER_AIRPORT_FUZZY_CUTOFF", "0.8"))
+
+# Alternate airports considered when a route fails: how many per side, how far away,
+# the smallest airports used (annual passengers, millions) and how many routes are tried
+ALTERNATE_AIRPORTS = int(os.environ.get("WANDER_ALTERNATE_AIRPORTS", "3"))
+ALTERNATE_RADIUS_KM = float(os.environ.get("WANDER_ALTERNATE_RADIUS_KM", "300"))
+ALTERNATE_MIN_PASSENGERS = float(os.environ.get("WANDER_ALTERNATE_MIN_PASSENGERS", "1"))
+ALTERNATE_ROUTES = int(os.environ.get("WANDER_ALTERNATE_ROUTES", "4"))
+
+# Multi-airport city codes the chat sometimes produces instead of an airport
+METRO_CODES = {
+    "NYC": "New York", "LON": "London", "PAR": "Paris", "TYO": "Tokyo", "CHI": "Chicago",
+    "WAS": "Washington", "MIL": "Milan", "ROM": "Rome", "OSA": "Osaka", "SEL": "Seoul",
+    "BJS": "Beijing", "SAO": "Sao Paulo", "RIO": "Rio de Janeiro",
+    "BUE": "Buenos Aires", "MOW": "Moscow", "YTO": "Toronto", "STO": "Stockholm",
+    "JKT": "Jakarta", "YMQ": "Montreal",
+}
+
+CODE_PATTERN = re.compile(r"^[A-Z]{3}$")
+# Upper-case three letter words inside free text, e.g. "New York (JFK)"
+EMBEDDED_CODE_PATTERN = re.compile(r"\b[A-Z]{3}\b")
+
+
+def normalize_name(text):
+    """
+    Lower-cases, strips accents and punctuation and collapses whitespace,
+    so "São Paulo" and "sao  paulo" compare equal.
+    """
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+class Airport:
+    """
+    One airport record.
+    """
+    __slots__ = ("code", "name", "city", "country", "latitude", "longitude", "passengers")
+
+    def __init__(self, code, name, city, country, latitude, longitude, passengers):
+        self.code = code
+        self.name = name
+        self.city = city
+        self.country = country
+        self.latitude = latitude
+        self.longitude = longitude
+        self.passengers = passengers
+
+    def to_dict(self):
+        return {
+            "code": self.code,
+            "name": self.name,
+            "city": self.city,
+            "country": self.country,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "passengers_m": self.passengers,
+        }
+
+    def __repr__(self):
+        return f"Airport({self.code}, {self.city})"
+
+
+class AirportIndex:
+    """
+    In-memory index over the bundled airport dataset: code -> airport,
+    prefix lookup of city and airport names over a sorted key list, and
+    fuzzy name matching as a last resort. Loaded on first use.
+    """
+
+    def __init__(self, path=AIRPORTS_CSV, validation=AIRPORT_VALIDATION, fuzzy_cutoff=FUZZY_CUTOFF):
+        self.path = path
+        self.strict = validation != "lenient"
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._by_code = {}
+        self._name_keys = []  # sorted (normalized city or airport name, code)
+        self._names = {}  # normalized city or airport name -> codes, busiest first
+        self._fuzzy_names = {}  # the same, for airports with traffic figures only
+        self._cities = []  # (normalized city, city), longest first
+        self._tree = None  # k-d tree over commercial airport coordinates
+        self._stats = {"resolved": 0, "corrected": 0, "unverified": 0, "rejected": 0}
+
+    def load(self):
+        """
+        Reads the dataset and builds the lookup structures. Safe to call more than once.
+        """
+        with self._lock:
+            if self._loaded:
+                return
+            by_code = {}
+            try:
+                with open(self.path, newline="", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        code = row["iata"].strip().upper()
+                        if not CODE_PATTERN.match(code):
+                            continue
+                        by_code[code] = Airport(
+                            code, row["name"].strip(), row["city"].strip(), row["country"].strip(),
+                            float(row["latitude"]), float(row["longitude"]),
+                            float(row.get("passengers_m") or 0)
+                        )
+            except (OSError, KeyError, ValueError) as e:
+                print(f"Error loading airport dataset {self.path}: {str(e)}")
+
+            names = {}
+            for airport in sorted(by_code.values(), key=lambda a: -a.passengers):
+                for key in {normalize_name(airport.city), normalize_name(airport.name)}:
+                    names.setdefault(key, []).append(airport.code)
+            # Fuzzy matching over thousands of small airfields turns any text into some airport
+            fuzzy_names = {
+                key: [code for code in codes if by_code[code].passengers > 0] for key, codes in names.items()
+            }
+            cities = {normalize_name(airport.city): airport.city for airport in by_code.values()}
+
+            self._by_code = by_code
+            self._names = names
+            self._fuzzy_names = {key: codes for key, codes in fuzzy_names.items() if codes}
+            self._name_keys = sorted((key, code) for key, codes in names.items() for code in codes)
+            self._cities = sorted(cities.items(), key=lambda item: -len(item[0]))
+            self._tree = KDTree([
+                (airport.latitude, airport.longitude, airport.code)
+                for airport in by_code.values() if airport.passengers >= ALTERNATE_MIN_PASSENGERS
+            ])
+            self._loaded = True
+            print(f"Loaded {len(by_code)} airports from {self.path}")
+
+    def _count(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._by_code)
+
+    def get(self, code):
+        """
+        Returns the Airport for an IATA code, or None.
+        """
+        self._ensure_loaded()
+        return self._by_code.get(str(code).strip().upper()) if code else None
+
+    def city_for(self, code, default=None):
+        """
+        City served by an airport code, e.g. "JFK" -> "New York".
+        """
+        airport = self.get(code)
+        return airport.city if airport else default
+
+    def codes_for_city(self, prefix, limit=5):
+        """
+        Codes of airports whose city or name starts with prefix, busiest first.
+        """
+        self._ensure_loaded()
+        key = normalize_name(prefix)
+        if not key:
+            return []
+        codes = []
+        i = bisect.bisect_left(self._name_keys, (key, ""))
+        while i < len(self._name_keys) and self._name_keys[i][0].startswith(key):
+            code = self._name_keys[i][1]
+            if code not in codes:
+                codes.append(code)
+            i += 1
+        codes.sort(key=lambda c: -self._by_code[c].passengers)
+        return codes[:limit]
+
+    def search(self, text, limit=5):
+        """
+        Airports matching free text: an exact code, then city/name prefixes,
+        then fuzzy matches for misspellings ("Barcellona", "Heathrow airprt")
+        among airports with traffic figures.
+        """
+        self._ensure_loaded()
+        airport = self.get(text)
+        if airport:
+            return [airport]
+        codes = self.codes_for_city(text, limit)
+        if not codes:
+            for key in difflib.get_close_matches(normalize_name(text), self._fuzzy_names, n=limit,
+                                                 cutoff=self.fuzzy_cutoff):
+                codes.extend(code for code in self._fuzzy_names[key] if code not in codes)
+        return [self._by_code[code] for code in codes[:limit]]
+
+    def find_city(self, text):
+        """
+        Returns the first known city named in free text (e.g. a hotel name), or None.
+        """
+        self._ensure_loaded()
+        padded = f" {normalize_name(text)} "
+        for key, city in self._cities:
+            if f" {key} " in padded:
+                return city
+        return None
+
+    def resolve(self, value, hint=None):
+        """
+        Turns a chat-produced airport reference into an IATA code: known
+        codes pass, metro codes ("NYC") and names ("Paris, France",
+        "New York (JFK)") map to the busiest matching airport. A city named
+        in hint (e.g. "Hotels in Austin") replaces unknown codes, and small
+        airports far from that city, which are usually codes the chat made
+        up ("INT" is a real airport in Winston-Salem). In lenient mode other
+        well-formed 3-letter codes pass through unchanged. Returns None when
+        nothing matches, so no SerpApi call is wasted on the reference.
+        """
+        self._ensure_loaded()
+        text = str(value or "").strip()
+        code = text.upper()
+        hint_city = self.find_city(hint) if hint else None
+        airport = self._by_code.get(code)
+        if airport is not None and not self._far_from(airport, hint_city):
+            self._count("resolved")
+            return code
+        if (airport is None and not self.strict and hint_city is None
+                and CODE_PATTERN.match(code) and code not in METRO_CODES):
+            self._count("unverified")
+            return code
+
+        candidates = []
+        if code in METRO_CODES:
+            candidates.append(METRO_CODES[code])
+        candidates.extend(
+            match for match in EMBEDDED_CODE_PATTERN.findall(text) if match in self._by_code and match != code
+        )
+        if text and not CODE_PATTERN.match(code):
+            candidates.extend([text, text.split(",")[0]])
+        if hint_city:
+            candidates.append(hint_city)
+
+        for candidate in candidates:
+            matches = self.search(candidate, limit=1)
+            if matches:
+                print(f"Corrected airport '{text}' to {matches[0].code} ({matches[0].city})")
+                self._count("corrected")
+                return matches[0].code
+
+        print(f"Unknown airport '{text}'")
+        self._count("rejected")
+        return None
+
+    def _far_from(self, airport, city):
+        # Only airports without traffic figures are second-guessed; hubs are rarely made up
+        if city is None or airport.passengers > 0 or normalize_name(airport.city) == normalize_name(city):
+            return False
+        matches = self.search(city, limit=1)
+        if not matches:
+            return False
+        distance = haversine_km(airport.latitude, airport.longitude, matches[0].latitude, matches[0].longitude)
+        return distance > ALTERNATE_RADIUS_KM
+
+    @staticmethod
+    def _rank(airport, distance_km):
+        # Closer is better, busier is better: a major hub 80 km away beats a small airport 40 km away
+        return distance_km / (1 + math.log1p(airport.passengers))
+
+    def nearby(self, code, k=ALTERNATE_AIRPORTS, max_km=ALTERNATE_RADIUS_KM):
+        """
+        Up to k other commercial airports within max_km of an airport, as
+        [(Airport, distance_km)] ranked by distance and size.
+        """
+        airport = self.get(code)
+        if airport is None:
+            return []
+        found = [
+            (self._by_code[other], distance)
+            for other, distance in self._tree.nearest(airport.latitude, airport.longitude, k + 1, max_km)
+            if other != airport.code
+        ][:k]
+        found.sort(key=lambda item: self._rank(*item))
+        return found
+
+    def alternative_routes(self, departure_id, arrival_id, limit=ALTERNATE_ROUTES):
+        """
+        Nearby (departure, arrival) pairs to try when a route returns no
+        flights, best first: each side is the original airport or one of its
+        nearby alternates. Empty if neither airport is known.
+        """
+        origins = [(code, 0.0) for code in [departure_id] if self.get(code)]
+        origins += [(other.code, self._rank(other, distance)) for other, distance in self.nearby(departure_id)]
+        destinations = [(code, 0.0) for code in [arrival_id] if self.get(code)]
+        destinations += [(other.code, self._rank(other, distance)) for other, distance in self.nearby(arrival_id)]
+
+        routes = sorted(
+            (dep_score + arr_score, dep, arr)
+            for dep, dep_score in origins
+            for arr, arr_score in destinations
+            if dep != arr and (dep, arr) != (departure_id, arrival_id)
+        )
+        return [(dep, arr) for _, dep, arr in routes[:limit]]
+
+    def stats(self):
+        self._ensure_loaded()
+        with self._lock:
+            stats = dict(self._stats)
+        stats["airports"] = len(self._by_code)
+        stats["strict"] = self.strict
+        return stats
+
+
+# Shared index, loaded the first time an airport is looked up
+airport_index = AirportIndex()
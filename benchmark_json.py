@@ -0,0 +1,59 @@
+"""
+Compares the standard library json module with the codec json_codec picked
+(orjson/ujson when installed) on the repo's SerpApi and itinerary fixtures:
+
+    python benchmark_json.py [iterations]
+"""
+import json
+import os
+import sys
+import time
+
+import json_codec
+
+FIXTURES = ["test.json", "test_flight.json", "flight_test_result.json", "itinerary.json", "recommendation_data.json"]
+
+
+def best_of(fn, iterations, repeats=5):
+    """
+    Best average time per call in microseconds over a few repeats.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best * 1e6
+
+
+def benchmark(iterations=200):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    print(f"JSON backend: {json_codec.BACKEND}")
+    print(f"{'fixture':<26}{'size':>9}  {'operation':<14}{'stdlib µs':>11}{'codec µs':>11}{'speedup':>9}")
+    for name in FIXTURES:
+        path = os.path.join(base_dir, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        cases = [
+            ("parse", lambda: json.loads(raw), lambda: json_codec.loads(raw)),
+            ("dump compact",
+             lambda: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+             lambda: json_codec.dumps_bytes(data)),
+            ("dump indented",
+             lambda: json.dumps(data, ensure_ascii=False, indent=2),
+             lambda: json_codec.dumps(data, pretty=True)),
+            ("log preview", lambda: json.dumps(data, indent=2)[:500], lambda: json_codec.preview(data)),
+        ]
+        for operation, stdlib_fn, codec_fn in cases:
+            stdlib_us = best_of(stdlib_fn, iterations)
+            codec_us = best_of(codec_fn, iterations)
+            print(f"{name:<26}{len(raw):>9}  {operation:<14}{stdlib_us:>11.1f}{codec_us:>11.1f}"
+                  f"{stdlib_us / codec_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
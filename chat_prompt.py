@@ -0,0 +1,188 @@
+import os
+import re
+from dataclasses import dataclass
+
+import json_codec
+
+# Older turns beyond this window are replaced by the slot summary
+DEFAULT_RECENT_TURNS = int(os.environ.get("WANDER_CHAT_RECENT_TURNS", "6"))
+# Rough token budget for the conversation part of the prompt (system prompt excluded)
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("WANDER_CHAT_TOKEN_BUDGET", "1500"))
+
+INTEREST_KEYWORDS = (
+    "adventure", "art", "beach", "culture", "cultural", "food", "cuisine", "hiking",
+    "history", "historical", "museums", "nature", "nightlife", "relaxation", "shopping",
+    "skiing", "wildlife", "architecture", "music", "photography", "wellness", "diving",
+)
+
+DATE_PATTERN = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+IATA_ROUTE_PATTERN = re.compile(r"\bfrom\s+([A-Z]{3})\b(?:.*?\bto\s+([A-Z]{3})\b)?")
+ORIGIN_PATTERN = re.compile(r"\b(?:from|departing|leaving)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)?)")
+BUDGET_PATTERN = re.compile(
+    r"(\$\s?\d[\d,]*(?:\.\d+)?\s*k?|\d[\d,]*\s*(?:usd|dollars|k)\b|budget\s+(?:is|of)?\s*\$?\d[\d,]*)",
+    re.IGNORECASE
+)
+TRAVELERS_PATTERN = re.compile(r"\bfor\s+(\d+)\s+(?:travell?ers|people|persons|adults)\b", re.IGNORECASE)
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate (about four characters per token for English text).
+    """
+    return len(text) // 4 + 1
+
+
+def extract_slots(message, slots=None):
+    """
+    Updates and returns the slots captured from a user message: origin,
+    destination, departure/return dates, budget, travelers and interests.
+    """
+    slots = dict(slots or {})
+
+    route = IATA_ROUTE_PATTERN.search(message)
+    if route:
+        slots["origin"] = route.group(1)
+        if route.group(2):
+            slots["destination"] = route.group(2)
+    elif "origin" not in slots:
+        origin = ORIGIN_PATTERN.search(message)
+        if origin:
+            slots["origin"] = origin.group(1)
+
+    dates = DATE_PATTERN.findall(message)
+    if dates:
+        slots["departure_date"] = dates[0]
+        if len(dates) > 1:
+            slots["return_date"] = dates[1]
+
+    budget = BUDGET_PATTERN.search(message)
+    if budget:
+        slots["budget"] = budget.group(1).strip()
+
+    travelers = TRAVELERS_PATTERN.search(message)
+    if travelers:
+        slots["travelers"] = travelers.group(1)
+
+    lowered = message.lower()
+    interests = list(slots.get("interests", []))
+    for keyword in INTEREST_KEYWORDS:
+        if re.search(rf"\b{keyword}\b", lowered) and keyword not in interests:
+            interests.append(keyword)
+    if interests:
+        slots["interests"] = interests
+
+    return slots
+
+
+def summarize_slots(slots):
+    """
+    Renders the captured slots as a compact one-line summary.
+    """
+    labels = (
+        ("origin", "Origin"),
+        ("destination", "Destination"),
+        ("departure_date", "Departure date"),
+        ("return_date", "Return date"),
+        ("budget", "Budget"),
+        ("travelers", "Travelers"),
+        ("interests", "Interests"),
+    )
+    parts = []
+    for key, label in labels:
+        value = slots.get(key)
+        if value:
+            if isinstance(value, list):
+                value = ", ".join(value)
+            parts.append(f"{label}: {value}")
+    return "; ".join(parts)
+
+
+@dataclass
+class ChatTurn:
+    """
+    One message in a chat session. role is "user" or "model", matching Gemini's roles.
+    """
+    __slots__ = ("role", "text")
+    role: str
+    text: str
+
+    def to_content(self):
+        """
+        Returns the turn as a Gemini content dict.
+        """
+        return {"role": self.role, "parts": [self.text]}
+
+    def to_dict(self):
+        return {"role": self.role, "text": self.text}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["role"], data["text"])
+
+
+def build_chat_contents(turns, slots, max_recent_turns=DEFAULT_RECENT_TURNS,
+                        token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Assembles the Gemini contents for the next chat turn. The system
+    instructions are sent separately as the model's system_instruction;
+    this keeps the most recent turns (within max_recent_turns and
+    token_budget) and replaces everything older with a summary of the
+    captured slots. The last turn is expected to be the pending user message.
+    """
+    recent = []
+    used_tokens = 0
+    for turn in reversed(turns[-max_recent_turns:]):
+        cost = estimate_tokens(turn.text)
+        # Always keep the pending user message, even if it alone exceeds the budget
+        if recent and used_tokens + cost > token_budget:
+            break
+        recent.append(turn)
+        used_tokens += cost
+    recent.reverse()
+
+    # The window has to open with a user turn
+    while len(recent) > 1 and recent[0].role != "user":
+        recent.pop(0)
+
+    contents = [turn.to_content() for turn in recent]
+    dropped = len(turns) - len(recent)
+    if dropped > 0:
+        summary = summarize_slots(slots)
+        contents[0]["parts"].insert(
+            0,
+            f"(Summary of the earlier conversation, {dropped} earlier messages omitted: "
+            + (summary if summary else "no details captured yet.") + ")"
+        )
+    return contents
+
+
+def session_size(session):
+    """
+    Approximate memory footprint of a chat session, for the session store.
+    """
+    size = 200
+    for turn in session.get("turns", []):
+        size += len(turn.text) + 100
+    size += len(summarize_slots(session.get("slots", {})))
+    return size
+
+
+def encode_session(session):
+    """
+    Serializes a chat session for shared session backends.
+    """
+    return json_codec.dumps({
+        "turns": [turn.to_dict() for turn in session.get("turns", [])],
+        "slots": session.get("slots", {}),
+    })
+
+
+def decode_session(payload):
+    """
+    Restores a chat session serialized by encode_session.
+    """
+    data = json_codec.loads(payload)
+    return {
+        "turns": [ChatTurn.from_dict(turn) for turn in data.get("turns", [])],
+        "slots": data.get("slots", {}),
+    }
@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Keyed circuit breaker. After failure_threshold consecutive failures for a
+    key the circuit opens and calls are rejected for reset_timeout seconds.
+    Then a single trial call is let through (half-open): success closes the
+    circuit, failure opens it again. A trial that reports no outcome within
+    reset_timeout (or is released) lets the next call try instead.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._circuits = {}  # key -> {"state", "failures", "opened_at", "trial_in_flight", "trial_started"}
+        self._rejected = 0
+
+    def _circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = {"state": CLOSED, "failures": 0, "opened_at": 0.0,
+                       "trial_in_flight": False, "trial_started": 0.0}
+            self._circuits[key] = circuit
+        return circuit
+
+    def allow(self, key):
+        """
+        Returns True if a call for key may go upstream right now.
+        """
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit["state"] == CLOSED:
+                return True
+            if circuit["state"] == OPEN and now - circuit["opened_at"] >= self.reset_timeout:
+                circuit["state"] = HALF_OPEN
+                circuit["trial_in_flight"] = False
+            if circuit["state"] == HALF_OPEN and (
+                    not circuit["trial_in_flight"] or now - circuit["trial_started"] >= self.reset_timeout):
+                circuit["trial_in_flight"] = True
+                circuit["trial_started"] = now
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self, key):
+        with self._lock:
+            # Healthy keys are dropped so the table only holds troubled ones
+            self._circuits.pop(key, None)
+
+    def release(self, key):
+        """
+        Gives back a half-open trial that ended without an outcome (cancelled,
+        rejected by another check, or turned away before going upstream).
+        No-op if no trial is in flight.
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit["state"] == HALF_OPEN:
+                circuit["trial_in_flight"] = False
+
+    def record_failure(self, key):
+        with self._lock:
+            circuit = self._circuit(key)
+            circuit["failures"] += 1
+            circuit["trial_in_flight"] = False
+            if circuit["state"] == HALF_OPEN or circuit["failures"] >= self.failure_threshold:
+                if circuit["state"] != OPEN:
+                    print(f"Circuit '{self.name}' opened for {key} after {circuit['failures']} failures")
+                circuit["state"] = OPEN
+                circuit["opened_at"] = time.monotonic()
+
+    def state(self, key):
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit["state"] if circuit else CLOSED
+
+    def stats(self):
+        """
+        Returns the keys whose circuit is not closed and the rejection count.
+        """
+        with self._lock:
+            return {
+                "open": sorted(k for k, c in self._circuits.items() if c["state"] == OPEN),
+                "half_open": sorted(k for k, c in self._circuits.items() if c["state"] == HALF_OPEN),
+                "rejected_calls": self._rejected,
+            }
+
+
+class NegativeCache:
+    """
+    Short-lived memory of keys (routes, hotel queries) that upstream has
+    definitively rejected, so repeat requests fail fast to the fallback path.
+    """
+
+    def __init__(self, ttl=300.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (expires_at, reason)
+        self._hits = 0
+
+    def add(self, key, reason):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge(time.monotonic())
+                if len(self._entries) >= self.max_entries:
+                    # Still full: drop the entry closest to expiring
+                    oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                    del self._entries[oldest]
+            self._entries[key] = (time.monotonic() + self.ttl, reason)
+
+    def get(self, key):
+        """
+        Returns the recorded rejection reason for key, or None if not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, reason = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._hits += 1
+            return reason
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _purge(self, now):
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return {"entries": len(self._entries), "hits": self._hits}
+
+
+# Per-engine breakers trip when SerpApi itself is degraded (timeouts, 429s, 5xx)
+engine_breaker = CircuitBreaker(
+    "engine",
+    failure_threshold=int(os.environ.get("SERPAPI_ENGINE_FAILURES", "5")),
+    reset_timeout=float(os.environ.get("SERPAPI_ENGINE_RESET", "30"))
+)
+
+# Per-route breakers trip when one route keeps failing while the engine is fine
+route_breaker = CircuitBreaker(
+    "route",
+    failure_threshold=int(os.environ.get("SERPAPI_ROUTE_FAILURES", "2")),
+    reset_timeout=float(os.environ.get("SERPAPI_ROUTE_RESET", "300"))
+)
+
+# Routes and queries SerpApi rejected outright (e.g. invalid airport codes like "INT")
+negative_cache = NegativeCache(ttl=float(os.environ.get("SERPAPI_NEGATIVE_TTL", "600")))
+
+
+def resilience_stats():
+    """
+    Returns breaker and negative cache state for the health endpoint.
+    """
+    return {
+        "engine_breaker": engine_breaker.stats(),
+        "route_breaker": route_breaker.stats(),
+        "negative_cache": negative_cache.stats(),
+    }
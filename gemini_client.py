@@ -0,0 +1,220 @@
+import asyncio
+import os
+import threading
+import time
+
+import google.generativeai as genai
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "ENTER_YOU_API_KEY")
+DEFAULT_MODEL = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
+
+# Maximum Gemini calls in flight per process, and how long a caller may wait for a slot
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_QUEUE_TIMEOUT = float(os.environ.get("GEMINI_QUEUE_TIMEOUT", "60"))
+
+
+class GeminiClientManager:
+    """
+    Process-wide access point for Gemini. Configures the SDK once, reuses
+    model objects (and with them the underlying transport), caps the number
+    of concurrent calls and keeps latency and token accounting.
+    """
+
+    def __init__(self, api_key=GEMINI_API_KEY, model_name=DEFAULT_MODEL,
+                 max_concurrency=GEMINI_MAX_CONCURRENCY, queue_timeout=GEMINI_QUEUE_TIMEOUT):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._configured = False
+        self._models = {}
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats = {
+            "calls": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+            "total_tokens": 0,
+        }
+
+    def _ensure_configured(self):
+        if not self._configured:
+            with self._lock:
+                if not self._configured:
+                    genai.configure(api_key=self.api_key)
+                    self._configured = True
+
+    def get_model(self, model_name=None, system_instruction=None):
+        """
+        Returns a cached GenerativeModel for the given name and system instruction.
+        """
+        self._ensure_configured()
+        key = (model_name or self.model_name, system_instruction)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    if system_instruction:
+                        model = genai.GenerativeModel(key[0], system_instruction=system_instruction)
+                    else:
+                        model = genai.GenerativeModel(key[0])
+                    self._models[key] = model
+        return model
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise RuntimeError(
+                f"Gemini concurrency limit ({self.max_concurrency}) reached; "
+                f"no slot freed up within {self.queue_timeout}s"
+            )
+        with self._lock:
+            self._stats["in_flight"] += 1
+
+    def _release(self, started, response=None, failed=False):
+        elapsed = time.perf_counter() - started
+        usage = None
+        if response is not None:
+            try:
+                usage = response.usage_metadata
+            except Exception:
+                # Streams closed early may not have usage metadata yet
+                usage = None
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            self._stats["calls"] += 1
+            self._stats["total_seconds"] += elapsed
+            self._stats["max_seconds"] = max(self._stats["max_seconds"], elapsed)
+            if failed:
+                self._stats["errors"] += 1
+            if usage is not None:
+                self._stats["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+                self._stats["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+                self._stats["total_tokens"] += getattr(usage, "total_token_count", 0) or 0
+        self._slots.release()
+
+    def generate(self, prompt, model_name=None, system_instruction=None, **kwargs):
+        """
+        Calls generate_content on a shared model within the concurrency limit
+        and returns the raw response.
+        """
+        model = self.get_model(model_name, system_instruction)
+        self._acquire()
+        started = time.perf_counter()
+        response = None
+        try:
+            response = model.generate_content(prompt, **kwargs)
+            return response
+        finally:
+            # Also runs for KeyboardInterrupt and worker timeouts, so the slot is never lost
+            self._release(started, response, failed=response is None)
+
+    def generate_stream(self, prompt, model_name=None, system_instruction=None, **kwargs):
+        """
+        Streams generate_content and yields text chunks as they arrive.
+        The concurrency slot is held until the stream is exhausted or closed.
+        """
+        model = self.get_model(model_name, system_instruction)
+        self._acquire()
+        started = time.perf_counter()
+        response = None
+        failed = True
+        try:
+            response = model.generate_content(prompt, stream=True, **kwargs)
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without parts (only a finish reason or safety ratings) have no text
+                    text = ""
+                if text:
+                    yield text
+            failed = False
+        except GeneratorExit:
+            # Closed early by the consumer, not an error
+            failed = False
+            raise
+        finally:
+            self._release(started, response, failed=failed)
+
+    def generate_text(self, prompt, **kwargs):
+        """
+        Convenience wrapper returning the stripped response text.
+        """
+        return self.generate(prompt, **kwargs).text.strip()
+
+    async def _acquire_async(self):
+        # Waits on a worker thread so the event loop keeps running; the slots are shared with sync callers
+        waiter = asyncio.ensure_future(asyncio.to_thread(self._slots.acquire, True, self.queue_timeout))
+        try:
+            acquired = await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The wait carries on in its thread; give the slot back if it still gets one
+            waiter.add_done_callback(lambda done: done.cancelled() or not done.result() or self._slots.release())
+            raise
+        if not acquired:
+            raise RuntimeError(
+                f"Gemini concurrency limit ({self.max_concurrency}) reached; "
+                f"no slot freed up within {self.queue_timeout}s"
+            )
+        with self._lock:
+            self._stats["in_flight"] += 1
+
+    async def generate_async(self, prompt, model_name=None, system_instruction=None, **kwargs):
+        """
+        Async counterpart of generate, using the SDK's generate_content_async.
+        """
+        model = self.get_model(model_name, system_instruction)
+        await self._acquire_async()
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await model.generate_content_async(prompt, **kwargs)
+            return response
+        finally:
+            # Also runs when the awaiting task is cancelled
+            self._release(started, response, failed=response is None)
+
+    async def generate_text_async(self, prompt, **kwargs):
+        """
+        Async counterpart of generate_text.
+        """
+        response = await self.generate_async(prompt, **kwargs)
+        return response.text.strip()
+
+    def in_flight(self):
+        with self._lock:
+            return self._stats["in_flight"]
+
+    def drain(self, timeout=GEMINI_QUEUE_TIMEOUT):
+        """
+        Waits for in-flight Gemini calls (including open streams) to finish,
+        for graceful shutdown. Returns True if none are left within timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while self.in_flight() > 0:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def stats(self):
+        """
+        Returns call counts, latency and token usage since startup.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["max_concurrency"] = self.max_concurrency
+        stats["avg_seconds"] = round(stats["total_seconds"] / stats["calls"], 4) if stats["calls"] else None
+        stats["total_seconds"] = round(stats["total_seconds"], 4)
+        stats["max_seconds"] = round(stats["max_seconds"], 4)
+        return stats
+
+
+# Shared manager used by main.py, server.py and chatbot.py
+gemini_manager = GeminiClientManager()
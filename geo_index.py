@@ -0,0 +1,103 @@
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points in kilometres.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def to_unit_vector(lat, lon):
+    """
+    Point on the unit sphere. Straight-line distance between these vectors
+    grows with great-circle distance, without the longitude wrap-around
+    that breaks a tree over raw latitude/longitude.
+    """
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_for_km(distance_km):
+    """
+    Straight-line distance on the unit sphere matching a great-circle distance.
+    """
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class KDTree:
+    """
+    Static 3-d tree over (lat, lon) points for k-nearest-neighbour queries.
+    Built once from a list of (lat, lon, item); nodes are stored in flat
+    lists rather than objects to keep the tree small.
+    """
+
+    def __init__(self, points):
+        self._vectors = [to_unit_vector(lat, lon) for lat, lon, _ in points]
+        self._items = [item for _, _, item in points]
+        self._latlon = [(lat, lon) for lat, lon, _ in points]
+        # Node i splits on axis _axes[i] at point _order[i]; children are the halves of the slice
+        self._order = list(range(len(points)))
+        self._axes = [0] * len(points)
+        self._build(0, len(points), 0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def _build(self, start, end, depth):
+        if end - start <= 1:
+            if end > start:
+                self._axes[start] = depth % 3
+            return
+        axis = depth % 3
+        self._order[start:end] = sorted(self._order[start:end], key=lambda i: self._vectors[i][axis])
+        middle = (start + end) // 2
+        self._axes[middle] = axis
+        self._build(start, middle, depth + 1)
+        self._build(middle + 1, end, depth + 1)
+
+    def nearest(self, lat, lon, k=5, max_km=None):
+        """
+        Returns up to k [(item, distance_km)] closest to (lat, lon), nearest
+        first, optionally limited to max_km.
+        """
+        if not self._items or k <= 0:
+            return []
+        target = to_unit_vector(lat, lon)
+        limit = chord_for_km(max_km) ** 2 if max_km is not None else float("inf")
+        best = []  # max-heap of (-squared chord, index)
+
+        def visit(start, end):
+            if start >= end:
+                return
+            middle = (start + end) // 2
+            index = self._order[middle]
+            vector = self._vectors[index]
+            squared = sum((a - b) ** 2 for a, b in zip(vector, target))
+            if squared <= limit:
+                if len(best) < k:
+                    heapq.heappush(best, (-squared, index))
+                elif squared < -best[0][0]:
+                    heapq.heapreplace(best, (-squared, index))
+
+            axis = self._axes[middle]
+            diff = target[axis] - vector[axis]
+            near, far = ((start, middle), (middle + 1, end)) if diff < 0 else ((middle + 1, end), (start, middle))
+            visit(*near)
+            # Only cross the splitting plane if a closer point could be on the other side
+            radius = -best[0][0] if len(best) == k else limit
+            if diff * diff <= radius:
+                visit(*far)
+
+        visit(0, len(self._items))
+        results = []
+        for _, index in sorted(best, reverse=True):
+            point_lat, point_lon = self._latlon[index]
+            results.append((self._items[index], haversine_km(lat, lon, point_lat, point_lon)))
+        return results
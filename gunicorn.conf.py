@@ -0,0 +1,119 @@
+"""
+Gunicorn configuration for running the API in production:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Requests spend most of their time waiting on SerpApi and Gemini, so each
+worker serves many requests concurrently: with the default "gthread"
+worker class through a thread pool, or with "gevent" (pip install gevent)
+through green threads, which holds hundreds of waiting requests per worker.
+All settings can be overridden with the environment variables below.
+"""
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+bind = os.environ.get("WANDER_BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+# Worker processes; each keeps its own caches, so prefer fewer workers with more concurrency
+workers = int(os.environ.get("WANDER_WORKERS", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+worker_class = os.environ.get("WANDER_WORKER_CLASS", "gthread")
+# In-memory chat sessions are private to one worker, so several workers share them through SQLite
+# unless another backend is chosen (set in the environment the forked workers inherit)
+if workers > 1:
+    os.environ.setdefault("WANDER_SESSION_BACKEND", "sqlite")
+# Concurrent requests per gthread worker
+threads = int(os.environ.get("WANDER_THREADS", "64"))
+# Concurrent requests per gevent worker
+worker_connections = int(os.environ.get("WANDER_WORKER_CONNECTIONS", "500"))
+
+# Itinerary generation and SSE streams can legitimately take a while
+timeout = int(os.environ.get("WANDER_WORKER_TIMEOUT", "180"))
+# On SIGTERM, in-flight requests (and their Gemini calls) get this long to finish
+graceful_timeout = int(os.environ.get("WANDER_GRACEFUL_TIMEOUT", "90"))
+# After SIGTERM a worker keeps serving this long while reporting not ready, so load balancers
+# polling /api/ready stop routing to it before it closes its listener
+drain_delay = float(os.environ.get("WANDER_DRAIN_DELAY", "5"))
+keepalive = int(os.environ.get("WANDER_KEEPALIVE", "5"))
+
+# Recycle workers now and then to cap memory growth
+max_requests = int(os.environ.get("WANDER_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.environ.get("WANDER_MAX_REQUESTS_JITTER", "500"))
+
+accesslog = os.environ.get("WANDER_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("WANDER_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """
+    Runs the readiness checks once per worker at startup and logs failures,
+    and loads the airport index before the first request needs it.
+    """
+    from readiness import readiness
+    from server import conversation_histories
+    from airports import airport_index
+
+    install_drain_handler(worker)
+    airport_index.load()
+    ready, checks = readiness.run_checks(conversation_histories)
+    if ready:
+        worker.log.info("Worker %s ready", worker.pid)
+    else:
+        failed = {name: check["error"] for name, check in checks.items() if not check["ok"]}
+        worker.log.warning("Worker %s started but is not ready: %s", worker.pid, failed)
+
+
+def install_drain_handler(worker):
+    """
+    SIGTERM (the usual orchestrator stop signal): report not ready right
+    away, then hand over to gunicorn's own shutdown after drain_delay.
+    Runs after gunicorn installed its handlers, which it wraps.
+    """
+    from readiness import readiness
+    stop_worker = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        readiness.begin_drain()
+        worker.log.info("Worker %s draining for %ss", worker.pid, drain_delay)
+        if callable(stop_worker):
+            # Signal handlers must not block the worker loop, so the delay runs on a timer
+            timer = threading.Timer(drain_delay, stop_worker, (signum, frame))
+            timer.daemon = True
+            timer.start()
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_int(worker):
+    """
+    SIGINT/SIGQUIT: stop reporting ready so the load balancer drains this worker.
+    """
+    from readiness import readiness
+    readiness.begin_drain()
+
+
+def worker_exit(server, worker):
+    """
+    Lets running itinerary jobs finish, then waits for Gemini calls that are
+    still in flight (streams included) and for queued flight/hotel searches
+    before the worker process exits. Jobs and Gemini calls together get at
+    most graceful_timeout.
+    """
+    from readiness import readiness
+    from gemini_client import gemini_manager
+    from main import search_executor
+    from job_queue import job_queue
+    from prefetcher import search_prefetcher
+
+    deadline = time.monotonic() + graceful_timeout
+    readiness.begin_drain()
+    search_prefetcher.stop()
+    if not job_queue.shutdown(wait=True, timeout=graceful_timeout):
+        worker.log.warning("Worker %s exiting with itinerary jobs still running", worker.pid)
+    if not gemini_manager.drain(timeout=max(deadline - time.monotonic(), 0)):
+        worker.log.warning("Worker %s exiting with %s Gemini calls still in flight",
+                           worker.pid, gemini_manager.in_flight())
+    search_executor.shutdown(wait=True)
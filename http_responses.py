@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import os
+
+from flask import Response
+
+import json_codec
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compression would not pay off
+COMPRESSION_MIN_BYTES = int(os.environ.get("WANDER_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("WANDER_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("WANDER_BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/css", "application/javascript")
+
+
+def content_etag(body):
+    """
+    Strong ETag for a response body, derived from its bytes.
+    """
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def _client_etags(request):
+    # Compressed responses carry "<etag>-gzip" or "<etag>-br"; both validate the same content
+    tags = set()
+    for tag in request.if_none_match.as_set():
+        for suffix in ("-gzip", "-br"):
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)]
+                break
+        tags.add(tag)
+    return tags, request.if_none_match.star_tag
+
+
+def cached_json_response(payload, request, max_age=0):
+    """
+    Serializes payload once, tags it with a strong ETag and answers
+    If-None-Match with 304 Not Modified when the client already has it.
+    """
+    body = json_codec.dumps_bytes(payload)
+    etag = content_etag(body)
+
+    client_tags, star = _client_etags(request)
+    if star or etag in client_tags:
+        response = Response(status=304)
+        # The 304 must repeat the validator the 200 would have carried, encoding suffix included
+        encoding = _encoding_for(request, body)
+        response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+        response.vary.add("Accept-Encoding")
+    else:
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+    # Stored results never change, but clients must revalidate before reusing them
+    response.headers["Cache-Control"] = f"private, max-age={max_age}, must-revalidate"
+    return response
+
+
+def _choose_encoding(request):
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _encoding_for(request, body):
+    # Encoding compress_response applies to a compressible body of this size, or None
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return None
+    return _choose_encoding(request)
+
+
+def compress_response(response, request):
+    """
+    Compresses a response body with brotli or gzip when the client accepts
+    it and the body is large enough. Streaming responses (SSE) are left alone.
+    """
+    if (response.status_code < 200 or response.status_code >= 300
+            or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    encoding = _encoding_for(request, body)
+    if encoding is None:
+        return response
+
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    # A strong ETag names one exact representation, so the encoded body gets its own tag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
@@ -0,0 +1,329 @@
+import itertools
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+from result_store import result_store
+
+# Worker threads per process running jobs, and the most jobs allowed to wait
+JOB_WORKERS = int(os.environ.get("WANDER_JOB_WORKERS", "4"))
+JOB_MAX_QUEUED = int(os.environ.get("WANDER_JOB_MAX_QUEUED", "200"))
+# Finished jobs are kept in memory this long for status polls (the store keeps them longer)
+JOB_FINISHED_TTL = float(os.environ.get("WANDER_JOB_FINISHED_TTL", "600"))
+
+PRIORITIES = {"high": 0, "normal": 5, "low": 9}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFull(RuntimeError):
+    """
+    Raised when a job is submitted while JOB_MAX_QUEUED jobs are already waiting.
+    """
+
+
+class Job:
+    """
+    One queued unit of work and its status. Lower priority numbers run first.
+    """
+    __slots__ = ("job_id", "kind", "priority", "fn", "args", "status", "result", "error",
+                 "created_at", "started_at", "finished_at", "cancel_requested")
+
+    def __init__(self, kind, priority, fn, args):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_requested": self.cancel_requested,
+        }
+
+
+class JobQueue:
+    """
+    Priority queue with a bounded pool of worker threads for slow work such
+    as itinerary generation, so request threads return immediately. Every
+    status change is also written to the result store, which lets another
+    worker process on the same host answer status polls and cancels.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_queued=JOB_MAX_QUEUED,
+                 finished_ttl=JOB_FINISHED_TTL, store=result_store):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.finished_ttl = finished_ttl
+        self.store = store
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO order within a priority
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._jobs = {}
+        self._queued = 0  # jobs still waiting; cancelled jobs left in the heap do not count
+        self._current = threading.local()  # job running on each worker thread
+        self._threads = []
+        self._accepting = True
+        self._stats = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+
+    def _ensure_workers(self):
+        # Started lazily so each gunicorn worker process gets its own threads after fork
+        if len(self._threads) < self.workers:
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    @staticmethod
+    def parse_priority(value):
+        """
+        Accepts "high"/"normal"/"low" or an integer 0-9. Raises ValueError otherwise.
+        """
+        if value is None:
+            return PRIORITIES["normal"]
+        if isinstance(value, str) and value.lower() in PRIORITIES:
+            return PRIORITIES[value.lower()]
+        priority = int(value)
+        if not 0 <= priority <= 9:
+            raise ValueError("priority must be between 0 and 9")
+        return priority
+
+    def _persist(self, status):
+        # Takes a to_dict() snapshot, so the file is written without holding the lock
+        try:
+            self.store.save("jobs", status, status["job_id"])
+        except Exception as e:
+            print(f"Error persisting job {status['job_id']}: {str(e)}")
+
+    def submit(self, kind, fn, *args, priority=PRIORITIES["normal"]):
+        """
+        Queues fn(*args) and returns the Job. fn's return value becomes the
+        job result and must be JSON-serializable.
+        """
+        with self._lock:
+            if not self._accepting:
+                raise QueueFull("Job queue is shutting down")
+            if self._queued >= self.max_queued:
+                self._stats["rejected"] += 1
+                raise QueueFull(f"Job queue is full ({self.max_queued} jobs waiting)")
+            job = Job(kind, priority, fn, args)
+            self._jobs[job.job_id] = job
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._ensure_workers()
+            snapshot = job.to_dict()
+        self._persist(snapshot)
+        self._queue.put((priority, next(self._sequence), job.job_id))
+        print(f"Queued {kind} job {job.job_id} with priority {priority}")
+        return job
+
+    def _cancel_marked(self, job_id):
+        return self.store.load("job_cancels", job_id) is not None
+
+    def cancel_requested(self):
+        """
+        For job bodies: True once the job running on this thread has been
+        cancelled, so it can skip side effects such as saving its result.
+        """
+        job = getattr(self._current, "job", None)
+        return job is not None and (job.cancel_requested or self._cancel_marked(job.job_id))
+
+    def _work(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.status != QUEUED:
+                    continue
+            if self._cancel_marked(job_id):
+                self._finish(job, CANCELLED)
+                continue
+            with self._changed:
+                # Re-checked under the lock: the job may have been cancelled meanwhile
+                if job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+                self._queued -= 1
+                self._changed.notify_all()
+                snapshot = job.to_dict()
+            self._persist(snapshot)
+
+            self._current.job = job
+            try:
+                result = job.fn(*job.args)
+            except Exception as e:
+                print(f"Job {job_id} failed: {str(e)}")
+                traceback.print_exc()
+                self._finish(job, FAILED, error=str(e))
+                continue
+            finally:
+                self._current.job = None
+            # A running job cannot be interrupted; a cancel requested meanwhile discards its result
+            if job.cancel_requested or self._cancel_marked(job_id):
+                self._finish(job, CANCELLED)
+            else:
+                self._finish(job, SUCCEEDED, result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            if job.status in FINISHED_STATES:
+                return
+            snapshot = job.to_dict()
+        snapshot.update(status=status, result=result, error=error, finished_at=time.time())
+        # Written before the in-memory update, and outside the lock so polls never wait on disk:
+        # nobody here sees the new state before other processes can
+        self._persist(snapshot)
+        with self._changed:
+            if job.status in FINISHED_STATES:
+                # Cancelled while the snapshot was written; the store must keep the cancellation
+                snapshot = job.to_dict()
+            else:
+                if job.status == QUEUED:
+                    self._queued -= 1
+                job.status = status
+                job.result = result
+                job.error = error
+                job.finished_at = snapshot["finished_at"]
+                job.fn = None
+                job.args = None
+                self._stats[status] += 1
+                self._expire_finished()
+                self._changed.notify_all()
+                snapshot = None
+        if snapshot is not None:
+            self._persist(snapshot)
+
+    def _expire_finished(self):
+        cutoff = time.time() - self.finished_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Returns the job status dict, or None if the job is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+        return self.store.load("jobs", job_id)
+
+    def wait(self, job_id, since=None, timeout=30.0):
+        """
+        Long poll: returns the job status as soon as it differs from `since`
+        (or the job finishes), or the current status after timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                while job.status == since and job.status not in FINISHED_STATES:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+                return job.to_dict()
+
+        # Owned by another process: poll the shared store
+        status = self.store.load("jobs", job_id)
+        while (status is not None and status["status"] == since
+               and status["status"] not in FINISHED_STATES and time.monotonic() < deadline):
+            time.sleep(0.25)
+            status = self.store.load("jobs", job_id)
+        return status
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Queued jobs never run; a running job finishes but its
+        result is discarded. Returns the job status, or None if unknown.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if job.status in FINISHED_STATES:
+                    return job.to_dict()
+                job.cancel_requested = True
+                if job.status == QUEUED:
+                    job.status = CANCELLED
+                    job.finished_at = time.time()
+                    job.fn = None
+                    job.args = None
+                    self._queued -= 1
+                    self._stats[CANCELLED] += 1
+                self._changed.notify_all()
+                snapshot = job.to_dict()
+        if job is not None:
+            self._persist(snapshot)
+            return snapshot
+
+        status = self.store.load("jobs", job_id)
+        if status is None or status["status"] in FINISHED_STATES:
+            return status
+        # Owned by another process: leave a marker for it to pick up
+        self.store.save("job_cancels", {"job_id": job_id, "at": time.time()}, job_id)
+        status["cancel_requested"] = True
+        return status
+
+    def shutdown(self, wait=True, timeout=None):
+        """
+        Stops accepting jobs, fails jobs still waiting (clients can resubmit)
+        and lets running jobs finish, waiting at most timeout seconds for
+        them. Returns False if jobs were still running when it gave up.
+        """
+        with self._lock:
+            self._accepting = False
+            waiting = [job for job in self._jobs.values() if job.status == QUEUED]
+        for job in waiting:
+            self._finish(job, FAILED, error="Server shutting down, please resubmit")
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._sequence), None))
+        if not wait:
+            return True
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = self._queued
+            stats["running"] = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+        stats["workers"] = self.workers
+        stats["max_queued"] = self.max_queued
+        return stats
+
+
+# Shared queue for itinerary generation jobs
+job_queue = JobQueue()
@@ -0,0 +1,93 @@
+import json
+import os
+
+# Fastest installed JSON library: orjson, then ujson, then the standard library.
+# WANDER_JSON_BACKEND=json forces the standard library (e.g. to compare output).
+JSON_BACKEND = os.environ.get("WANDER_JSON_BACKEND", "auto")
+# Characters of a payload printed by preview()
+PREVIEW_CHARS = int(os.environ.get("WANDER_JSON_PREVIEW_CHARS", "500"))
+
+orjson = None
+ujson = None
+if JSON_BACKEND in ("auto", "orjson"):
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+if orjson is None and JSON_BACKEND in ("auto", "ujson"):
+    try:
+        import ujson
+    except ImportError:
+        ujson = None
+
+BACKEND = "orjson" if orjson is not None else "ujson" if ujson is not None else "json"
+
+# Raised by loads() whatever the backend (orjson's error is already a subclass)
+JSONDecodeError = json.JSONDecodeError
+
+
+def _stdlib_dumps(obj, pretty=False, sort_keys=False):
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+
+
+def dumps_bytes(obj, pretty=False, sort_keys=False):
+    """
+    Serializes obj to UTF-8 JSON bytes. Compact by default (for responses,
+    storage and caches); pretty indents by two spaces for people to read.
+    """
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if pretty else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, option=option | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the standard library still handles
+            return _stdlib_dumps(obj, pretty, sort_keys).encode("utf-8")
+    return dumps(obj, pretty, sort_keys).encode("utf-8")
+
+
+def dumps(obj, pretty=False, sort_keys=False):
+    """
+    Serializes obj to a JSON string (see dumps_bytes).
+    """
+    if orjson is not None:
+        return dumps_bytes(obj, pretty, sort_keys).decode("utf-8")
+    if ujson is not None:
+        try:
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                               indent=2 if pretty else 0, sort_keys=sort_keys)
+        except (TypeError, OverflowError):
+            pass
+    return _stdlib_dumps(obj, pretty, sort_keys)
+
+
+def loads(data):
+    """
+    Parses JSON from str or bytes. Raises JSONDecodeError on invalid input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if ujson is not None:
+        try:
+            return ujson.loads(data)
+        except ValueError as e:
+            text = data.decode("utf-8", "replace") if isinstance(data, (bytes, bytearray)) else data
+            raise JSONDecodeError(str(e), text, 0)
+    return json.loads(data)
+
+
+def response_json(response):
+    """
+    Parses an HTTP response body (requests or httpx) straight from its
+    bytes, skipping the client's own text decoding and parsing.
+    """
+    return loads(response.content)
+
+
+def preview(obj, limit=PREVIEW_CHARS):
+    """
+    Short compact rendering of a payload for log lines.
+    """
+    text = dumps(obj)
+    return text if len(text) <= limit else f"{text[:limit]}..."
@@ -0,0 +1,136 @@
+import json
+
+
+class IncrementalJSONScanner:
+    """
+    Incremental scanner for a single JSON object arriving in chunks (e.g. a
+    streamed LLM response). Each call to feed() returns the members that
+    became complete, as (path, value) tuples, without waiting for the whole
+    document.
+
+    Members of the root object are emitted as soon as they close. Members
+    whose key is listed in `expand` are not emitted whole; instead each of
+    their own members is emitted individually (so "itinerary" yields one
+    event per "day_N"). Any text before the first "{" - such as a markdown
+    code fence - is ignored.
+    """
+
+    def __init__(self, expand=()):
+        self.expand = set(expand)
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+
+    def _new_frame(self, kind, path):
+        return {
+            "kind": kind,
+            "path": path,
+            "expect": "key" if kind == "{" else "value",
+            "last_string": None,
+            "key": None,
+            "value_start": None,
+            "scalar": False,
+        }
+
+    def _emits(self, frame):
+        # Root members are emitted unless expanded; members of expanded objects are emitted
+        if frame["kind"] != "{":
+            return False
+        path = frame["path"]
+        if not path:
+            return frame["key"] not in self.expand
+        return len(path) == 1 and path[0] in self.expand
+
+    def _finish_value(self, frame, end, events):
+        if frame["value_start"] is not None and self._emits(frame):
+            fragment = self._text[frame["value_start"]:end].strip()
+            try:
+                events.append((frame["path"] + (frame["key"],), json.loads(fragment)))
+            except ValueError:
+                # Malformed member; the final full parse decides what to do with it
+                pass
+        frame["value_start"] = None
+        frame["scalar"] = False
+        frame["expect"] = "comma"
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of text and returns the list of newly completed members.
+        """
+        events = []
+        if self.done or not chunk:
+            return events
+        self._text += chunk
+        text = self._text
+        i = self._pos
+        length = len(text)
+        while i < length and not self.done:
+            c = text[i]
+            if not self._stack:
+                if c == "{":
+                    self._stack.append(self._new_frame("{", ()))
+                i += 1
+                continue
+
+            frame = self._stack[-1]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if frame["kind"] == "{" and frame["expect"] == "key":
+                        frame["last_string"] = json.loads(text[self._string_start:i + 1])
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if frame["expect"] == "value" and frame["value_start"] is None:
+                    frame["value_start"] = i
+                    frame["scalar"] = True
+            elif c in "{[":
+                if frame["expect"] == "value" and frame["value_start"] is None:
+                    frame["value_start"] = i
+                child_path = frame["path"] + (frame["key"] if frame["kind"] == "{" else None,)
+                self._stack.append(self._new_frame(c, child_path))
+            elif c in "}]":
+                if frame["kind"] == "{" and frame["scalar"]:
+                    self._finish_value(frame, i, events)
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                else:
+                    parent = self._stack[-1]
+                    if parent["kind"] == "{":
+                        self._finish_value(parent, i + 1, events)
+            elif c == ":":
+                if frame["kind"] == "{":
+                    frame["key"] = frame["last_string"]
+                    frame["expect"] = "value"
+                    frame["value_start"] = None
+            elif c == ",":
+                if frame["kind"] == "{":
+                    if frame["scalar"]:
+                        self._finish_value(frame, i, events)
+                    frame["expect"] = "key"
+            elif not c.isspace():
+                # Start of a number, true, false or null
+                if frame["expect"] == "value" and frame["value_start"] is None:
+                    frame["value_start"] = i
+                    frame["scalar"] = True
+            i += 1
+        self._pos = i
+        return events
+
+    def text(self):
+        """
+        Returns all text fed so far.
+        """
+        return self._text
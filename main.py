@@ -1,17 +1,201 @@
+import asyncio
+import contextvars
 import requests
 import datetime
 import json
-import google.generativeai as genai
 import os
+import json_codec
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from search_cache import search_cache, make_cache_key
+from serpapi_client import serpapi_client, async_serpapi_client, SERPAPI_URL, RETRY_STATUSES
+from circuit_breaker import engine_breaker, route_breaker, negative_cache
+from singleflight import search_singleflight
+from prefetcher import search_prefetcher
+from serpapi_quota import RateLimitExceeded
+from gemini_client import gemini_manager
+from json_stream import IncrementalJSONScanner
+from result_store import result_store, LEGACY_FILE_EXPORT
+from result_views import summarize_trip
+from models import FlightOption, HotelProperty
+from airports import airport_index
+from job_queue import job_queue
 
-def search_google_flights(api_key, outbound_date, return_date, departure_id="PEK", arrival_id="AUS"):
+# Shared, bounded pool for upstream fan-out (hotel search alongside flights,
+# alternative routes raced against each other)
+SEARCH_WORKERS = int(os.environ.get("WANDER_SEARCH_WORKERS", "8"))
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="serpapi-search")
+
+# Destinations searched at once by a batch search, and the most a batch may contain
+BATCH_CONCURRENCY = int(os.environ.get("WANDER_BATCH_CONCURRENCY", "4"))
+MAX_BATCH_DESTINATIONS = int(os.environ.get("WANDER_MAX_BATCH_DESTINATIONS", "10"))
+
+def record_engine_outcome(engine, status_code):
+    """
+    Feeds an upstream status code into the per-engine circuit breaker.
+    Throttling, 5xx and transport failures (status_code None) count as failures.
+    """
+    if status_code is None or status_code in RETRY_STATUSES:
+        engine_breaker.record_failure(engine)
+    else:
+        engine_breaker.record_success(engine)
+
+def record_engine_exception(engine, error):
+    """
+    Counts a transport failure against the engine, unless the call never
+    left the process because our own SerpApi rate limiter turned it away.
+    """
+    if isinstance(error, RateLimitExceeded):
+        print(f"{engine} search skipped: {str(error)}")
+        return
+    record_engine_outcome(engine, None)
+
+def submit_search(fn, *args):
+    """
+    Runs a search on search_executor, carrying over the caller's context
+    (e.g. the session the SerpApi rate limiter charges).
+    """
+    return search_executor.submit(contextvars.copy_context().run, fn, *args)
+
+def run_search_steps(steps):
+    """
+    Drives a search step generator with the blocking SerpApi client: every
+    params dict it yields is fetched and the response (or the exception)
+    is sent back in. Returns the generator's result.
+    Identical searches already in flight (same normalized first request)
+    are not repeated; the caller waits for and shares that search's result.
+    """
+    try:
+        params = next(steps)
+    except StopIteration as stop:
+        # Answered without an upstream call (cache hit, open circuit, ...)
+        return stop.value
+    
+    key = make_cache_key(params)
+    call, is_leader = search_singleflight.join(key)
+    if not is_leader:
+        try:
+            # Followers get their own copy, as they would from the cache
+            result = search_singleflight.share(call.result())
+        except Exception as e:
+            print(f"Coalesced search failed ({str(e)}), searching directly")
+        else:
+            steps.close()
+            return result
+    
+    try:
+        result = _fetch_search_steps(steps, params)
+    except BaseException as e:
+        if is_leader:
+            search_singleflight.fail(key, call, e)
+        raise
+    if is_leader:
+        search_singleflight.resolve(key, call, result)
+    return result
+
+def _fetch_search_steps(steps, params):
+    try:
+        while True:
+            try:
+                response = serpapi_client.get(SERPAPI_URL, params=params)
+            except Exception as e:
+                params = steps.throw(e)
+            else:
+                params = steps.send(response)
+    except StopIteration as stop:
+        return stop.value
+
+async def run_search_steps_async(steps):
+    """
+    Same as run_search_steps, but fetches with the async SerpApi client so
+    many searches can wait on one event loop. Coalesces with sync and async
+    searches alike. The generator itself runs on a worker thread, so its
+    cache reads and writes never block the event loop.
+    """
+    done, value = await asyncio.to_thread(_advance_steps, next, steps)
+    if done:
+        return value
+    params = value
+    
+    key = make_cache_key(params)
+    call, is_leader = search_singleflight.join(key)
+    if not is_leader:
+        try:
+            # shield: cancelling this waiter must not cancel the shared call
+            result = search_singleflight.share(await asyncio.shield(asyncio.wrap_future(call)))
+        except Exception as e:
+            print(f"Coalesced search failed ({str(e)}), searching directly")
+        else:
+            steps.close()
+            return result
+    
+    try:
+        result = await _fetch_search_steps_async(steps, params)
+    except BaseException as e:
+        if is_leader:
+            search_singleflight.fail(key, call, e)
+        raise
+    if is_leader:
+        search_singleflight.resolve(key, call, result)
+    return result
+
+def _advance_steps(advance, *args):
+    # StopIteration cannot be raised through a future, so the result is returned as (done, value)
+    try:
+        return False, advance(*args)
+    except StopIteration as stop:
+        return True, stop.value
+
+async def _fetch_search_steps_async(steps, params):
+    while True:
+        try:
+            response = await async_serpapi_client.get(SERPAPI_URL, params=params)
+        except asyncio.CancelledError:
+            # Let the generator clean up (e.g. hand back a circuit breaker trial)
+            steps.close()
+            raise
+        except Exception as e:
+            done, value = await asyncio.to_thread(_advance_steps, steps.throw, e)
+        else:
+            done, value = await asyncio.to_thread(_advance_steps, steps.send, response)
+        if done:
+            return value
+        params = value
+
+def search_google_flights(api_key, outbound_date, return_date, departure_id="PEK", arrival_id="AUS", refresh=False):
     """
     Calls the Google Flights API using SerpApi and returns JSON flight results.
+    With refresh, the cache is not read (used by the prefetcher to renew entries).
+    """
+    return run_search_steps(
+        flight_search_steps(api_key, outbound_date, return_date, departure_id, arrival_id, refresh)
+    )
+
+async def search_google_flights_async(api_key, outbound_date, return_date, departure_id="PEK", arrival_id="AUS",
+                                      refresh=False):
+    """
+    Async counterpart of search_google_flights.
+    """
+    return await run_search_steps_async(
+        flight_search_steps(api_key, outbound_date, return_date, departure_id, arrival_id, refresh)
+    )
+
+def flight_search_steps(api_key, outbound_date, return_date, departure_id, arrival_id, refresh=False):
+    """
+    The flight search logic shared by the sync and async entry points.
+    A generator that yields SerpApi params and receives the responses.
     """
     # Format the airport codes correctly - SerpAPI might need specific formatting
     departure_id = departure_id.strip().upper()
     arrival_id = arrival_id.strip().upper()
     
+    # Fix chat-produced codes (city names, metro codes, typos) and never spend quota on unknown airports
+    departure_code = airport_index.resolve(departure_id)
+    arrival_code = airport_index.resolve(arrival_id)
+    if departure_code is None or arrival_code is None:
+        print(f"Skipping flight search for {departure_id}-{arrival_id}: unknown airport code")
+        return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
+    departure_id, arrival_id = departure_code, arrival_code
+    
     # Check and adjust dates to ensure they are in the future
     # The API requires dates to be in the future
     today = datetime.datetime.now().date()
@@ -42,7 +226,7 @@ def search_google_flights(api_key, outbound_date, return_date, departure_id="PEK
         print(f"Using default future dates: {outbound_date} to {return_date}")
     
     # Try alternative parameters that might work better with SerpAPI
-    url = "https://serpapi.com/search.json"
+    url = SERPAPI_URL
     params = {
         "engine": "google_flights",
         "departure_id": departure_id,     # e.g., "PEK"
@@ -54,68 +238,119 @@ def search_google_flights(api_key, outbound_date, return_date, departure_id="PEK
         "api_key": api_key
     }
     
+    # Serve repeat searches from the cache instead of spending API quota
+    cache_key = make_cache_key(params)
+    if not refresh:
+        search_prefetcher.record("flights", cache_key, (api_key, outbound_date, return_date, departure_id, arrival_id))
+        cached_result, expires_at = search_cache.lookup(cache_key)
+        if cached_result is not None:
+            print(f"Flight cache hit for {departure_id} to {arrival_id} ({outbound_date} to {return_date})")
+            if expires_at <= datetime.datetime.now().timestamp():
+                # Slightly stale: answer now, refresh in the background
+                search_prefetcher.revalidate(cache_key)
+            return cached_result
+    
+    # Fail fast to mock data for routes SerpApi recently rejected or while the engine is degraded
+    route_key = f"{departure_id}-{arrival_id}"
+    rejection = negative_cache.get(route_key)
+    if rejection:
+        print(f"Skipping flight search for {route_key}: recently rejected ({rejection})")
+        return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
+    if not engine_breaker.allow("google_flights"):
+        print("Skipping flight search: google_flights circuit is open")
+        return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
+    if not route_breaker.allow(route_key):
+        engine_breaker.release("google_flights")
+        print(f"Skipping flight search for {route_key}: route circuit is open")
+        return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
+    
     print(f"Making flight API request to: {url}")
     print(f"Flight API parameters: {params}")
     
     try:
-        response = requests.get(url, params=params)
+        response = yield params
         print(f"Flight API response status: {response.status_code}")
         print(f"Response URL: {response.url}")
+        record_engine_outcome("google_flights", response.status_code)
         
         if response.status_code == 200:
-            result = response.json()
+            result = json_codec.response_json(response)
             print(f"Flight API response data keys: {list(result.keys()) if result else 'None'}")
             
             # Check if the response contains error information
             if 'error' in result:
                 print(f"API Error: {result['error']}")
+                negative_cache.add(route_key, result['error'])
+                route_breaker.record_failure(route_key)
                 return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
                 
             # Check if we have flight data in the response
             if 'best_flights' in result or 'other_flights' in result:
                 print(f"Success! Found flight data in the response.")
+                route_breaker.record_success(route_key)
+                search_cache.set(cache_key, result, "google_flights")
                 return result
             else:
                 print(f"No flight data found in the response. Using mock data.")
-                print(f"Response content: {json.dumps(result, indent=2)[:500]}...")
+                print(f"Response content: {json_codec.preview(result)}")
+                route_breaker.record_failure(route_key)
                 return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
         else:
             print(f"Error fetching flight data: {response.status_code}")
             try:
-                error_content = response.json()
+                error_content = json_codec.response_json(response)
                 print(f"Error content: {error_content}")
             except:
                 print(f"Error response: {response.text[:1000]}")
             
             # Try an alternative approach - use from and to cities instead of airport codes
             print("Trying alternative format for flight search...")
-            return try_alternative_flight_search(api_key, outbound_date, return_date, departure_id, arrival_id)
+            alt_result = yield from alternative_flight_search_steps(api_key, outbound_date, return_date, departure_id, arrival_id)
+            
+            # A client error on the codes plus a failed city search means the route itself is bad
+            if alt_result.get('search_metadata', {}).get('id') == 'mock_search_id':
+                route_breaker.record_failure(route_key)
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    negative_cache.add(route_key, f"HTTP {response.status_code}")
+            else:
+                route_breaker.record_success(route_key)
+            return alt_result
     except Exception as e:
         import traceback
         print(f"Exception in flight search: {str(e)}")
         print(traceback.format_exc())
+        record_engine_exception("google_flights", e)
         return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
+    finally:
+        # Half-open trials that got no outcome (rate limited, cancelled, ...) are handed back
+        engine_breaker.release("google_flights")
+        route_breaker.release(route_key)
 
 def try_alternative_flight_search(api_key, outbound_date, return_date, departure_id, arrival_id):
     """
     Try an alternative approach to search for flights using city names instead of airport codes
     """
-    # Map common airport codes to city names
-    airport_to_city = {
-        "PEK": "Beijing",
-        "AUS": "Austin",
-        "LAX": "Los Angeles",
-        "JFK": "New York",
-        "LHR": "London",
-        "CDG": "Paris",
-        "SYD": "Sydney",
-        "NRT": "Tokyo"
-    }
-    
-    departure_city = airport_to_city.get(departure_id, departure_id)
-    arrival_city = airport_to_city.get(arrival_id, arrival_id)
+    return run_search_steps(
+        alternative_flight_search_steps(api_key, outbound_date, return_date, departure_id, arrival_id)
+    )
+
+async def try_alternative_flight_search_async(api_key, outbound_date, return_date, departure_id, arrival_id):
+    """
+    Async counterpart of try_alternative_flight_search.
+    """
+    return await run_search_steps_async(
+        alternative_flight_search_steps(api_key, outbound_date, return_date, departure_id, arrival_id)
+    )
+
+def alternative_flight_search_steps(api_key, outbound_date, return_date, departure_id, arrival_id):
+    """
+    Step generator for the city-name flight search (see flight_search_steps).
+    """
+    # Map airport codes to city names
+    departure_city = airport_index.city_for(departure_id, departure_id)
+    arrival_city = airport_index.city_for(arrival_id, arrival_id)
     
-    url = "https://serpapi.com/search.json"
+    url = SERPAPI_URL
     params = {
         "engine": "google_flights",
         "q": f"Flights from {departure_city} to {arrival_city}",
@@ -126,18 +361,30 @@ def try_alternative_flight_search(api_key, outbound_date, return_date, departure
         "api_key": api_key
     }
     
+    cache_key = make_cache_key(params)
+    cached_result = search_cache.get(cache_key)
+    if cached_result is not None:
+        print(f"Alternative flight cache hit for {departure_city} to {arrival_city}")
+        return cached_result
+    
+    if not engine_breaker.allow("google_flights"):
+        print("Skipping alternative flight search: google_flights circuit is open")
+        return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
+    
     print(f"Trying alternative search with params: {params}")
     
     try:
-        response = requests.get(url, params=params)
+        response = yield params
         print(f"Alternative flight API response status: {response.status_code}")
+        record_engine_outcome("google_flights", response.status_code)
         
         if response.status_code == 200:
-            result = response.json()
+            result = json_codec.response_json(response)
             print(f"Alternative flight API response data keys: {list(result.keys()) if result else 'None'}")
             
             if 'best_flights' in result or 'other_flights' in result:
                 print(f"Success with alternative approach! Found flight data in the response.")
+                search_cache.set(cache_key, result, "google_flights")
                 return result
             else:
                 print(f"No flight data found in alternative response.")
@@ -147,7 +394,10 @@ def try_alternative_flight_search(api_key, outbound_date, return_date, departure
             return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
     except Exception as e:
         print(f"Exception in alternative flight search: {str(e)}")
+        record_engine_exception("google_flights", e)
         return generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date)
+    finally:
+        engine_breaker.release("google_flights")
 
 def generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_date):
     """
@@ -255,9 +505,25 @@ def generate_mock_flight_data(departure_id, arrival_id, outbound_date, return_da
         ]
     }
 
-def search_google_hotels(api_key, check_in_date, check_out_date, hotel_query="Hotels in Austin"):
+def search_google_hotels(api_key, check_in_date, check_out_date, hotel_query="Hotels in Austin", refresh=False):
     """
     Calls the Google Hotels API using SerpApi and returns JSON hotel results.
+    With refresh, the cache is not read (used by the prefetcher to renew entries).
+    """
+    return run_search_steps(hotel_search_steps(api_key, check_in_date, check_out_date, hotel_query, refresh))
+
+async def search_google_hotels_async(api_key, check_in_date, check_out_date, hotel_query="Hotels in Austin",
+                                     refresh=False):
+    """
+    Async counterpart of search_google_hotels.
+    """
+    return await run_search_steps_async(
+        hotel_search_steps(api_key, check_in_date, check_out_date, hotel_query, refresh)
+    )
+
+def hotel_search_steps(api_key, check_in_date, check_out_date, hotel_query, refresh=False):
+    """
+    Step generator for the hotel search (see flight_search_steps).
     """
     # Check and adjust dates to ensure they are in the future
     # The API requires dates to be in the future
@@ -288,7 +554,7 @@ def search_google_hotels(api_key, check_in_date, check_out_date, hotel_query="Ho
         check_out_date = check_out_date_obj.strftime("%Y-%m-%d")
         print(f"Using default future dates for hotels: {check_in_date} to {check_out_date}")
     
-    url = "https://serpapi.com/search.json"
+    url = SERPAPI_URL
     params = {
         "engine": "google_hotels",
         "q": hotel_query,                # e.g., "Hotels in Austin"
@@ -299,27 +565,60 @@ def search_google_hotels(api_key, check_in_date, check_out_date, hotel_query="Ho
         "api_key": api_key
     }
     
+    cache_key = make_cache_key(params)
+    if not refresh:
+        search_prefetcher.record("hotels", cache_key, (api_key, check_in_date, check_out_date, hotel_query))
+        cached_result, expires_at = search_cache.lookup(cache_key)
+        if cached_result is not None:
+            print(f"Hotel cache hit for '{hotel_query}' ({check_in_date} to {check_out_date})")
+            if expires_at <= datetime.datetime.now().timestamp():
+                search_prefetcher.revalidate(cache_key)
+            return cached_result
+    
+    # Fail fast to mock data for queries SerpApi recently rejected or while the engine is degraded
+    query_key = f"hotels:{' '.join(hotel_query.split()).lower()}"
+    rejection = negative_cache.get(query_key)
+    if rejection:
+        print(f"Skipping hotel search for '{hotel_query}': recently rejected ({rejection})")
+        return generate_mock_hotel_data(hotel_query, check_in_date, check_out_date)
+    if not engine_breaker.allow("google_hotels"):
+        print("Skipping hotel search: google_hotels circuit is open")
+        return generate_mock_hotel_data(hotel_query, check_in_date, check_out_date)
+    
     print(f"Making hotel API request to: {url}")
     print(f"Hotel API parameters: {params}")
     
     try:
-        response = requests.get(url, params=params)
+        response = yield params
         print(f"Hotel API response status: {response.status_code}")
+        record_engine_outcome("google_hotels", response.status_code)
         
         if response.status_code == 200:
-            result = response.json()
+            result = json_codec.response_json(response)
             print(f"Hotel API response data keys: {list(result.keys()) if result else 'None'}")
+            if 'error' in result:
+                print(f"Hotel API Error: {result['error']}")
+                negative_cache.add(query_key, result['error'])
+                return generate_mock_hotel_data(hotel_query, check_in_date, check_out_date)
+            # Only cache real listings
+            if 'properties' in result:
+                search_cache.set(cache_key, result, "google_hotels")
             return result
         else:
             print(f"Error fetching hotel data: {response.status_code} - {response.text}")
+            if 400 <= response.status_code < 500 and response.status_code != 429:
+                negative_cache.add(query_key, f"HTTP {response.status_code}")
             # Return mock data if the API call fails
             return generate_mock_hotel_data(hotel_query, check_in_date, check_out_date)
     except Exception as e:
         import traceback
         print(f"Exception in hotel search: {str(e)}")
+        record_engine_exception("google_hotels", e)
         print(traceback.format_exc())
         # Return mock data if an exception occurs
         return generate_mock_hotel_data(hotel_query, check_in_date, check_out_date)
+    finally:
+        engine_breaker.release("google_hotels")
 
 def generate_mock_hotel_data(hotel_query, check_in_date, check_out_date):
     """
@@ -383,54 +682,55 @@ def generate_mock_hotel_data(hotel_query, check_in_date, check_out_date):
         ]
     }
 
+# Let the prefetcher repeat popular searches, bypassing the cache to renew their entries
+search_prefetcher.register("flights", lambda *args: search_google_flights(*args, refresh=True))
+search_prefetcher.register("hotels", lambda *args: search_google_hotels(*args, refresh=True))
+
+def format_segments(flight, separator="; ", prefix=""):
+    """
+    One line per segment of a FlightOption: airline, flight number and the
+    departure/arrival airports with times.
+    """
+    return separator.join(
+        f"{prefix}{seg.airline or 'N/A'} {seg.flight_number or 'N/A'}: "
+        f"{seg.departure_name or 'N/A'} at {seg.departure_time or 'N/A'} -> "
+        f"{seg.arrival_name or 'N/A'} at {seg.arrival_time or 'N/A'}"
+        for seg in flight.segments or ()
+    )
+
 def display_flight_options(flight_data):
     """
     Displays a few flight options (using 'best_flights' or 'other_flights')
-    and returns a list of these options.
+    and returns them as FlightOption models.
     """
     flights_list = flight_data.get("best_flights") or flight_data.get("other_flights", [])
     if not flights_list:
         print("No flight options found.")
         return []
-    options = []
-    for idx, flight_option in enumerate(flights_list[:3], start=1):  # show first 3 options
+    options = [FlightOption.from_dict(flight_option) for flight_option in flights_list[:3]]  # show first 3 options
+    for idx, flight in enumerate(options, start=1):
         print(f"\nFlight Option {idx}:")
-        segments = flight_option.get("flights", [])
-        for seg in segments:
-            dep_airport = seg.get("departure_airport", {}).get("name", "N/A")
-            dep_time    = seg.get("departure_airport", {}).get("time", "N/A")
-            arr_airport = seg.get("arrival_airport", {}).get("name", "N/A")
-            arr_time    = seg.get("arrival_airport", {}).get("time", "N/A")
-            airline     = seg.get("airline", "N/A")
-            flight_num  = seg.get("flight_number", "N/A")
-            print(f"  {airline} {flight_num}: {dep_airport} at {dep_time} -> {arr_airport} at {arr_time}")
-        total_duration = flight_option.get("total_duration", "N/A")
-        price          = flight_option.get("price", "N/A")
-        print(f"  Total Duration: {total_duration} minutes")
-        print(f"  Price: {price} USD")
-        options.append(flight_option)
+        print(format_segments(flight, "\n", "  "))
+        print(f"  Total Duration: {flight.total_duration or 'N/A'} minutes")
+        print(f"  Price: {flight.price or 'N/A'} USD")
     return options
 
 def display_hotel_options(hotel_data):
     """
     Displays a few hotel options based on the 'properties' key,
-    and returns a list of these options.
+    and returns them as HotelProperty models.
     """
     hotels_list = hotel_data.get("properties", [])
     if not hotels_list:
         print("No hotel options found.")
         return []
-    options = []
-    for idx, hotel in enumerate(hotels_list[:3], start=1):  # show first 3 options
-        name = hotel.get("name", "N/A")
-        address = hotel.get("address", "N/A")
-        rating = hotel.get("overall_rating", "N/A")
-        rate = hotel.get("rate_per_night", {}).get("extracted_lowest", "N/A")
-        print(f"\nHotel Option {idx}: {name}")
-        print(f"  Address: {address}")
-        print(f"  Overall Rating: {rating}")
-        print(f"  Rate per Night: {rate} USD")
-        options.append(hotel)
+    options = [HotelProperty.from_dict(hotel) for hotel in hotels_list[:3]]  # show first 3 options
+    for idx, prop in enumerate(options, start=1):
+        rate = prop.rate_per_night.extracted_lowest if prop.rate_per_night else None
+        print(f"\nHotel Option {idx}: {prop.name or 'N/A'}")
+        print(f"  Address: {prop.address or 'N/A'}")
+        print(f"  Overall Rating: {prop.overall_rating or 'N/A'}")
+        print(f"  Rate per Night: {rate or 'N/A'} USD")
     return options
 
 def choose_option(options, option_type="flight"):
@@ -455,19 +755,18 @@ import requests
 def call_gemini(prompt):
     """
     Calls the Gemini API using the provided prompt.
-    This function uses the new endpoint and payload structure.
+    Goes through the shared client manager, so the SDK is configured once
+    and concurrent calls are capped per process.
     """
-    ENTER_YOUR_API_KEY = "ENTER_YOU_API_KEY"
-# -----------------------------
-# Part 3: Set Up Google Gemini API
-# -----------------------------
-    genai.configure(api_key="ENTER_YOU_API_KEY")
-    gemini_model = genai.GenerativeModel("gemini-1.5-flash")
-
-    response = gemini_model.generate_content(prompt)
-    ai_response = response.text.strip()
+    ai_response = gemini_manager.generate_text(prompt)
     return ai_response
 
+async def call_gemini_async(prompt):
+    """
+    Async counterpart of call_gemini; shares the same concurrency limit.
+    """
+    return await gemini_manager.generate_text_async(prompt)
+
 def print_itinerary(ai_response):
     """
     Prints the formatted itinerary from the AI response
@@ -485,7 +784,7 @@ def print_itinerary(ai_response):
                 cleaned_response = markdown_match.group(1).strip()
         
         # Parse the AI response string into a JSON object
-        itin = json.loads(cleaned_response)
+        itin = json_codec.loads(cleaned_response)
         
         days = itin.get("itinerary", {})
         for day_key in sorted(days.keys(), key=lambda k: int(k.split('_')[1])):
@@ -507,9 +806,186 @@ def print_itinerary(ai_response):
         print("Raw AI response:", ai_response)
         return None
 
+def is_real_flight_data(flight_data):
+    """
+    Returns True if flight_data came from the API (not mock data) and contains flights.
+    """
+    if flight_data and 'search_metadata' in flight_data:
+        if flight_data['search_metadata'].get('id') != 'mock_search_id':
+            return 'best_flights' in flight_data or 'other_flights' in flight_data
+    return False
+
+def is_real_hotel_data(hotel_data):
+    """
+    Returns True if hotel_data came from the API (not mock data) and contains properties.
+    """
+    if hotel_data and 'search_metadata' in hotel_data:
+        if hotel_data['search_metadata'].get('id') != 'mock_hotel_search_id':
+            return 'properties' in hotel_data
+    return False
+
+def race_alternative_routes(api_key, outbound_date, return_date, routes):
+    """
+    Searches the given (departure, arrival) routes concurrently and returns the
+    first real flight result, or None if every route returned mock data.
+    Searches that have not started yet are cancelled once a result is found.
+    """
+    futures = {}
+    for alt_dep, alt_arr in routes:
+        print(f"Trying alternative route: {alt_dep} to {alt_arr}...")
+        future = submit_search(
+            search_google_flights,
+            api_key,
+            outbound_date,
+            return_date,
+            alt_dep,
+            alt_arr
+        )
+        futures[future] = (alt_dep, alt_arr)
+    
+    try:
+        for future in as_completed(futures):
+            alt_dep, alt_arr = futures[future]
+            try:
+                alt_flight_data = future.result()
+            except Exception as e:
+                print(f"Alternative route {alt_dep} to {alt_arr} failed: {str(e)}")
+                continue
+            if is_real_flight_data(alt_flight_data):
+                print(f"Successfully found flight data with alternative route {alt_dep} to {alt_arr}")
+                return alt_flight_data
+        return None
+    finally:
+        # Searches already in flight finish in the background and only warm the cache
+        for future in futures:
+            future.cancel()
+
+async def race_alternative_routes_async(api_key, outbound_date, return_date, routes):
+    """
+    Async counterpart of race_alternative_routes: searches the routes on the
+    running event loop and cancels the rest once one returns real data.
+    """
+    tasks = {
+        asyncio.ensure_future(search_google_flights_async(api_key, outbound_date, return_date, alt_dep, alt_arr)): (alt_dep, alt_arr)
+        for alt_dep, alt_arr in routes
+    }
+    try:
+        for next_done in asyncio.as_completed(list(tasks)):
+            try:
+                alt_flight_data = await next_done
+            except Exception as e:
+                print(f"Alternative route failed: {str(e)}")
+                continue
+            if is_real_flight_data(alt_flight_data):
+                print("Successfully found flight data with an alternative route")
+                return alt_flight_data
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def search_trip_async(api_key, outbound_date, return_date, departure_id, arrival_id, hotel_query,
+                            alternative_routes=()):
+    """
+    Searches flights and hotels concurrently on one event loop. If the flight
+    search only yields mock data, the alternative routes are raced.
+    Returns (flight_data, hotel_data).
+    """
+    hotel_task = asyncio.ensure_future(
+        search_google_hotels_async(api_key, outbound_date, return_date, hotel_query)
+    )
+    try:
+        flight_data = await search_google_flights_async(api_key, outbound_date, return_date, departure_id, arrival_id)
+        # Alternatives run while the hotel search may still be in flight
+        if not is_real_flight_data(flight_data) and alternative_routes:
+            alt_flight_data = await race_alternative_routes_async(api_key, outbound_date, return_date, alternative_routes)
+            if alt_flight_data is not None:
+                flight_data = alt_flight_data
+        hotel_data = await hotel_task
+    finally:
+        hotel_task.cancel()
+    return flight_data, hotel_data
+
+def trip_nights(outbound_date, return_date):
+    """
+    Number of hotel nights between the dates (7 if they cannot be parsed,
+    matching the default trip length the searches fall back to).
+    """
+    try:
+        start = datetime.datetime.strptime(outbound_date, "%Y-%m-%d")
+        end = datetime.datetime.strptime(return_date, "%Y-%m-%d")
+        return max((end - start).days, 1)
+    except (TypeError, ValueError):
+        return 7
+
+async def search_destinations_async(destinations, api_key, concurrency=BATCH_CONCURRENCY):
+    """
+    Searches flights and hotels for every recommended destination, at most
+    `concurrency` destinations at a time, and returns one summary per
+    destination in the same order. Each destination's full results are
+    stored under their own search id.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def search_one(destination):
+        name = destination.get('name', 'Unknown')
+        departure_id = destination.get('departure_airport_code', '')
+        arrival_id = destination.get('arrival_airport_code', '')
+        outbound_date = destination.get('departure_date', '')
+        return_date = destination.get('arrival_date', '')
+        hotel_query = destination.get('Hotel_code') or f"Hotels in {name}"
+        if not departure_id or not arrival_id:
+            return {'name': name, 'status': 'error', 'message': 'Missing airport codes'}
+        departure_id = airport_index.resolve(departure_id) or departure_id
+        arrival_id = airport_index.resolve(arrival_id, hint=name) or arrival_id
+
+        async with semaphore:
+            print(f"Batch search for {name}: {departure_id} to {arrival_id}, {hotel_query}")
+            try:
+                flight_data, hotel_data = await search_trip_async(
+                    api_key, outbound_date, return_date, departure_id, arrival_id, hotel_query,
+                    alternative_routes=airport_index.alternative_routes(departure_id, arrival_id)
+                )
+            except Exception as e:
+                print(f"Batch search for {name} failed: {str(e)}")
+                return {'name': name, 'status': 'error', 'message': str(e)}
+
+        search_id = result_store.new_id()
+        result_store.save('flights', flight_data, search_id)
+        result_store.save('hotels', hotel_data, search_id)
+        summary = summarize_trip(flight_data, hotel_data, trip_nights(outbound_date, return_date))
+        mock_flight_data = not is_real_flight_data(flight_data)
+        mock_hotel_data = not is_real_hotel_data(hotel_data)
+        if mock_flight_data or mock_hotel_data:
+            # Mock prices are placeholders; without a total the destination is left out of the ranking
+            summary['estimated_total'] = None
+        summary.update({
+            'name': name,
+            'status': 'success',
+            'search_id': search_id,
+            'departure_id': departure_id,
+            'arrival_id': arrival_id,
+            'mock_flight_data': mock_flight_data,
+            'mock_hotel_data': mock_hotel_data,
+        })
+        return summary
+
+    try:
+        return await asyncio.gather(*[search_one(destination) for destination in destinations])
+    finally:
+        await async_serpapi_client.aclose()
+
+def search_destinations(destinations, api_key):
+    """
+    Blocking entry point for search_destinations_async, for the Flask routes.
+    """
+    return asyncio.run(search_destinations_async(destinations[:MAX_BATCH_DESTINATIONS], api_key))
+
 def process_user_selection(user_selection, api_key):
     """
-    Process user selection JSON and save flight and hotel data to respective files.
+    Process user selection JSON and save flight and hotel data in the result store.
+    Returns the generated search id (flights and hotels are stored under the same id),
+    or False if processing failed.
     Expected user_selection format:
     {
         "departure_id": "PEK",
@@ -531,17 +1007,8 @@ def process_user_selection(user_selection, api_key):
         hotel_query = user_selection.get('hotel_query')
         if not hotel_query and 'arrival_id' in user_selection:
             # Try to create a hotel query from the arrival airport code
-            known_airport_to_city = {
-                'AUS': 'Austin',
-                'LAX': 'Los Angeles',
-                'JFK': 'New York',
-                'LHR': 'London',
-                'CDG': 'Paris',
-                'NRT': 'Tokyo',
-                'SFO': 'San Francisco'
-            }
             arrival_id = user_selection['arrival_id']
-            city = known_airport_to_city.get(arrival_id, arrival_id)
+            city = airport_index.city_for(airport_index.resolve(arrival_id), arrival_id)
             hotel_query = f"Hotels in {city}"
             print(f"Created hotel query from arrival_id: {hotel_query}")
             
@@ -549,10 +1016,23 @@ def process_user_selection(user_selection, api_key):
         # Start with the provided departure and arrival
         departure_id = user_selection.get('departure_id', 'LAX')
         arrival_id = user_selection.get('arrival_id', 'JFK')
+        # The hotel query names the destination, which can fix a bad arrival code
+        departure_id = airport_index.resolve(departure_id) or departure_id
+        arrival_id = airport_index.resolve(arrival_id, hint=hotel_query) or arrival_id
         
         print(f"Searching for flights from {departure_id} to {arrival_id}")
         print(f"Dates: {outbound_date} to {return_date}")
         
+        # Start the hotel search right away so it runs while flights are searched
+        print(f"Searching for hotels with query: {hotel_query}")
+        hotel_future = submit_search(
+            search_google_hotels,
+            api_key,
+            outbound_date,
+            return_date,
+            hotel_query
+        )
+        
         # First attempt with user-provided airports
         flight_data = search_google_flights(
             api_key,
@@ -563,143 +1043,82 @@ def process_user_selection(user_selection, api_key):
         )
         
         # Check if we got real flight data
-        has_real_flight_data = False
-        if flight_data and 'search_metadata' in flight_data:
-            if flight_data['search_metadata'].get('id') != 'mock_search_id':
-                if 'best_flights' in flight_data or 'other_flights' in flight_data:
-                    print(f"Successfully found flight data for {departure_id} to {arrival_id}")
-                    has_real_flight_data = True
+        has_real_flight_data = is_real_flight_data(flight_data)
+        if has_real_flight_data:
+            print(f"Successfully found flight data for {departure_id} to {arrival_id}")
         
-        # If we didn't get real flight data, try with known working airport combinations
+        # If we didn't get real flight data, try the nearest airports around both ends of the route
         if not has_real_flight_data:
-            print("First attempt returned mock data. Trying alternative airport combinations...")
-            alternative_combinations = [
-                ("LAX", "JFK"),  # Los Angeles to New York
-                ("JFK", "LAX"),  # New York to Los Angeles
-                ("LHR", "CDG"),  # London to Paris
-                ("CDG", "LHR")   # Paris to London
-            ]
+            alternative_combinations = airport_index.alternative_routes(departure_id, arrival_id)
+            print(f"First attempt returned mock data. Trying nearby airports: {alternative_combinations}")
             
-            for alt_dep, alt_arr in alternative_combinations:
-                print(f"Trying alternative route: {alt_dep} to {alt_arr}...")
-                alt_flight_data = search_google_flights(
-                    api_key,
-                    outbound_date,
-                    return_date,
-                    alt_dep,
-                    alt_arr
-                )
-                
-                # Check if we got real flight data
-                if alt_flight_data and 'search_metadata' in alt_flight_data:
-                    if alt_flight_data['search_metadata'].get('id') != 'mock_search_id':
-                        if 'best_flights' in alt_flight_data or 'other_flights' in alt_flight_data:
-                            print(f"Successfully found flight data with alternative route {alt_dep} to {alt_arr}")
-                            flight_data = alt_flight_data
-                            has_real_flight_data = True
-                            break
-            
-            if not has_real_flight_data:
+            alt_flight_data = None
+            if alternative_combinations:
+                alt_flight_data = race_alternative_routes(api_key, outbound_date, return_date, alternative_combinations)
+            if alt_flight_data is not None:
+                flight_data = alt_flight_data
+                has_real_flight_data = True
+            else:
                 print("All flight API attempts returned mock data.")
         
-        # Search for hotels
-        print(f"Searching for hotels with query: {hotel_query}")
-        hotel_data = search_google_hotels(
-            api_key,
-            outbound_date,
-            return_date,
-            hotel_query
-        )
+        hotel_data = hotel_future.result()
         
         if not hotel_data:
             print("Warning: No hotel data returned from API")
         else:
             print(f"Hotel data received successfully with {len(hotel_data.get('properties', []))} properties")
         
-        # Get the current working directory
-        cwd = os.getcwd()
-        print(f"Current working directory: {cwd}")
+        # Save flight and hotel data under one search id so concurrent users never collide
+        search_id = result_store.new_id()
+        result_store.save('flights', flight_data, search_id)
+        result_store.save('hotels', hotel_data, search_id)
+        print(f"Flight and hotel data saved under search id {search_id}")
         
-        # Save flight data
-        flight_path = os.path.join(cwd, 'test_flight.json')
-        with open(flight_path, 'w', encoding='utf-8') as f:
-            json.dump(flight_data, f, indent=2, ensure_ascii=False)
-        print(f"Flight data saved to {flight_path}")
+        if LEGACY_FILE_EXPORT:
+            result_store.export_legacy('flights', search_id, 'test_flight.json')
+            result_store.export_legacy('hotels', search_id, 'test.json')
             
-        # Save hotel data
-        hotel_path = os.path.join(cwd, 'test.json')
-        with open(hotel_path, 'w', encoding='utf-8') as f:
-            json.dump(hotel_data, f, indent=2, ensure_ascii=False)
-        print(f"Hotel data saved to {hotel_path}")
-        
-        # Try to save to src/pages directory if it exists
-        src_pages_dir = os.path.join(cwd, 'src', 'pages')
-        if os.path.exists(src_pages_dir):
-            try:
-                print(f"Attempting to save to {src_pages_dir}")
-                with open(os.path.join(src_pages_dir, 'test_flight.json'), 'w', encoding='utf-8') as f:
-                    json.dump(flight_data, f, indent=2, ensure_ascii=False)
-                with open(os.path.join(src_pages_dir, 'test.json'), 'w', encoding='utf-8') as f:
-                    json.dump(hotel_data, f, indent=2, ensure_ascii=False)
-                print(f"Successfully saved data to {src_pages_dir}")
-            except Exception as e:
-                print(f"Error saving to src/pages: {str(e)}")
-            
-        return True
+        return search_id
     except Exception as e:
         print(f"Error processing user selection: {str(e)}")
         print(traceback.format_exc())
         return False
 
-def generate_itinerary(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
+def build_itinerary_prompt(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
     """
-    Generates a detailed day-by-day itinerary using Gemini, incorporating
-    the selected flight, hotel, and user preferences. Also includes a total cost.
-    Saves the itinerary to JSON file and returns the data.
+    Builds the Gemini prompt for a day-by-day itinerary from the selected
+    flight, hotel, and user preferences, including the estimated total cost.
+    The selections are models (from the display helpers) or the raw dicts
+    an API request carries, parsed here.
     """
+    flight = selected_flight if isinstance(selected_flight, FlightOption) else FlightOption.from_dict(selected_flight)
+    hotel = selected_hotel if isinstance(selected_hotel, HotelProperty) else HotelProperty.from_dict(selected_hotel)
+    
     # Summarize the selected flight
-    flight_summary = ""
-    segments = selected_flight.get("flights", [])
-    for seg in segments:
-        dep_airport = seg.get("departure_airport", {}).get("name", "N/A")
-        dep_time    = seg.get("departure_airport", {}).get("time", "N/A")
-        arr_airport = seg.get("arrival_airport", {}).get("name", "N/A")
-        arr_time    = seg.get("arrival_airport", {}).get("time", "N/A")
-        airline     = seg.get("airline", "N/A")
-        flight_num  = seg.get("flight_number", "N/A")
-        flight_summary += f"{airline} {flight_num}: {dep_airport} at {dep_time} -> {arr_airport} at {arr_time}; "
+    flight_summary = format_segments(flight)
     
     # Summarize the selected hotel
-    hotel_name = selected_hotel.get("name", "N/A")
-    hotel_rate = selected_hotel.get("rate_per_night", {}).get("extracted_lowest", "N/A")
-    hotel_summary = f"Staying at {hotel_name} (Rate per night: {hotel_rate} USD)"
+    hotel_name = hotel.name or "N/A"
+    hotel_rate = hotel.rate_per_night.extracted_lowest if hotel.rate_per_night else None
+    hotel_summary = f"Staying at {hotel_name} (Rate per night: {hotel_rate or 'N/A'} USD)"
     
     # Extract destination city from hotel name or query
     destination = ""
-    if 'description' in selected_hotel and selected_hotel['description']:
-        description = selected_hotel['description'].lower()
+    if hotel.description:
+        description = hotel.description.lower()
         if 'in ' in description:
             destination = description.split('in ')[1].split()[0]
-    if not destination and hotel_name:
-        for city in ["Austin", "New York", "Paris", "Tokyo", "London", "Los Angeles"]:
-            if city.lower() in hotel_name.lower():
-                destination = city
-                break
+    if not destination and hotel.name:
+        destination = airport_index.find_city(hotel.name) or ""
     
     # Calculate the number of nights (for hotels, typically check-out day is not charged)
     start = datetime.datetime.strptime(outbound_date, "%Y-%m-%d")
     end = datetime.datetime.strptime(return_date, "%Y-%m-%d")
     num_nights = (end - start).days
     
-    # Compute total cost (assume flight price and hotel rate are numeric)
-    try:
-        flight_price = float(selected_flight.get("price", 0))
-    except:
-        flight_price = 0
-    try:
-        hotel_rate_numeric = float(hotel_rate)
-    except:
-        hotel_rate_numeric = 0
+    # Compute total cost (prices that are missing or not numeric count as 0)
+    flight_price = flight.price_value or 0
+    hotel_rate_numeric = hotel.nightly_rate or 0
     total_hotel_cost = hotel_rate_numeric * num_nights
     total_cost = flight_price + total_hotel_cost
     
@@ -807,52 +1226,73 @@ Generate the itinerary in this JSON format:
 
 Do not include any extra explanation. Output only valid JSON.
 """
+    return prompt
+
+def parse_itinerary_response(itinerary_response):
+    """
+    Strips markdown code fences from the AI response and parses the itinerary JSON.
+    Raises json.JSONDecodeError if the response is not valid JSON.
+    """
+    # Clean up the response - remove markdown code blocks if present
+    cleaned_response = itinerary_response
+    
+    # Remove markdown code block syntax if present
+    if "```json" in cleaned_response or "```" in cleaned_response:
+        import re
+        # Extract content between markdown code blocks
+        markdown_match = re.search(r'```(?:json)?\s*([\s\S]*?)```', cleaned_response)
+        if markdown_match:
+            cleaned_response = markdown_match.group(1).strip()
+    
+    # Parse the AI response string into a JSON object
+    return json_codec.loads(cleaned_response)
+
+def save_itinerary(itinerary_data):
+    """
+    Saves the itinerary in the result store, prints a summary and returns the itinerary id.
+    """
+    itinerary_id = result_store.save('itineraries', itinerary_data)
+    print(f"Itinerary saved under id {itinerary_id}")
+    
+    if LEGACY_FILE_EXPORT:
+        result_store.export_legacy('itineraries', itinerary_id, 'itinerary.json')
+    
+    # Print a brief summary of the itinerary
+    days = itinerary_data.get("itinerary", {})
+    print("\n=== Itinerary Summary ===")
+    print(f"Destination: {itinerary_data.get('destination_info', {}).get('name', 'Unknown')}")
+    print(f"Duration: {len(days)} days")
+    print(f"Total Cost: {itinerary_data.get('total_cost', 'Unknown')}")
+    print("========================\n")
+    return itinerary_id
+
+def generate_itinerary_data(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
+    """
+    Generates a detailed day-by-day itinerary using Gemini, incorporating
+    the selected flight, hotel, and user preferences. Also includes a total cost.
+    Returns the itinerary data without saving it, or None on failure.
+    """
+    prompt = build_itinerary_prompt(selected_flight, selected_hotel, outbound_date, return_date, user_preferences)
+    
     # Call Gemini API to generate the itinerary
     itinerary_response = call_gemini(prompt)
-    
+    return itinerary_from_response(itinerary_response)
+
+async def generate_itinerary_data_async(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
+    """
+    Async counterpart of generate_itinerary_data.
+    """
+    prompt = build_itinerary_prompt(selected_flight, selected_hotel, outbound_date, return_date, user_preferences)
+    itinerary_response = await call_gemini_async(prompt)
+    return itinerary_from_response(itinerary_response)
+
+def itinerary_from_response(itinerary_response):
+    """
+    Parses the itinerary out of a Gemini response, returning None (and
+    logging the raw response) if it is not valid itinerary JSON.
+    """
     try:
-        # Clean up the response - remove markdown code blocks if present
-        cleaned_response = itinerary_response
-        
-        # Remove markdown code block syntax if present
-        if "```json" in cleaned_response or "```" in cleaned_response:
-            import re
-            # Extract content between markdown code blocks
-            markdown_match = re.search(r'```(?:json)?\s*([\s\S]*?)```', cleaned_response)
-            if markdown_match:
-                cleaned_response = markdown_match.group(1).strip()
-        
-        # Parse the AI response string into a JSON object
-        itinerary_data = json.loads(cleaned_response)
-        
-        # Save to itinerary.json in the root directory
-        cwd = os.getcwd()
-        itinerary_path = os.path.join(cwd, 'itinerary.json')
-        
-        with open(itinerary_path, 'w', encoding='utf-8') as f:
-            json.dump(itinerary_data, f, indent=2, ensure_ascii=False)
-        print(f"Itinerary saved to {itinerary_path}")
-        
-        # Also save to src/pages directory if it exists
-        src_pages_dir = os.path.join(cwd, 'src', 'pages')
-        if os.path.exists(src_pages_dir):
-            try:
-                src_itinerary_path = os.path.join(src_pages_dir, 'itinerary.json')
-                with open(src_itinerary_path, 'w', encoding='utf-8') as f:
-                    json.dump(itinerary_data, f, indent=2, ensure_ascii=False)
-                print(f"Itinerary also saved to {src_itinerary_path}")
-            except Exception as e:
-                print(f"Error saving itinerary to src/pages: {str(e)}")
-        
-        # Print a brief summary of the itinerary
-        days = itinerary_data.get("itinerary", {})
-        print("\n=== Itinerary Summary ===")
-        print(f"Destination: {itinerary_data.get('destination_info', {}).get('name', 'Unknown')}")
-        print(f"Duration: {len(days)} days")
-        print(f"Total Cost: {itinerary_data.get('total_cost', 'Unknown')}")
-        print("========================\n")
-        
-        return itinerary_data
+        return parse_itinerary_response(itinerary_response)
         
     except json.JSONDecodeError as e:
         print("Error parsing AI response:", str(e))
@@ -864,6 +1304,91 @@ Do not include any extra explanation. Output only valid JSON.
         traceback.print_exc()
         return None
 
+def generate_itinerary(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
+    """
+    Generates a detailed day-by-day itinerary using Gemini, incorporating
+    the selected flight, hotel, and user preferences. Also includes a total cost.
+    Saves the itinerary in the result store and returns the data.
+    """
+    itinerary_data = generate_itinerary_data(selected_flight, selected_hotel, outbound_date, return_date, user_preferences)
+    if itinerary_data:
+        save_itinerary(itinerary_data)
+    return itinerary_data
+
+def run_itinerary_job(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
+    """
+    Job body for queued itinerary generation: generates and saves the
+    itinerary and returns its id. Raises if generation fails, so the job
+    is marked failed.
+    """
+    itinerary_data = generate_itinerary_data(selected_flight, selected_hotel, outbound_date, return_date, user_preferences)
+    if not itinerary_data:
+        raise RuntimeError("Failed to generate itinerary")
+    if job_queue.cancel_requested():
+        # Cancelled while Gemini was working: the job is discarded, so nothing is saved
+        print("Itinerary job cancelled; not saving the itinerary")
+        return None
+    itinerary_id = save_itinerary(itinerary_data)
+    return {'itinerary_id': itinerary_id, 'itinerary_url': f"/api/itineraries/{itinerary_id}"}
+
+async def generate_itinerary_async(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
+    """
+    Async counterpart of generate_itinerary.
+    """
+    itinerary_data = await generate_itinerary_data_async(
+        selected_flight, selected_hotel, outbound_date, return_date, user_preferences
+    )
+    if itinerary_data:
+        save_itinerary(itinerary_data)
+    return itinerary_data
+
+def generate_itinerary_stream(selected_flight, selected_hotel, outbound_date, return_date, user_preferences):
+    """
+    Streaming variant of generate_itinerary. Yields (event, data) tuples as
+    soon as each part of the itinerary has been generated:
+    ("destination_info", {...}), one ("day", {"day": "day_N", ...}) per day,
+    then the remaining sections (e.g. "practical_info", "total_cost").
+    Finishes with ("complete", {"itinerary_id": ..., "itinerary_data": ...}) after
+    saving, or ("error", {...}).
+    """
+    prompt = build_itinerary_prompt(selected_flight, selected_hotel, outbound_date, return_date, user_preferences)
+    scanner = IncrementalJSONScanner(expand=("itinerary",))
+    streamed = {}
+    
+    try:
+        for chunk in gemini_manager.generate_stream(prompt):
+            for path, value in scanner.feed(chunk):
+                if path[0] == "itinerary":
+                    streamed.setdefault("itinerary", {})[path[1]] = value
+                    yield "day", dict(value, day=path[1])
+                else:
+                    streamed[path[0]] = value
+                    yield path[0], value
+    except Exception as e:
+        import traceback
+        print(f"Error streaming itinerary: {str(e)}")
+        traceback.print_exc()
+        yield "error", {"message": str(e)}
+        return
+    
+    try:
+        itinerary_data = parse_itinerary_response(scanner.text().strip())
+    except json.JSONDecodeError as e:
+        # Fall back to the sections that were complete before the stream went bad
+        print("Error parsing streamed AI response:", str(e))
+        itinerary_data = streamed
+    
+    if not itinerary_data.get("itinerary"):
+        yield "error", {"message": "Failed to generate itinerary"}
+        return
+    
+    itinerary_id = None
+    try:
+        itinerary_id = save_itinerary(itinerary_data)
+    except Exception as e:
+        print(f"Error saving streamed itinerary: {str(e)}")
+    yield "complete", {"itinerary_id": itinerary_id, "itinerary_data": itinerary_data}
+
 def main():
     api_key = "ENTER_YOU_API_KEY"
     
@@ -0,0 +1,305 @@
+from dataclasses import dataclass
+
+
+# SerpApi keys each model reads into typed fields; everything else is kept in `extra`
+AIRPORT_KEYS = ("id", "name", "time")
+LAYOVER_KEYS = ("id", "name", "duration", "overnight")
+SEGMENT_KEYS = ("departure_airport", "arrival_airport", "airline", "flight_number", "duration",
+                "airplane", "travel_class", "overnight")
+FLIGHT_KEYS = ("flights", "layovers", "price", "total_duration", "type", "airline_logo",
+               "departure_token", "booking_token")
+RATE_KEYS = ("lowest", "extracted_lowest", "before_taxes_fees", "extracted_before_taxes_fees")
+HOTEL_KEYS = ("name", "type", "description", "link", "address", "property_token", "gps_coordinates",
+              "check_in_time", "check_out_time", "rate_per_night", "total_rate", "hotel_class",
+              "extracted_hotel_class", "overall_rating", "reviews", "location_rating", "amenities")
+
+
+def to_number(value):
+    """
+    float(value), or None for missing and non-numeric values such as "N/A".
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _extra(data, known):
+    return {key: value for key, value in data.items() if key not in known}
+
+
+def _put(result, key, value):
+    # Models built by hand have no original keys; their None fields are left out
+    if value is not None:
+        result[key] = value
+
+
+def _assemble(keys, values, extra):
+    """
+    Rebuilds a SerpApi dict from typed values and extra keys. keys is the
+    original item's key order, so explicit nulls come back as nulls; for
+    models built by hand (keys None) None values are left out.
+    """
+    if keys is None:
+        result = dict(extra)
+        for key, value in values.items():
+            _put(result, key, value)
+        return result
+    result = {key: values[key] if key in values else extra.get(key) for key in keys}
+    # Fields set after parsing
+    for key, value in values.items():
+        if key not in result and value is not None:
+            result[key] = value
+    for key, value in extra.items():
+        result.setdefault(key, value)
+    return result
+
+
+@dataclass
+class Layover:
+    """
+    A connection between two segments. duration is in minutes.
+    """
+    __slots__ = ("id", "name", "duration", "overnight", "extra", "keys")
+    id: str
+    name: str
+    duration: int
+    overnight: bool
+    extra: dict
+    keys: tuple  # original key order, so to_dict() gives back explicit nulls; None if built by hand
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("id"), data.get("name"), data.get("duration"), data.get("overnight"),
+                   _extra(data, LAYOVER_KEYS), tuple(data))
+
+    def to_dict(self):
+        return _assemble(self.keys, {key: getattr(self, key) for key in LAYOVER_KEYS}, self.extra)
+
+
+@dataclass
+class Segment:
+    """
+    One flight of an option. The departure/arrival airport objects are
+    flattened into *_id, *_name and *_time fields; airport_keys keeps each
+    object's original keys (None when it was null or not an object).
+    """
+    __slots__ = ("airline", "flight_number", "departure_id", "departure_name", "departure_time",
+                 "arrival_id", "arrival_name", "arrival_time", "duration", "airplane",
+                 "travel_class", "overnight", "extra", "keys", "airport_keys")
+    airline: str
+    flight_number: str
+    departure_id: str
+    departure_name: str
+    departure_time: str
+    arrival_id: str
+    arrival_name: str
+    arrival_time: str
+    duration: int
+    airplane: str
+    travel_class: str
+    overnight: bool
+    extra: dict
+    keys: tuple
+    airport_keys: tuple
+
+    @classmethod
+    def from_dict(cls, data):
+        extra = _extra(data, SEGMENT_KEYS)
+        endpoints = []
+        airport_keys = []
+        for key in ("departure_airport", "arrival_airport"):
+            endpoint = data.get(key)
+            if isinstance(endpoint, dict):
+                # Unknown keys of the airport objects are kept under their original key
+                rest = _extra(endpoint, AIRPORT_KEYS)
+                if rest:
+                    extra[key] = rest
+                endpoints.append(endpoint)
+                airport_keys.append(tuple(endpoint))
+            else:
+                if endpoint is not None:
+                    extra[key] = endpoint
+                endpoints.append({})
+                airport_keys.append(None)
+        departure, arrival = endpoints
+        return cls(
+            data.get("airline"), data.get("flight_number"),
+            departure.get("id"), departure.get("name"), departure.get("time"),
+            arrival.get("id"), arrival.get("name"), arrival.get("time"),
+            data.get("duration"), data.get("airplane"), data.get("travel_class"), data.get("overnight"),
+            extra, tuple(data), tuple(airport_keys)
+        )
+
+    def to_dict(self):
+        values = {key: getattr(self, key)
+                  for key in ("airline", "flight_number", "duration", "airplane", "travel_class", "overnight")}
+        departure_keys, arrival_keys = self.airport_keys or (None, None)
+        for key, airport_keys, fields in (
+            ("departure_airport", departure_keys, (self.departure_id, self.departure_name, self.departure_time)),
+            ("arrival_airport", arrival_keys, (self.arrival_id, self.arrival_name, self.arrival_time)),
+        ):
+            rest = self.extra.get(key)
+            if airport_keys is None and rest is not None and not isinstance(rest, dict):
+                continue  # not an object in the original item; returned as-is from extra
+            endpoint = _assemble(airport_keys, dict(zip(("id", "name", "time"), fields)), rest or {})
+            # An empty object that was in the original comes back; a null stays null
+            values[key] = endpoint if endpoint or airport_keys is not None else None
+        return _assemble(self.keys, values, self.extra)
+
+
+@dataclass
+class FlightOption:
+    """
+    One bookable itinerary from google_flights: its segments, layovers,
+    price (USD) and total_duration (minutes). segments/layovers are None
+    when SerpApi left them out.
+    """
+    __slots__ = ("segments", "layovers", "price", "total_duration", "type", "airline_logo",
+                 "departure_token", "booking_token", "extra", "keys")
+    segments: list
+    layovers: list
+    price: float
+    total_duration: int
+    type: str
+    airline_logo: str
+    departure_token: str
+    booking_token: str
+    extra: dict
+    keys: tuple
+
+    @classmethod
+    def from_dict(cls, data):
+        segments = data.get("flights")
+        layovers = data.get("layovers")
+        return cls(
+            [Segment.from_dict(seg) for seg in segments] if segments is not None else None,
+            [Layover.from_dict(layover) for layover in layovers] if layovers is not None else None,
+            data.get("price"), data.get("total_duration"), data.get("type"), data.get("airline_logo"),
+            data.get("departure_token"), data.get("booking_token"),
+            _extra(data, FLIGHT_KEYS), tuple(data)
+        )
+
+    @property
+    def stops(self):
+        return max(len(self.segments or ()) - 1, 0)
+
+    @property
+    def price_value(self):
+        return to_number(self.price)
+
+    def to_dict(self):
+        values = {key: getattr(self, key)
+                  for key in ("price", "total_duration", "type", "airline_logo", "departure_token", "booking_token")}
+        values["flights"] = [seg.to_dict() for seg in self.segments] if self.segments is not None else None
+        values["layovers"] = [layover.to_dict() for layover in self.layovers] if self.layovers is not None else None
+        return _assemble(self.keys, values, self.extra)
+
+
+@dataclass
+class Rate:
+    """
+    A hotel price: display strings ("$106") and their extracted numbers.
+    """
+    __slots__ = ("lowest", "extracted_lowest", "before_taxes_fees", "extracted_before_taxes_fees", "extra", "keys")
+    lowest: str
+    extracted_lowest: float
+    before_taxes_fees: str
+    extracted_before_taxes_fees: float
+    extra: dict
+    keys: tuple
+
+    @classmethod
+    def from_dict(cls, data):
+        # Missing or malformed rates (e.g. a bare "$106" string) have no typed form
+        if not isinstance(data, dict):
+            return None
+        return cls(data.get("lowest"), data.get("extracted_lowest"), data.get("before_taxes_fees"),
+                   data.get("extracted_before_taxes_fees"), _extra(data, RATE_KEYS), tuple(data))
+
+    @property
+    def amount(self):
+        return to_number(self.extracted_lowest)
+
+    def to_dict(self):
+        return _assemble(self.keys, {key: getattr(self, key) for key in RATE_KEYS}, self.extra)
+
+
+@dataclass
+class HotelProperty:
+    """
+    One google_hotels property. Images, nearby places, reviews breakdown
+    and other bulky or rarely used keys stay in `extra`.
+    """
+    __slots__ = ("name", "type", "description", "link", "address", "property_token", "gps_coordinates",
+                 "check_in_time", "check_out_time", "rate_per_night", "total_rate", "hotel_class",
+                 "extracted_hotel_class", "overall_rating", "reviews", "location_rating", "amenities",
+                 "extra", "keys")
+    name: str
+    type: str
+    description: str
+    link: str
+    address: str
+    property_token: str
+    gps_coordinates: dict
+    check_in_time: str
+    check_out_time: str
+    rate_per_night: Rate
+    total_rate: Rate
+    hotel_class: str
+    extracted_hotel_class: int
+    overall_rating: float
+    reviews: int
+    location_rating: float
+    amenities: list
+    extra: dict
+    keys: tuple
+
+    @classmethod
+    def from_dict(cls, data):
+        extra = _extra(data, HOTEL_KEYS)
+        for key in ("rate_per_night", "total_rate"):
+            # Rates that are not objects are kept as given so to_dict still round-trips
+            if data.get(key) is not None and not isinstance(data[key], dict):
+                extra[key] = data[key]
+        return cls(
+            data.get("name"), data.get("type"), data.get("description"), data.get("link"),
+            data.get("address"), data.get("property_token"), data.get("gps_coordinates"),
+            data.get("check_in_time"), data.get("check_out_time"),
+            Rate.from_dict(data.get("rate_per_night")), Rate.from_dict(data.get("total_rate")),
+            data.get("hotel_class"), data.get("extracted_hotel_class"), data.get("overall_rating"),
+            data.get("reviews"), data.get("location_rating"), data.get("amenities"),
+            extra, tuple(data)
+        )
+
+    @property
+    def nightly_rate(self):
+        return self.rate_per_night.amount if self.rate_per_night else None
+
+    @property
+    def rating_value(self):
+        return to_number(self.overall_rating)
+
+    def to_dict(self):
+        values = {}
+        for key in HOTEL_KEYS:
+            value = getattr(self, key)
+            if value is None and key in self.extra:
+                continue
+            values[key] = value.to_dict() if isinstance(value, Rate) else value
+        return _assemble(self.keys, values, self.extra)
+
+
+def parse_flight_options(flight_data):
+    """
+    All flight options of a google_flights result in display order: best flights first, then the rest.
+    """
+    flight_data = flight_data or {}
+    return [
+        FlightOption.from_dict(option)
+        for option in (flight_data.get("best_flights") or []) + (flight_data.get("other_flights") or [])
+    ]
+
+
+def parse_hotel_properties(hotel_data):
+    return [HotelProperty.from_dict(hotel) for hotel in (hotel_data or {}).get("properties") or []]
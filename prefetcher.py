@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from serpapi_quota import TokenBucket, key_pool, current_search_session
+
+PREFETCH_ENABLED = os.environ.get("WANDER_PREFETCH_ENABLED", "1") == "1"
+# How often the refresher wakes up, and how many of the most demanded searches it keeps warm
+PREFETCH_INTERVAL = float(os.environ.get("WANDER_PREFETCH_INTERVAL", "60"))
+PREFETCH_TOP_K = int(os.environ.get("WANDER_PREFETCH_TOP_K", "20"))
+# Refresh entries this many seconds before they expire
+PREFETCH_REFRESH_AHEAD = float(os.environ.get("WANDER_PREFETCH_REFRESH_AHEAD", "300"))
+# Upstream requests background refreshes may spend per hour
+PREFETCH_BUDGET_PER_HOUR = float(os.environ.get("WANDER_PREFETCH_BUDGET_PER_HOUR", "60"))
+# Refresh only while the SerpApi key pool has at least this many tokens spare for live traffic
+PREFETCH_MIN_HEADROOM = float(os.environ.get("WANDER_PREFETCH_MIN_HEADROOM", "2"))
+# Demand halves every this many seconds, so yesterday's trend fades
+DEMAND_HALF_LIFE = float(os.environ.get("WANDER_DEMAND_HALF_LIFE", str(60 * 60)))
+MAX_TRACKED_SEARCHES = int(os.environ.get("WANDER_PREFETCH_MAX_TRACKED", "5000"))
+
+
+class SearchPrefetcher:
+    """
+    Keeps popular searches warm. Every search records demand for its
+    (kind, arguments, cache key); a background thread refreshes the top-K
+    most demanded searches shortly before their cache entries expire, and
+    stale entries served to users are revalidated in the background.
+    All refreshes share one token bucket budget and pause whenever the
+    SerpApi key pool is short of tokens, so live traffic always comes first.
+    """
+
+    def __init__(self, enabled=PREFETCH_ENABLED, interval=PREFETCH_INTERVAL, top_k=PREFETCH_TOP_K,
+                 refresh_ahead=PREFETCH_REFRESH_AHEAD, budget_per_hour=PREFETCH_BUDGET_PER_HOUR,
+                 min_headroom=PREFETCH_MIN_HEADROOM, half_life=DEMAND_HALF_LIFE,
+                 max_tracked=MAX_TRACKED_SEARCHES):
+        self.enabled = enabled
+        self.interval = interval
+        self.top_k = top_k
+        self.refresh_ahead = refresh_ahead
+        self.min_headroom = min_headroom
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+
+        self._lock = threading.Lock()
+        self._refreshers = {}  # kind -> function(*args) that searches bypassing the cache
+        self._demand = OrderedDict()  # cache key -> entry, least recently requested first
+        self._budget = TokenBucket(budget_per_hour / 3600.0, max(budget_per_hour / 12.0, 1))
+        self._in_progress = set()
+        self._executor = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {"refreshed": 0, "revalidated": 0, "skipped_budget": 0,
+                       "skipped_headroom": 0, "errors": 0}
+
+    def register(self, kind, refresh_fn):
+        """
+        Registers the function that re-runs a search of this kind without
+        reading the cache (and stores the fresh result).
+        """
+        self._refreshers[kind] = refresh_fn
+
+    def _decayed(self, entry, now):
+        return entry["score"] * 0.5 ** ((now - entry["last_seen"]) / self.half_life)
+
+    def record(self, kind, cache_key, args):
+        """
+        Records one request for a search. args are what the registered
+        refresher needs to repeat it.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._demand.pop(cache_key, None)
+            if entry is None:
+                entry = {"kind": kind, "score": 0.0, "last_seen": now, "requests": 0}
+            entry["score"] = self._decayed(entry, now) + 1
+            entry["last_seen"] = now
+            entry["requests"] += 1
+            entry["args"] = args
+            self._demand[cache_key] = entry
+            while len(self._demand) > self.max_tracked:
+                self._demand.popitem(last=False)
+            self._ensure_started()
+
+    def _ensure_started(self):
+        # Started on first use so each gunicorn worker process gets its own thread after fork
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+            self._thread = threading.Thread(target=self._run, name="search-prefetcher", daemon=True)
+            self._thread.start()
+
+    def top(self, now=None):
+        """
+        Returns [(cache_key, kind, score)] for the top_k most demanded searches.
+        """
+        now = now or time.time()
+        with self._lock:
+            ranked = sorted(
+                ((key, entry["kind"], self._decayed(entry, now)) for key, entry in self._demand.items()),
+                key=lambda item: item[2],
+                reverse=True
+            )
+        return ranked[:self.top_k]
+
+    def _take_budget(self):
+        with self._lock:
+            if self._budget.wait_time(time.monotonic()) > 0:
+                self._stats["skipped_budget"] += 1
+                return False
+            headroom = key_pool.headroom()
+            if headroom is not None and headroom < self.min_headroom:
+                self._stats["skipped_headroom"] += 1
+                return False
+            self._budget.take()
+            return True
+
+    def _refresh(self, cache_key, counter):
+        with self._lock:
+            entry = self._demand.get(cache_key)
+            refresh_fn = self._refreshers.get(entry["kind"]) if entry else None
+            if refresh_fn is None or cache_key in self._in_progress:
+                return False
+            self._in_progress.add(cache_key)
+            args = entry["args"]
+        token = current_search_session.set("prefetch")
+        try:
+            refresh_fn(*args)
+            with self._lock:
+                self._stats[counter] += 1
+            return True
+        except Exception as e:
+            print(f"Prefetch of {entry['kind']} search failed: {str(e)}")
+            with self._lock:
+                self._stats["errors"] += 1
+            return False
+        finally:
+            current_search_session.reset(token)
+            with self._lock:
+                self._in_progress.discard(cache_key)
+
+    def revalidate(self, cache_key):
+        """
+        Refreshes a search whose stale result was just served, in the
+        background and within the refresh budget.
+        """
+        if not self.enabled or self._executor is None:
+            return
+        with self._lock:
+            if cache_key in self._in_progress:
+                return
+        if self._take_budget():
+            self._executor.submit(self._refresh, cache_key, "revalidated")
+
+    def refresh_due(self, cache):
+        """
+        One refresher pass: refreshes top-K searches whose cache entries
+        expire within refresh_ahead seconds. Searches without a cache entry
+        (never cached, or answered with mock or error data, which is not
+        cached) are skipped rather than retried every pass. Returns how many
+        were refreshed.
+        """
+        now = time.time()
+        refreshed = 0
+        for cache_key, kind, score in self.top(now):
+            expires_at = cache.expires_at(cache_key)
+            if expires_at is None or expires_at - now > self.refresh_ahead:
+                continue
+            if not self._take_budget():
+                break
+            if self._refresh(cache_key, "refreshed"):
+                refreshed += 1
+        return refreshed
+
+    def _run(self):
+        from search_cache import search_cache
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh_due(search_cache)
+            except Exception as e:
+                print(f"Prefetcher pass failed: {str(e)}")
+
+    def stop(self):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["tracked_searches"] = len(self._demand)
+            stats["budget_tokens"] = round(self._budget.tokens, 2)
+        stats["enabled"] = self.enabled
+        stats["top"] = [
+            {"kind": kind, "score": round(score, 2)} for _, kind, score in self.top()[:5]
+        ]
+        return stats
+
+
+# Shared prefetcher; main.py registers the flight and hotel refreshers
+search_prefetcher = SearchPrefetcher()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+
+from gemini_client import gemini_manager
+from result_store import result_store
+
+
+class Readiness:
+    """
+    Tracks whether this worker should receive traffic. It becomes ready
+    once the startup checks pass and stops being ready as soon as a
+    graceful shutdown begins, so load balancers drain it first.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._draining = False
+        self._last_checks = {}
+
+    def begin_drain(self):
+        with self._lock:
+            self._draining = True
+
+    @property
+    def draining(self):
+        with self._lock:
+            return self._draining
+
+    def run_checks(self, session_backend=None):
+        """
+        Runs the startup checks and returns (ready, checks). Each check is
+        a dict with "ok" and, on failure, an "error" message.
+        """
+        checks = {
+            "gemini_api_key": self._check_gemini_key(),
+            "result_store": self._check_result_store(),
+        }
+        if session_backend is not None:
+            checks["session_backend"] = self._check_session_backend(session_backend)
+        with self._lock:
+            self._last_checks = checks
+            ready = not self._draining and all(check["ok"] for check in checks.values())
+        return ready, checks
+
+    @staticmethod
+    def _check_gemini_key():
+        if not gemini_manager.api_key or gemini_manager.api_key == "ENTER_YOU_API_KEY":
+            return {"ok": False, "error": "GEMINI_API_KEY is not set"}
+        return {"ok": True}
+
+    @staticmethod
+    def _check_result_store():
+        try:
+            os.makedirs(result_store.root_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=result_store.root_dir):
+                pass
+        except OSError as e:
+            return {"ok": False, "error": f"Results directory not writable: {str(e)}"}
+        return {"ok": True}
+
+    @staticmethod
+    def _check_session_backend(session_backend):
+        try:
+            # A single-key read; len() would walk every session on shared backends
+            session_backend.get("__readiness_probe__")
+        except Exception as e:
+            return {"ok": False, "error": f"Session backend unreachable: {str(e)}"}
+        return {"ok": True}
+
+
+# Shared readiness state for this worker process
+readiness = Readiness()
@@ -0,0 +1,202 @@
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import json_codec
+
+DEFAULT_RESULTS_DIR = os.environ.get(
+    "WANDER_RESULTS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+)
+# Results older than this are removed, and each kind keeps at most this many
+DEFAULT_MAX_AGE = float(os.environ.get("WANDER_RESULT_MAX_AGE", str(24 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("WANDER_RESULT_MAX_ENTRIES", "1000"))
+# Parsed results (model lists) kept in memory, so paging through a result parses it once
+DEFAULT_PARSED_ENTRIES = int(os.environ.get("WANDER_RESULT_PARSED_ENTRIES", "64"))
+
+# Also write the old fixed-name files (test_flight.json, test.json, itinerary.json)
+# in the working directory and src/pages, for frontends that still read them
+LEGACY_FILE_EXPORT = os.environ.get("WANDER_LEGACY_RESULT_FILES", "0") == "1"
+
+RESULT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+KIND_PATTERN = re.compile(r"^[a-z_]+$")
+
+
+class ResultStore:
+    """
+    Keyed, on-disk store for search and itinerary results. Each result is
+    written once, atomically, as compact JSON under <root>/<kind>/<id>.json,
+    so concurrent requests never overwrite each other. A retention policy
+    caps both the age and the number of results kept per kind.
+    """
+
+    def __init__(self, root_dir=DEFAULT_RESULTS_DIR, max_age=DEFAULT_MAX_AGE,
+                 max_entries=DEFAULT_MAX_ENTRIES, cleanup_every=50, parsed_entries=DEFAULT_PARSED_ENTRIES):
+        self.root_dir = root_dir
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.cleanup_every = cleanup_every
+        self.parsed_entries = parsed_entries
+        self._lock = threading.Lock()
+        self._saves = {}  # kind -> saves since startup, so every kind gets its own cleanup
+        self._parsed = OrderedDict()  # (kind, id, parse) -> (file mtime, parsed result)
+        self._stats = {"saved": 0, "loaded": 0, "missing": 0, "expired": 0, "evicted": 0, "parsed_hits": 0}
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def is_valid_id(result_id):
+        return bool(result_id) and bool(RESULT_ID_PATTERN.match(result_id))
+
+    def path_for(self, kind, result_id):
+        """
+        Returns the file path for a result. Rejects malformed kinds and ids so
+        user-supplied ids can never escape the store directory.
+        """
+        if not KIND_PATTERN.match(kind) or not self.is_valid_id(result_id):
+            raise ValueError(f"Invalid result reference: {kind}/{result_id}")
+        return os.path.join(self.root_dir, kind, f"{result_id}.json")
+
+    def save(self, kind, data, result_id=None):
+        """
+        Stores data under a new (or the given) id and returns the id.
+        """
+        result_id = result_id or self.new_id()
+        path = self.path_for(kind, result_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(json_codec.dumps_bytes(data))
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._stats["saved"] += 1
+            saves = self._saves.get(kind, 0) + 1
+            self._saves[kind] = saves
+            # On the first save of a kind (leftovers from earlier runs) and every cleanup_every saves after
+            run_cleanup = (saves - 1) % self.cleanup_every == 0
+        if run_cleanup:
+            self.enforce_retention(kind)
+        return result_id
+
+    def load(self, kind, result_id):
+        """
+        Returns the stored data, or None if the id is unknown, malformed or expired.
+        """
+        try:
+            path = self.path_for(kind, result_id)
+        except ValueError:
+            return None
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                self._remove(path, "expired")
+                return None
+            with open(path, 'rb') as f:
+                data = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            with self._lock:
+                self._stats["missing"] += 1
+            return None
+        with self._lock:
+            self._stats["loaded"] += 1
+        return data
+
+    def load_parsed(self, kind, result_id, parse):
+        """
+        Returns parse(data) for a stored result, or None like load(). The
+        parsed form is kept in a small LRU, checked against the file's
+        mtime, so later requests for the same result (e.g. the next page)
+        neither decode nor parse it again. Callers must not modify it.
+        """
+        try:
+            mtime = os.path.getmtime(self.path_for(kind, result_id))
+        except (ValueError, OSError):
+            mtime = None
+        cache_key = (kind, result_id, parse)
+        if mtime is not None and time.time() - mtime <= self.max_age:
+            with self._lock:
+                entry = self._parsed.get(cache_key)
+                if entry is not None and entry[0] == mtime:
+                    self._parsed.move_to_end(cache_key)
+                    self._stats["parsed_hits"] += 1
+                    return entry[1]
+
+        data = self.load(kind, result_id)
+        if data is None:
+            return None
+        parsed = parse(data)
+        if mtime is not None:
+            with self._lock:
+                self._parsed[cache_key] = (mtime, parsed)
+                self._parsed.move_to_end(cache_key)
+                while len(self._parsed) > self.parsed_entries:
+                    self._parsed.popitem(last=False)
+        return parsed
+
+    def _remove(self, path, reason):
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._stats[reason] += 1
+
+    def enforce_retention(self, kind):
+        """
+        Deletes results of this kind that are too old or beyond max_entries.
+        """
+        directory = os.path.join(self.root_dir, kind)
+        try:
+            entries = []
+            for name in os.listdir(directory):
+                if name.endswith(".json"):
+                    path = os.path.join(directory, name)
+                    entries.append((os.path.getmtime(path), path))
+        except OSError:
+            return
+        entries.sort()
+        now = time.time()
+        keep = []
+        for mtime, path in entries:
+            if now - mtime > self.max_age:
+                self._remove(path, "expired")
+            else:
+                keep.append(path)
+        for path in keep[:max(0, len(keep) - self.max_entries)]:
+            self._remove(path, "evicted")
+
+    def export_legacy(self, kind, result_id, filename):
+        """
+        Copies a stored result to the old fixed filename in the working
+        directory (and src/pages if it exists), without re-serializing it.
+        """
+        source = self.path_for(kind, result_id)
+        cwd = os.getcwd()
+        targets = [os.path.join(cwd, filename)]
+        src_pages_dir = os.path.join(cwd, 'src', 'pages')
+        if os.path.exists(src_pages_dir):
+            targets.append(os.path.join(src_pages_dir, filename))
+        for target in targets:
+            try:
+                shutil.copyfile(source, target)
+                print(f"Exported {kind} result {result_id} to {target}")
+            except OSError as e:
+                print(f"Error exporting {kind} result to {target}: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["max_age_seconds"] = self.max_age
+        stats["max_entries_per_kind"] = self.max_entries
+        return stats
+
+
+# Shared store used by main.py and server.py
+result_store = ResultStore()
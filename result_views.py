@@ -0,0 +1,144 @@
+import os
+
+from models import parse_flight_options, parse_hotel_properties
+
+# Page size used when the client does not pass limit, and the largest page allowed
+DEFAULT_PAGE_SIZE = int(os.environ.get("WANDER_PAGE_SIZE", "10"))
+MAX_PAGE_SIZE = int(os.environ.get("WANDER_MAX_PAGE_SIZE", "50"))
+
+
+def _segment_view(segment):
+    return {
+        "airline": segment.airline,
+        "flight_number": segment.flight_number,
+        "from": segment.departure_id,
+        "to": segment.arrival_id,
+        "departure_time": segment.departure_time,
+        "arrival_time": segment.arrival_time,
+        "duration": segment.duration,
+    }
+
+
+# Named projections: field name -> function of a models.FlightOption
+FLIGHT_FIELDS = {
+    "segments": lambda f: [_segment_view(seg) for seg in f.segments or ()],
+    "price": lambda f: f.price,
+    "duration": lambda f: f.total_duration,
+    "stops": lambda f: f.stops,
+    "layovers": lambda f: [
+        {"id": layover.id, "duration": layover.duration} for layover in f.layovers or ()
+    ],
+    "tokens": lambda f: {
+        key: getattr(f, key) for key in ("departure_token", "booking_token") if getattr(f, key)
+    },
+}
+DEFAULT_FLIGHT_FIELDS = ("segments", "price", "duration", "stops")
+
+# Named projections: field name -> function of a models.HotelProperty
+HOTEL_FIELDS = {
+    "name": lambda h: h.name,
+    "rate": lambda h: h.rate_per_night.extracted_lowest if h.rate_per_night else None,
+    "total_rate": lambda h: h.total_rate.extracted_lowest if h.total_rate else None,
+    "rating": lambda h: h.overall_rating,
+    "reviews": lambda h: h.reviews,
+    "address": lambda h: h.address,
+    "tokens": lambda h: {"property_token": h.property_token},
+}
+DEFAULT_HOTEL_FIELDS = ("name", "rate", "rating", "address", "tokens")
+
+
+def parse_fields(fields_param, defaults):
+    """
+    Turns a comma-separated `fields=` value into a tuple of field names,
+    falling back to the defaults when it is empty.
+    """
+    if not fields_param:
+        return tuple(defaults)
+    return tuple(name.strip() for name in fields_param.split(",") if name.strip())
+
+
+def parse_page(offset_param, limit_param):
+    """
+    Parses offset/limit query values, clamping them to sane bounds.
+    Raises ValueError for values that are not integers.
+    """
+    offset = max(int(offset_param), 0) if offset_param not in (None, "") else 0
+    limit = int(limit_param) if limit_param not in (None, "") else DEFAULT_PAGE_SIZE
+    return offset, min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def project(item, fields, named_fields):
+    """
+    Builds the compact view of one model. Named projections are computed;
+    any other field name is copied from the item's SerpApi form if present,
+    so the frontend can ask for extra raw keys without a code change.
+    """
+    view = {}
+    raw = None
+    for name in fields:
+        if name in named_fields:
+            view[name] = named_fields[name](item)
+            continue
+        if raw is None:
+            raw = item.to_dict()
+        if name in raw:
+            view[name] = raw[name]
+    return view
+
+
+def flight_items(flight_data):
+    """
+    All flight options as FlightOption models: best flights first, then the rest.
+    """
+    return parse_flight_options(flight_data)
+
+
+def hotel_items(hotel_data):
+    return parse_hotel_properties(hotel_data)
+
+
+def paginate(items, offset, limit, fields, named_fields):
+    """
+    Returns one page of projected items plus the paging metadata.
+    """
+    page = items[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(items) else None
+    return {
+        "total": len(items),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": next_offset,
+        "fields": list(fields),
+        "items": [project(item, fields, named_fields) for item in page],
+    }
+
+
+# Hotels rated at least this highly count as "well rated" in trip summaries
+MIN_HOTEL_RATING = float(os.environ.get("WANDER_MIN_HOTEL_RATING", "4.0"))
+
+
+def summarize_trip(flight_data, hotel_data, nights, min_rating=MIN_HOTEL_RATING):
+    """
+    Compact comparison of one destination: the cheapest flight, the cheapest
+    hotel rated at least min_rating, and the estimated total for the stay.
+    Entries are None when no priced option exists.
+    """
+    priced_flights = [f for f in flight_items(flight_data) if f.price_value is not None]
+    cheapest_flight = min(priced_flights, key=lambda f: f.price_value, default=None)
+
+    well_rated_hotels = [
+        h for h in hotel_items(hotel_data)
+        if h.nightly_rate is not None and (h.rating_value or 0) >= min_rating
+    ]
+    cheapest_hotel = min(well_rated_hotels, key=lambda h: h.nightly_rate, default=None)
+
+    estimated_total = None
+    if cheapest_flight is not None and cheapest_hotel is not None:
+        estimated_total = round(cheapest_flight.price_value + cheapest_hotel.nightly_rate * nights, 2)
+
+    return {
+        "cheapest_flight": project(cheapest_flight, DEFAULT_FLIGHT_FIELDS, FLIGHT_FIELDS) if cheapest_flight else None,
+        "cheapest_hotel": project(cheapest_hotel, DEFAULT_HOTEL_FIELDS, HOTEL_FIELDS) if cheapest_hotel else None,
+        "nights": nights,
+        "estimated_total": estimated_total,
+    }
@@ -0,0 +1,356 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import json_codec
+
+# Default time-to-live (seconds) for each SerpApi engine.
+# Flight prices move faster than hotel listings, so they expire sooner.
+DEFAULT_ENGINE_TTLS = {
+    "google_flights": 30 * 60,
+    "google_hotels": 6 * 60 * 60,
+}
+DEFAULT_TTL = 30 * 60
+
+# Expired entries are kept this much longer so they can be served stale while revalidating
+DEFAULT_STALE_TTL = float(os.environ.get("WANDER_CACHE_STALE_SECONDS", str(15 * 60)))
+
+# In-process LRU holds the hottest results; SQLite keeps the rest across restarts
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 200 * 1024 * 1024
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "WANDER_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "serpapi_cache.sqlite3")
+)
+
+# Parameters that never change the result and must not be part of the key
+IGNORED_KEY_PARAMS = ("api_key",)
+
+
+def normalize_search_params(params):
+    """
+    Returns a normalized copy of SerpApi search parameters for use as a cache key.
+    Airport codes are uppercased, free-text queries are lowercased with collapsed
+    whitespace and currency/hl are canonicalized. Dates are expected to be the
+    values actually sent upstream (i.e. after the future-date adjustment).
+    """
+    normalized = {}
+    for key, value in params.items():
+        if key in IGNORED_KEY_PARAMS or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if key in ("departure_id", "arrival_id", "currency"):
+                value = value.upper()
+            elif key in ("q", "hl"):
+                value = " ".join(value.split()).lower()
+        normalized[key] = value
+    return normalized
+
+
+def make_cache_key(params):
+    """
+    Builds a stable string key from SerpApi search parameters.
+    """
+    normalized = normalize_search_params(params)
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+class SearchCache:
+    """
+    Two-tier TTL cache for SerpApi responses: an in-process LRU in front of
+    an on-disk SQLite store. Each engine has its own TTL, both tiers are
+    bounded in size and hit/miss counters are kept for monitoring.
+    Expired entries stay available to lookup() for stale_ttl more seconds,
+    for stale-while-revalidate; get() only ever returns fresh entries.
+
+    Both tiers hold the encoded JSON, so every read returns a fresh copy
+    that callers may modify. The lock only guards the memory tier and the
+    counters; SQLite is read and written outside it, on one connection per
+    thread. A thread's connection is closed when the thread ends.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, engine_ttls=None, default_ttl=DEFAULT_TTL,
+                 max_memory_entries=DEFAULT_MEMORY_ENTRIES, max_disk_bytes=DEFAULT_DISK_BYTES,
+                 stale_ttl=DEFAULT_STALE_TTL):
+        self.path = path
+        self.engine_ttls = dict(DEFAULT_ENGINE_TTLS)
+        if engine_ttls:
+            self.engine_ttls.update(engine_ttls)
+        self.default_ttl = default_ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stale_ttl = stale_ttl
+
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()  # key -> (expires_at, payload)
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()  # live threads' connection holders, closed together by close()
+        self._generation = 0  # bumped by close() so threads reopen their connection
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    def ttl_for(self, engine):
+        """
+        Returns the TTL in seconds configured for the given engine.
+        """
+        return self.engine_ttls.get(engine, self.default_ttl)
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._stats[counter] += amount
+
+    def _connection(self):
+        # Opened lazily, one per thread, so importing the module never touches the filesystem
+        # and threads never wait on each other's disk I/O
+        holder = getattr(self._local, "holder", None)
+        if holder is not None and holder.generation == self._generation:
+            return holder.conn
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                engine TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                payload TEXT NOT NULL
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache (accessed_at)"
+        )
+        conn.commit()
+        holder = _ConnectionHolder(conn)
+        # The thread-local is the only strong reference to the holder, so the
+        # connection is closed as soon as its thread exits
+        weakref.finalize(holder, _close_quietly, conn)
+        with self._lock:
+            holder.generation = self._generation
+            self._connections.add(holder)
+            self._local.holder = holder
+        return conn
+
+    def _remember(self, key, expires_at, payload):
+        # Caller holds self._lock
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["memory_evictions"] += 1
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None on a miss or expired entry.
+        """
+        value, expires_at = self.lookup(key, allow_stale=False)
+        return value
+
+    def lookup(self, key, allow_stale=True):
+        """
+        Returns (value, expires_at). With allow_stale, entries that expired
+        less than stale_ttl ago are returned too (expires_at tells the caller
+        whether to revalidate). Returns (None, None) on a miss.
+        """
+        now = time.time()
+        payload = None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, stored = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    payload = stored
+                elif allow_stale and expires_at + self.stale_ttl > now:
+                    self._stats["stale_hits"] += 1
+                    payload = stored
+                elif expires_at + self.stale_ttl <= now:
+                    del self._memory[key]
+                    self._stats["expired"] += 1
+        if payload is not None:
+            return json_codec.loads(payload), expires_at
+
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT expires_at, payload FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                expires_at, payload = row
+                if expires_at > now or (allow_stale and expires_at + self.stale_ttl > now):
+                    conn.execute(
+                        "UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    conn.commit()
+                    with self._lock:
+                        self._remember(key, expires_at, payload)
+                        self._stats["disk_hits" if expires_at > now else "stale_hits"] += 1
+                    return json_codec.loads(payload), expires_at
+                if expires_at + self.stale_ttl <= now:
+                    conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    self._count("expired")
+        except sqlite3.Error as e:
+            print(f"Search cache read error: {str(e)}")
+
+        self._count("misses")
+        return None, None
+
+    def expires_at(self, key):
+        """
+        Returns when the entry for key stops being fresh, or None if it is not
+        cached. Does not count as a lookup.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry[0]
+        try:
+            row = self._connection().execute(
+                "SELECT expires_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set(self, key, value, engine):
+        """
+        Stores value under key in both tiers using the engine's TTL.
+        """
+        now = time.time()
+        expires_at = now + self.ttl_for(engine)
+        try:
+            payload = json_codec.dumps(value)
+        except (TypeError, ValueError) as e:
+            print(f"Search cache write error: {str(e)}")
+            return
+        with self._lock:
+            self._remember(key, expires_at, payload)
+            self._stats["stores"] += 1
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache "
+                "(key, engine, expires_at, accessed_at, size, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, engine, expires_at, now, len(payload), payload)
+            )
+            conn.commit()
+            self._evict_disk(conn, now)
+        except sqlite3.Error as e:
+            print(f"Search cache write error: {str(e)}")
+
+    def _evict_disk(self, conn, now):
+        # Drop rows past their stale window first, then least recently used rows until under the size cap
+        cursor = conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now - self.stale_ttl,))
+        evicted = max(cursor.rowcount, 0)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM search_cache").fetchone()[0]
+        if total > self.max_disk_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM search_cache ORDER BY accessed_at ASC"
+            ).fetchall()
+            for key, size in rows:
+                if total <= self.max_disk_bytes:
+                    break
+                conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        conn.commit()
+        self._count("disk_evictions", evicted)
+
+    def invalidate(self, key):
+        """
+        Removes a single key from both tiers.
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Search cache delete error: {str(e)}")
+
+    def clear(self):
+        """
+        Empties both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM search_cache")
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Search cache clear error: {str(e)}")
+
+    def stats(self):
+        """
+        Returns a snapshot of the cache counters and current sizes.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"] + stats["stale_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        try:
+            row = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache"
+            ).fetchone()
+            stats["disk_entries"], stats["disk_bytes"] = row
+        except sqlite3.Error:
+            stats["disk_entries"], stats["disk_bytes"] = None, None
+        return stats
+
+    def close(self):
+        """
+        Closes every thread's connection; threads that use the cache again reopen one.
+        """
+        with self._lock:
+            holders = list(self._connections)
+            self._connections = weakref.WeakSet()
+            self._generation += 1
+        for holder in holders:
+            _close_quietly(holder.conn)
+
+
+class _ConnectionHolder:
+    """
+    A thread's SQLite connection, kept in a thread-local so it can be
+    finalized when the thread ends.
+    """
+
+    __slots__ = ("conn", "generation", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.generation = None
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+# Shared cache used by the search functions in main.py
+search_cache = SearchCache()
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from serpapi_quota import key_pool as shared_key_pool, current_search_session
+
+try:
+    import httpx
+except ImportError:  # httpx is optional; without it async calls run the sync client in a thread
+    httpx = None
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+# Timeouts are (connect, read) in seconds; SerpApi searches can take a while to render
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get("SERPAPI_CONNECT_TIMEOUT", "3.05"))
+DEFAULT_READ_TIMEOUT = float(os.environ.get("SERPAPI_READ_TIMEOUT", "30"))
+DEFAULT_MAX_RETRIES = int(os.environ.get("SERPAPI_MAX_RETRIES", "2"))
+DEFAULT_POOL_SIZE = int(os.environ.get("SERPAPI_POOL_SIZE", "20"))
+
+# Status codes worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Number of recent latency samples kept per engine for percentile stats
+LATENCY_SAMPLES = 500
+
+
+class SerpApiClient:
+    """
+    Shared HTTP client for SerpApi. Keeps connections alive in a pooled
+    session, applies connect/read timeouts, retries throttled and 5xx
+    responses with jittered exponential backoff and records per-engine
+    latency statistics. Every attempt first takes a token from the key
+    pool, which also picks the API key; a throttled key is swapped for
+    another one without backing off.
+    """
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_base=0.5, backoff_max=8.0,
+                 pool_size=DEFAULT_POOL_SIZE, key_pool=shared_key_pool):
+        self.key_pool = key_pool
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        # Retries are handled here so they can be jittered and counted
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _backoff_delay(self, attempt, response=None):
+        # Honor Retry-After when SerpApi sends it, otherwise use full jitter
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, engine, elapsed, status, retries):
+        with self._lock:
+            stats = self._stats.get(engine)
+            if stats is None:
+                stats = {
+                    "calls": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "samples": deque(maxlen=LATENCY_SAMPLES),
+                }
+                self._stats[engine] = stats
+            stats["calls"] += 1
+            stats["retries"] += retries
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            stats["samples"].append(elapsed)
+            if status is None or status >= 400:
+                stats["errors"] += 1
+
+    def get(self, url=SERPAPI_URL, params=None, timeout=None):
+        """
+        Performs a GET against SerpApi with retries and returns the final response.
+        Raises the last requests exception if every attempt failed to connect.
+        """
+        params = dict(params or {})
+        engine = params.get("engine", "unknown")
+        caller_key = params.get("api_key")
+        session = current_search_session.get()
+        timeout = timeout or self.timeout
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            response = None
+            # Raises RateLimitExceeded if no key frees up in time
+            key = self.key_pool.acquire(caller_key, session)
+            params["api_key"] = key
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+                self.key_pool.report(key, response.status_code, response.headers.get("Retry-After"))
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    self._record(engine, time.perf_counter() - start, response.status_code, attempt)
+                    return response
+                if response.status_code == 429 and self.key_pool.has_alternative(key, caller_key):
+                    print(f"SerpApi key throttled, switching keys ({attempt + 1}/{self.max_retries})")
+                    attempt += 1
+                    continue
+                print(f"SerpApi returned {response.status_code}, retrying ({attempt + 1}/{self.max_retries})")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._record(engine, time.perf_counter() - start, None, attempt)
+                    raise
+                print(f"SerpApi request failed: {str(e)}, retrying ({attempt + 1}/{self.max_retries})")
+            time.sleep(self._backoff_delay(attempt, response))
+            attempt += 1
+
+    def stats(self):
+        """
+        Returns per-engine call counts, retries, errors and latency percentiles.
+        """
+        with self._lock:
+            snapshot = {}
+            for engine, stats in self._stats.items():
+                samples = sorted(stats["samples"])
+                snapshot[engine] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "avg_seconds": round(stats["total_seconds"] / stats["calls"], 4),
+                    "max_seconds": round(stats["max_seconds"], 4),
+                    "p50_seconds": round(samples[len(samples) // 2], 4) if samples else None,
+                    "p95_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4) if samples else None,
+                }
+            return snapshot
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncSerpApiClient:
+    """
+    asyncio counterpart of SerpApiClient built on httpx. Uses the same
+    timeouts, retry policy and stats as the wrapped sync client, and keeps
+    one pooled httpx client per event loop. Without httpx installed, calls
+    fall back to the sync client in a worker thread.
+    """
+
+    def __init__(self, sync_client, pool_size=DEFAULT_POOL_SIZE):
+        self.sync_client = sync_client
+        self.pool_size = pool_size
+        self._clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            connect_timeout, read_timeout = self.sync_client.timeout
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=self.pool_size),
+                headers=dict(self.sync_client.session.headers),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def get(self, url=SERPAPI_URL, params=None, timeout=None):
+        """
+        Async GET against SerpApi with the sync client's retry policy.
+        Raises the last transport exception if every attempt failed to connect.
+        """
+        if httpx is None:
+            return await asyncio.to_thread(self.sync_client.get, url, params, timeout)
+
+        params = dict(params or {})
+        engine = params.get("engine", "unknown")
+        caller_key = params.get("api_key")
+        session = current_search_session.get()
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        request_kwargs = {"timeout": timeout} if timeout is not None else {}
+        client = self._client()
+        sync_client = self.sync_client
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            response = None
+            key = await sync_client.key_pool.acquire_async(caller_key, session)
+            params["api_key"] = key
+            try:
+                response = await client.get(url, params=params, **request_kwargs)
+                sync_client.key_pool.report(key, response.status_code, response.headers.get("Retry-After"))
+                if response.status_code not in RETRY_STATUSES or attempt >= sync_client.max_retries:
+                    sync_client._record(engine, time.perf_counter() - start, response.status_code, attempt)
+                    return response
+                if response.status_code == 429 and sync_client.key_pool.has_alternative(key, caller_key):
+                    print(f"SerpApi key throttled, switching keys ({attempt + 1}/{sync_client.max_retries})")
+                    attempt += 1
+                    continue
+                print(f"SerpApi returned {response.status_code}, retrying ({attempt + 1}/{sync_client.max_retries})")
+            except httpx.TransportError as e:
+                if attempt >= sync_client.max_retries:
+                    sync_client._record(engine, time.perf_counter() - start, None, attempt)
+                    raise
+                print(f"SerpApi request failed: {str(e)}, retrying ({attempt + 1}/{sync_client.max_retries})")
+            await asyncio.sleep(sync_client._backoff_delay(attempt, response))
+            attempt += 1
+
+    async def aclose(self):
+        """
+        Closes the httpx client of the running event loop, if one was created.
+        Call before the loop ends (e.g. at the end of an asyncio.run main).
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+# Shared clients used by every SerpApi call in main.py
+serpapi_client = SerpApiClient()
+async_serpapi_client = AsyncSerpApiClient(serpapi_client)
@@ -0,0 +1,286 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Comma-separated pool of SerpApi keys; when empty, the key passed by the caller is used
+SERPAPI_KEYS = [key.strip() for key in os.environ.get("SERPAPI_KEYS", "").split(",") if key.strip()]
+
+# Sustained requests per second and burst size, per key and per user session
+KEY_RATE = float(os.environ.get("SERPAPI_KEY_RATE", "1.0"))
+KEY_BURST = float(os.environ.get("SERPAPI_KEY_BURST", "5"))
+SESSION_RATE = float(os.environ.get("SERPAPI_SESSION_RATE", "0.5"))
+SESSION_BURST = float(os.environ.get("SERPAPI_SESSION_BURST", "10"))
+
+# How long a caller may wait for a token, and how long a throttled key is rested
+QUEUE_TIMEOUT = float(os.environ.get("SERPAPI_QUEUE_TIMEOUT", "30"))
+KEY_COOLDOWN = float(os.environ.get("SERPAPI_KEY_COOLDOWN", "60"))
+
+# Optional per-key search quota, to estimate the remaining budget (0 = not tracked). The estimate
+# only counts this worker process's requests since it started, not other workers or earlier runs.
+MONTHLY_QUOTA = int(os.environ.get("SERPAPI_MONTHLY_QUOTA", "0"))
+
+# Session the current search is made for; set by the Flask routes, inherited by asyncio tasks
+current_search_session = contextvars.ContextVar("current_search_session", default=None)
+
+
+class RateLimitExceeded(RuntimeError):
+    """
+    Raised when no SerpApi key (or the session's share) frees up within the queue timeout.
+    """
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to capacity tokens, refilled at rate per
+    second. Not thread-safe on its own; SerpApiKeyPool guards it.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """
+        Seconds until a token is available (0 if one is available now).
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self):
+        self.tokens -= 1
+
+
+class SerpApiKeyPool:
+    """
+    Rate limiter in front of every SerpApi call. Each key has a token
+    bucket; requests go to the key with the most tokens left, keys that
+    SerpApi throttles rest for a cooldown and invalid keys are dropped.
+    Each user session also has its own smaller bucket, so one busy session
+    cannot use up the shared budget.
+    """
+
+    def __init__(self, keys=SERPAPI_KEYS, key_rate=KEY_RATE, key_burst=KEY_BURST,
+                 session_rate=SESSION_RATE, session_burst=SESSION_BURST,
+                 queue_timeout=QUEUE_TIMEOUT, cooldown=KEY_COOLDOWN,
+                 monthly_quota=MONTHLY_QUOTA, max_sessions=10000):
+        self.key_rate = key_rate
+        self.key_burst = key_burst
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.queue_timeout = queue_timeout
+        self.cooldown = cooldown
+        self.monthly_quota = monthly_quota
+        self.max_sessions = max_sessions
+        self.configured = bool(keys)
+
+        self._lock = threading.Lock()
+        self._keys = OrderedDict()
+        for key in keys:
+            self._add_key(key)
+        self._sessions = OrderedDict()  # session -> TokenBucket, least recently used first
+        self._stats = {"granted": 0, "waited": 0, "rejected": 0, "throttled": 0}
+
+    def _add_key(self, key):
+        state = {
+            "bucket": TokenBucket(self.key_rate, self.key_burst),
+            "cooldown_until": 0.0,
+            "disabled": None,
+            "requests": 0,
+            "throttled": 0,
+        }
+        self._keys[key] = state
+        return state
+
+    def _candidates(self, fallback_key):
+        if self.configured:
+            return self._keys.items()
+        if not fallback_key:
+            return ()
+        if fallback_key not in self._keys:
+            self._add_key(fallback_key)
+        return ((fallback_key, self._keys[fallback_key]),)
+
+    def _session_bucket(self, session):
+        bucket = self._sessions.get(session)
+        if bucket is None:
+            bucket = TokenBucket(self.session_rate, self.session_burst)
+            self._sessions[session] = bucket
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session)
+        return bucket
+
+    def try_acquire(self, fallback_key=None, session=None):
+        """
+        Takes a token for the best available key (and for the session).
+        Returns (key, 0) on success or (None, seconds_to_wait).
+        """
+        now = time.monotonic()
+        with self._lock:
+            session_bucket = self._session_bucket(session) if session is not None else None
+            session_wait = session_bucket.wait_time(now) if session_bucket is not None else 0.0
+
+            best_key, best_tokens, key_wait = None, -1.0, float("inf")
+            for key, state in self._candidates(fallback_key):
+                if state["disabled"]:
+                    continue
+                if state["cooldown_until"] > now:
+                    key_wait = min(key_wait, state["cooldown_until"] - now)
+                    continue
+                wait = state["bucket"].wait_time(now)
+                if wait == 0 and state["bucket"].tokens > best_tokens:
+                    best_key, best_tokens = key, state["bucket"].tokens
+                key_wait = min(key_wait, wait)
+
+            if best_key is None or session_wait > 0:
+                return None, max(session_wait, key_wait if best_key is None else 0.0)
+
+            self._keys[best_key]["bucket"].take()
+            self._keys[best_key]["requests"] += 1
+            if session_bucket is not None:
+                session_bucket.take()
+            self._stats["granted"] += 1
+            return best_key, 0.0
+
+    def _rejected(self):
+        with self._lock:
+            self._stats["rejected"] += 1
+        return RateLimitExceeded(
+            f"No SerpApi capacity freed up within {self.queue_timeout}s"
+        )
+
+    def acquire(self, fallback_key=None, session=None):
+        """
+        Blocks until a key is available and returns it.
+        Raises RateLimitExceeded after queue_timeout.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        waited = False
+        while True:
+            key, wait = self.try_acquire(fallback_key, session)
+            if key is not None:
+                if waited:
+                    with self._lock:
+                        self._stats["waited"] += 1
+                return key
+            remaining = deadline - time.monotonic()
+            if wait == float("inf") or remaining <= 0:
+                raise self._rejected()
+            waited = True
+            time.sleep(min(wait, remaining, 1.0))
+
+    async def acquire_async(self, fallback_key=None, session=None):
+        """
+        Async counterpart of acquire; waits without blocking the event loop.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        waited = False
+        while True:
+            key, wait = self.try_acquire(fallback_key, session)
+            if key is not None:
+                if waited:
+                    with self._lock:
+                        self._stats["waited"] += 1
+                return key
+            remaining = deadline - time.monotonic()
+            if wait == float("inf") or remaining <= 0:
+                raise self._rejected()
+            waited = True
+            await asyncio.sleep(min(wait, remaining, 1.0))
+
+    def report(self, key, status_code, retry_after=None):
+        """
+        Feeds the upstream status for a key back into the pool: 429 rests
+        the key for the cooldown (or Retry-After), 401 disables it.
+        """
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                return
+            if status_code == 429:
+                try:
+                    rest = float(retry_after) if retry_after else self.cooldown
+                except ValueError:
+                    rest = self.cooldown
+                state["cooldown_until"] = time.monotonic() + rest
+                state["throttled"] += 1
+                self._stats["throttled"] += 1
+            elif status_code == 401:
+                state["disabled"] = "invalid key"
+
+    def has_alternative(self, key, fallback_key=None):
+        """
+        True if another usable key could take over from this one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return any(
+                other != key and not state["disabled"] and state["cooldown_until"] <= now
+                for other, state in self._candidates(fallback_key)
+            )
+
+    def headroom(self):
+        """
+        Tokens currently available across usable keys, for background work
+        that should only run when live traffic leaves capacity spare.
+        None until the pool knows of any key.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._keys:
+                return None
+            total = 0.0
+            for state in self._keys.values():
+                if not state["disabled"] and state["cooldown_until"] <= now:
+                    state["bucket"].wait_time(now)
+                    total += state["bucket"].tokens
+            return total
+
+    @staticmethod
+    def _mask(key):
+        return f"{key[:4]}...{key[-4:]}" if len(key) > 8 else "***"
+
+    def stats(self):
+        """
+        Per-key request counts, tokens left and cooldowns, plus an estimate of
+        the remaining quota when SERPAPI_MONTHLY_QUOTA is set. Counts cover
+        this process since startup only. Keys are masked.
+        """
+        now = time.monotonic()
+        with self._lock:
+            keys = {}
+            for key, state in self._keys.items():
+                state["bucket"].wait_time(now)
+                entry = {
+                    "requests": state["requests"],
+                    "throttled": state["throttled"],
+                    "tokens_available": round(state["bucket"].tokens, 2),
+                    "cooling_down_seconds": round(max(state["cooldown_until"] - now, 0), 1),
+                    "disabled": state["disabled"],
+                }
+                if self.monthly_quota:
+                    entry["quota_remaining_estimate"] = max(self.monthly_quota - state["requests"], 0)
+                keys[self._mask(key)] = entry
+            stats = dict(self._stats)
+            stats["keys"] = keys
+            stats["counts_scope"] = "this worker process since startup"
+            stats["active_sessions"] = len(self._sessions)
+            stats["key_rate_per_second"] = self.key_rate
+            stats["session_rate_per_second"] = self.session_rate
+            return stats
+
+
+# Shared pool used by the SerpApi clients
+key_pool = SerpApiKeyPool()
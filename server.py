@@ -1,70 +1,101 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
-import google.generativeai as genai
-import json
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
-import shutil
-from main import search_google_flights, search_google_hotels, process_user_selection, generate_itinerary
+import json_codec
+from main import search_google_flights, search_google_hotels, process_user_selection, generate_itinerary_data, save_itinerary, generate_itinerary_stream, search_destinations, MAX_BATCH_DESTINATIONS, run_itinerary_job
+from search_cache import search_cache
+from serpapi_client import serpapi_client
+from circuit_breaker import resilience_stats
+from singleflight import search_singleflight
+from prefetcher import search_prefetcher
+from airports import airport_index
+from serpapi_quota import key_pool, current_search_session
+from gemini_client import gemini_manager
+from session_backends import create_session_backend
+from chat_prompt import ChatTurn, build_chat_contents, extract_slots, session_size, encode_session, decode_session
+from result_store import result_store, LEGACY_FILE_EXPORT
+from result_views import (
+    FLIGHT_FIELDS, HOTEL_FIELDS, DEFAULT_FLIGHT_FIELDS, DEFAULT_HOTEL_FIELDS,
+    flight_items, hotel_items, parse_fields, parse_page, paginate
+)
+from http_responses import cached_json_response, compress_response
+from readiness import readiness
+from job_queue import job_queue, QueueFull
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Configure Gemini API
-genai.configure(api_key="ENTER_YOU_API_KEY")
-gemini_model = genai.GenerativeModel("gemini-1.5-flash")
+# Number of reverse proxies in front of the app whose X-Forwarded-For is trusted for the client address
+TRUSTED_PROXIES = int(os.environ.get("WANDER_TRUSTED_PROXIES", "0"))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
 
-# Function to copy JSON files to src/pages directory
-def copy_json_files():
+# Default SerpApi key for searches; SERPAPI_KEYS configures a pool of keys instead
+SERPAPI_API_KEY = os.environ.get("SERPAPI_API_KEY", "4e1c7c0180853cf4cbc16e0aad62e5e83b7f08e131407fe671a7e915e52c8fdf")
+
+@app.before_request
+def bind_search_session():
     """
-    Copy the test.json, test_flight.json, and itinerary.json files to the src/pages directory
+    Charges SerpApi calls made while handling this request to the client
+    address. Client-supplied session ids are not used: a client could
+    rotate them to get a fresh quota bucket on every request.
     """
-    try:
-        # Get current directory
-        current_dir = os.getcwd()
-        print(f"Current directory: {current_dir}")
-        
-        # Define source and destination paths
-        src_files = ['test.json', 'test_flight.json', 'itinerary.json']
-        dest_dir = os.path.join(current_dir, 'src', 'pages')
-        
-        print(f"Destination directory: {dest_dir}")
-        
-        # Check if destination directory exists
-        if not os.path.exists(dest_dir):
-            print(f"Creating directory: {dest_dir}")
-            os.makedirs(dest_dir, exist_ok=True)
-        
-        # Copy files
-        for file in src_files:
-            src_path = os.path.join(current_dir, file)
-            dest_path = os.path.join(dest_dir, file)
-            
-            if os.path.exists(src_path):
-                print(f"Copying {src_path} to {dest_path}")
-                shutil.copy2(src_path, dest_path)
-                print(f"File copied successfully: {os.path.getsize(dest_path)} bytes")
-            else:
-                print(f"Source file does not exist: {src_path}")
-        
-        return True
-    except Exception as e:
-        import traceback
-        print(f"Error copying files: {str(e)}")
-        print(traceback.format_exc())
-        return False
+    g.search_session_token = current_search_session.set(f"client:{request.remote_addr}")
 
-# Store conversation histories for different sessions
-conversation_histories = {}
+@app.teardown_request
+def unbind_search_session(error=None):
+    token = g.pop('search_session_token', None)
+    if token is not None:
+        try:
+            current_search_session.reset(token)
+        except ValueError:
+            # Reset from a different context (e.g. after a streamed response); just clear it
+            current_search_session.set(None)
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
-    data = request.json
-    user_message = data.get('message', '')
-    session_id = data.get('sessionId', 'default')
+@app.after_request
+def compress(response):
+    """
+    Compresses large JSON responses for clients that accept gzip or brotli.
+    """
+    return compress_response(response, request)
+
+def format_sse(event, data):
+    """
+    Formats one Server-Sent Events message with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json_codec.dumps(data)}\n\n"
+
+def sse_response(events):
+    """
+    Wraps an iterator of (event, data) tuples in a streaming text/event-stream response.
+    """
+    def generate():
+        for event, data in events:
+            yield format_sse(event, data)
     
-    if session_id not in conversation_histories:
-        # Initialize a new conversation with the travel assistant prompt
-        conversation_histories[session_id] = """You are a friendly travel recommendation assistant. Your goal is to have a natural, interactive conversation with the user to learn about their travel preferences. 
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Stop reverse proxies from buffering the stream
+        }
+    )
+
+# Store conversation histories for different sessions (bounded, idle sessions expire).
+# WANDER_SESSION_BACKEND=sqlite or redis shares sessions between workers and hosts.
+conversation_histories = create_session_backend(
+    size_of=session_size,
+    encode=encode_session,
+    decode=decode_session
+)
+
+# Turns kept per session; prompts only use the most recent ones plus a slot summary
+MAX_STORED_TURNS = 50
+
+# Instructions that start every travel assistant conversation
+TRAVEL_ASSISTANT_PROMPT = """You are a friendly travel recommendation assistant. Your goal is to have a natural, interactive conversation with the user to learn about their travel preferences. 
 
 CRITICAL INSTRUCTION: When providing recommendations, you MUST include EXACT and VALID 3-letter IATA airport codes for both departure and arrival locations. For example: LAX for Los Angeles, JFK for New York, CDG for Paris, LHR for London. The application relies on these codes to search for flights. Invalid or missing codes will cause flight search to fail.
 
@@ -99,36 +130,90 @@ IMPORTANT: You MUST provide EXACT and VALID 3-letter IATA airport codes for both
 
 If the answer in the form "I want to fly from <Departure airport code> to <Arrival Airport code> from <Departure date> to <arrival date> for <x> travelers", just ask two more questions, what are your interests and what is your budget. After that, just give the JSON.
 Once all required details are captured, output only the final JSON."""
+
+def start_turn(session_id, user_message):
+    """
+    Appends the user's message to the session history (creating the session
+    if needed) and returns the contents to send to Gemini. The system
+    instructions go separately as the model's system instruction; contents
+    hold a summary of the details captured so far and only the most recent
+    turns, so late turns cost about as much as early ones.
+    """
+    with conversation_histories.locked(session_id):
+        session = conversation_histories.get(session_id) or {'turns': [], 'slots': {}}
+        
+        # Update conversation history with user message
+        turns = session['turns'] + [ChatTurn('user', user_message)]
+        slots = extract_slots(user_message, session['slots'])
+        conversation_histories.set(session_id, {'turns': turns[-MAX_STORED_TURNS:], 'slots': slots})
+        return build_chat_contents(turns, slots)
+
+def finish_turn(session_id, ai_response):
+    """
+    Records the AI response in the session history.
+    """
+    with conversation_histories.locked(session_id):
+        session = conversation_histories.get(session_id) or {'turns': [], 'slots': {}}
+        turns = session['turns'] + [ChatTurn('model', ai_response)]
+        conversation_histories.set(session_id, {'turns': turns[-MAX_STORED_TURNS:], 'slots': session['slots']})
+
+def abandon_turn(session_id, partial_response=''):
+    """
+    Closes a turn that did not complete. A partial response is recorded as
+    the AI response; without one the pending user message is dropped, so the
+    history never holds two user turns in a row.
+    """
+    if partial_response:
+        finish_turn(session_id, partial_response)
+        return
+    with conversation_histories.locked(session_id):
+        session = conversation_histories.get(session_id)
+        if session and session['turns'] and session['turns'][-1].role == 'user':
+            conversation_histories.set(session_id, {'turns': session['turns'][:-1], 'slots': session['slots']})
+
+def extract_recommendation(ai_response):
+    """
+    Checks whether the AI response contains the final recommendation JSON.
+    Returns (is_recommendation, recommendation_data).
+    """
+    is_recommendation = False
+    recommendation_data = None
     
-    # Update conversation history with user message
-    conversation_histories[session_id] += f"\n\nUser: {user_message}\nAI:"
+    try:
+        # Check if the response contains JSON data
+        if '{' in ai_response and '}' in ai_response:
+            json_start = ai_response.find('{')
+            json_end = ai_response.rfind('}') + 1
+            json_string = ai_response[json_start:json_end]
+            recommendation_data = json_codec.loads(json_string)
+            
+            # Verify it has the expected structure
+            if 'preferences' in recommendation_data and 'recommended_destinations' in recommendation_data:
+                is_recommendation = True
+    except:
+        # If JSON parsing fails, it's not a recommendation
+        pass
+    
+    return is_recommendation, recommendation_data
+
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    data = request.json
+    user_message = data.get('message', '')
+    session_id = data.get('sessionId', 'default')
+    
+    contents = start_turn(session_id, user_message)
     
     try:
         # Generate response from Gemini
-        response = gemini_model.generate_content(conversation_histories[session_id])
+        response = gemini_manager.generate(contents, system_instruction=TRAVEL_ASSISTANT_PROMPT)
         ai_response = response.text.strip()
         
         # Update conversation history with AI response
-        conversation_histories[session_id] += f" {ai_response}"
+        finish_turn(session_id, ai_response)
         
         # Check if the response is a JSON recommendation
-        is_recommendation = False
-        recommendation_data = None
-        
-        try:
-            # Check if the response contains JSON data
-            if '{' in ai_response and '}' in ai_response:
-                json_start = ai_response.find('{')
-                json_end = ai_response.rfind('}') + 1
-                json_string = ai_response[json_start:json_end]
-                recommendation_data = json.loads(json_string)
-                
-                # Verify it has the expected structure
-                if 'preferences' in recommendation_data and 'recommended_destinations' in recommendation_data:
-                    is_recommendation = True
-        except:
-            # If JSON parsing fails, it's not a recommendation
-            pass
+        is_recommendation, recommendation_data = extract_recommendation(ai_response)
         
         return jsonify({
             'response': ai_response,
@@ -137,8 +222,54 @@ Once all required details are captured, output only the final JSON."""
         })
     
     except Exception as e:
+        abandon_turn(session_id)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming variant of /api/chat. Sends 'delta' events with partial text as
+    Gemini generates it, then a 'done' event with the full response and the
+    recommendation detection result. If the stream fails or the client goes
+    away, whatever was generated is kept as the reply (see abandon_turn).
+    """
+    data = request.json
+    user_message = data.get('message', '')
+    session_id = data.get('sessionId', 'default')
+    
+    contents = start_turn(session_id, user_message)
+    
+    def events():
+        chunks = []
+        finished = False
+        try:
+            try:
+                for text in gemini_manager.generate_stream(contents, system_instruction=TRAVEL_ASSISTANT_PROMPT):
+                    chunks.append(text)
+                    yield 'delta', {'text': text}
+            except Exception as e:
+                print(f"Error streaming chat response: {str(e)}")
+                yield 'error', {'error': str(e)}
+                return
+            
+            ai_response = ''.join(chunks).strip()
+            finish_turn(session_id, ai_response)
+            finished = True
+            
+            # Recommendation detection needs the complete response
+            is_recommendation, recommendation_data = extract_recommendation(ai_response)
+            yield 'done', {
+                'response': ai_response,
+                'isRecommendation': is_recommendation,
+                'recommendationData': recommendation_data
+            }
+        finally:
+            # Runs on errors and when the client disconnects mid-stream
+            if not finished:
+                abandon_turn(session_id, ''.join(chunks).strip())
+    
+    return sse_response(events())
+
 @app.route('/api/fetch-travel-data', methods=['POST'])
 def fetch_travel_data():
     try:
@@ -167,29 +298,20 @@ def fetch_travel_data():
                 'message': f"Missing required parameters: {', '.join(missing)}"
             }), 400
         
-        # Define API key - using a known working key from main.py for both hotel and flight searches
-        api_key = "4e1c7c0180853cf4cbc16e0aad62e5e83b7f08e131407fe671a7e915e52c8fdf"
+        api_key = SERPAPI_API_KEY
         
         # Use the process_user_selection function from main.py
-        success = process_user_selection(data, api_key)
+        search_id = process_user_selection(data, api_key)
         
-        if success:
-            # Copy the JSON files to src/pages
-            copy_success = copy_json_files()
-            
-            # Get the current directory
-            base_dir = os.path.abspath(os.path.dirname(__file__))
-            flight_path = os.path.join(base_dir, 'test_flight.json')
-            hotel_path = os.path.join(base_dir, 'test.json')
-            
+        if search_id:
             return jsonify({
                 'status': 'success',
                 'message': 'Travel data fetched and saved successfully',
-                'files': {
-                    'flight_data': flight_path,
-                    'hotel_data': hotel_path
-                },
-                'copied_to_src_pages': copy_success
+                'search_id': search_id,
+                'search_url': f"/api/searches/{search_id}",
+                'flights_url': f"/api/searches/{search_id}/flights",
+                'hotels_url': f"/api/searches/{search_id}/hotels",
+                'copied_to_src_pages': LEGACY_FILE_EXPORT
             })
         else:
             return jsonify({
@@ -206,24 +328,94 @@ def fetch_travel_data():
             'message': str(e)
         }), 500
 
+@app.route('/api/fetch-travel-data/batch', methods=['POST'])
+def fetch_travel_data_batch():
+    """
+    Searches every destination of a chat recommendation concurrently and
+    returns a per-destination summary (cheapest flight, cheapest well-rated
+    hotel, estimated total). Accepts the recommendation object itself or
+    {"recommendation": {...}}.
+    """
+    try:
+        data = request.json or {}
+        recommendation = data.get('recommendation', data)
+        destinations = recommendation.get('recommended_destinations')
+        
+        if not destinations or not isinstance(destinations, list):
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing required parameter: recommended_destinations'
+            }), 400
+        if len(destinations) > MAX_BATCH_DESTINATIONS:
+            return jsonify({
+                'status': 'error',
+                'message': f"At most {MAX_BATCH_DESTINATIONS} destinations can be searched at once"
+            }), 400
+        
+        api_key = SERPAPI_API_KEY
+        summaries = search_destinations(destinations, api_key)
+        
+        priced = [s for s in summaries if s.get('estimated_total') is not None]
+        best_value = min(priced, key=lambda s: s['estimated_total'])['name'] if priced else None
+        
+        return jsonify({
+            'status': 'success',
+            'destinations': summaries,
+            'best_value': best_value
+        })
+        
+    except Exception as e:
+        import traceback
+        print(f"Error in batch travel search: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/reset', methods=['POST'])
 def reset_conversation():
     data = request.json
     session_id = data.get('sessionId', 'default')
     
-    if session_id in conversation_histories:
-        del conversation_histories[session_id]
+    conversation_histories.delete(session_id)
     
     return jsonify({'status': 'success'})
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    # Counted once, from the backend's stats; shared backends may leave it out (None)
+    sessions = conversation_histories.stats()
     return jsonify({
         'status': 'ok',
         'service': 'WanderAI Chatbot API',
-        'active_sessions': len(conversation_histories)
+        'active_sessions': sessions.get('active_sessions'),
+        'sessions': sessions,
+        'search_cache': search_cache.stats(),
+        'serpapi': serpapi_client.stats(),
+        'resilience': resilience_stats(),
+        'singleflight': search_singleflight.stats(),
+        'serpapi_quota': key_pool.stats(),
+        'gemini': gemini_manager.stats(),
+        'results': result_store.stats(),
+        'jobs': job_queue.stats(),
+        'prefetch': search_prefetcher.stats(),
+        'airports': airport_index.stats()
     })
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness probe: 200 once startup checks pass, 503 while they fail or
+    while the worker is draining for shutdown.
+    """
+    ready, checks = readiness.run_checks(conversation_histories)
+    return jsonify({
+        'status': 'ready' if ready else ('draining' if readiness.draining else 'not_ready'),
+        'checks': checks,
+        'gemini_in_flight': gemini_manager.in_flight()
+    }), 200 if ready else 503
+
 @app.route('/api/generate-itinerary', methods=['POST'])
 def create_itinerary():
     try:
@@ -252,7 +444,7 @@ def create_itinerary():
         
         # Generate the itinerary
         print("Generating itinerary with the received data...")
-        itinerary_data = generate_itinerary(
+        itinerary_data = generate_itinerary_data(
             selected_flight, 
             selected_hotel, 
             outbound_date, 
@@ -266,14 +458,13 @@ def create_itinerary():
                 'message': 'Failed to generate itinerary'
             }), 500
         
-        # Return the path to the generated itinerary
-        base_dir = os.path.abspath(os.path.dirname(__file__))
-        itinerary_path = os.path.join(base_dir, 'itinerary.json')
+        itinerary_id = save_itinerary(itinerary_data)
         
         return jsonify({
             'status': 'success',
             'message': 'Itinerary generated and saved successfully',
-            'itinerary_path': itinerary_path,
+            'itinerary_id': itinerary_id,
+            'itinerary_url': f"/api/itineraries/{itinerary_id}",
             'itinerary_data': itinerary_data
         })
         
@@ -286,5 +477,229 @@ def create_itinerary():
             'message': str(e)
         }), 500
 
+# Longest a status request may be held open waiting for a job to change
+MAX_JOB_WAIT = 60
+
+@app.route('/api/itinerary-jobs', methods=['POST'])
+def submit_itinerary_job():
+    """
+    Queues itinerary generation and returns a job id right away (202).
+    Takes the same body as /api/generate-itinerary plus an optional
+    priority ("high", "normal", "low" or 0-9, lower runs first).
+    """
+    data = request.json or {}
+    
+    selected_flight = data.get('selectedFlight')
+    selected_hotel = data.get('selectedHotel')
+    outbound_date = data.get('outboundDate')
+    return_date = data.get('returnDate')
+    user_preferences = data.get('userPreferences', 'Cultural experiences, local cuisine, and historical sites')
+    
+    if not all([selected_flight, selected_hotel, outbound_date, return_date]):
+        missing = []
+        if not selected_flight: missing.append('selectedFlight')
+        if not selected_hotel: missing.append('selectedHotel')
+        if not outbound_date: missing.append('outboundDate')
+        if not return_date: missing.append('returnDate')
+        
+        return jsonify({
+            'status': 'error',
+            'message': f"Missing required parameters: {', '.join(missing)}"
+        }), 400
+    
+    try:
+        priority = job_queue.parse_priority(data.get('priority'))
+    except (TypeError, ValueError):
+        return jsonify({
+            'status': 'error',
+            'message': 'priority must be "high", "normal", "low" or an integer from 0 to 9'
+        }), 400
+    
+    try:
+        job = job_queue.submit(
+            'itinerary',
+            run_itinerary_job,
+            selected_flight,
+            selected_hotel,
+            outbound_date,
+            return_date,
+            user_preferences,
+            priority=priority
+        )
+    except QueueFull as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 503
+    
+    return jsonify({
+        'status': 'success',
+        'job_id': job.job_id,
+        'job_status': job.status,
+        'status_url': f"/api/itinerary-jobs/{job.job_id}"
+    }), 202
+
+@app.route('/api/itinerary-jobs/<job_id>', methods=['GET'])
+def get_itinerary_job(job_id):
+    """
+    Returns a job's status. With ?wait=N (seconds, up to MAX_JOB_WAIT) the
+    request is held until the status differs from ?since= (default: the
+    current status) or the job finishes.
+    """
+    if not result_store.is_valid_id(job_id):
+        return jsonify({'status': 'error', 'message': f"No job found for id {job_id}"}), 404
+    
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_JOB_WAIT)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'wait must be a number of seconds'}), 400
+    
+    if wait > 0:
+        since = request.args.get('since')
+        if since is None:
+            current = job_queue.get(job_id)
+            since = current['status'] if current else None
+        job = job_queue.wait(job_id, since=since, timeout=wait)
+    else:
+        job = job_queue.get(job_id)
+    
+    if job is None:
+        return jsonify({'status': 'error', 'message': f"No job found for id {job_id}"}), 404
+    return jsonify({'status': 'success', 'job': job})
+
+@app.route('/api/itinerary-jobs/<job_id>', methods=['DELETE'])
+def cancel_itinerary_job(job_id):
+    """
+    Cancels a job. A job that is already running finishes, but its result is discarded.
+    """
+    if not result_store.is_valid_id(job_id):
+        return jsonify({'status': 'error', 'message': f"No job found for id {job_id}"}), 404
+    
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f"No job found for id {job_id}"}), 404
+    return jsonify({'status': 'success', 'job': job})
+
+@app.route('/api/searches/<search_id>', methods=['GET'])
+def get_search(search_id):
+    """
+    Returns the flight and hotel data stored for a search id.
+    """
+    flight_data = result_store.load('flights', search_id)
+    hotel_data = result_store.load('hotels', search_id)
+    if flight_data is None or hotel_data is None:
+        return jsonify({
+            'status': 'error',
+            'message': f"No search results found for id {search_id}"
+        }), 404
+    
+    return cached_json_response({
+        'status': 'success',
+        'search_id': search_id,
+        'flight_data': flight_data,
+        'hotel_data': hotel_data
+    }, request)
+
+def result_page(kind, search_id, items_of, named_fields, default_fields):
+    """
+    Serves one page of a stored search as compact projections.
+    Query parameters: offset, limit and fields (comma-separated).
+    """
+    # Parsed into models once per stored result, then reused for every page
+    items = result_store.load_parsed(kind, search_id, items_of)
+    if items is None:
+        return jsonify({
+            'status': 'error',
+            'message': f"No {kind} results found for id {search_id}"
+        }), 404
+
+    try:
+        offset, limit = parse_page(request.args.get('offset'), request.args.get('limit'))
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'offset and limit must be integers'
+        }), 400
+    fields = parse_fields(request.args.get('fields'), default_fields)
+
+    page = paginate(items, offset, limit, fields, named_fields)
+    page['status'] = 'success'
+    page['search_id'] = search_id
+    return cached_json_response(page, request)
+
+@app.route('/api/searches/<search_id>/flights', methods=['GET'])
+def get_search_flights(search_id):
+    """
+    Returns a page of flight options (segments, price, duration, stops by default).
+    """
+    return result_page('flights', search_id, flight_items, FLIGHT_FIELDS, DEFAULT_FLIGHT_FIELDS)
+
+@app.route('/api/searches/<search_id>/hotels', methods=['GET'])
+def get_search_hotels(search_id):
+    """
+    Returns a page of hotels (name, rate, rating, address, tokens by default).
+    """
+    return result_page('hotels', search_id, hotel_items, HOTEL_FIELDS, DEFAULT_HOTEL_FIELDS)
+
+@app.route('/api/itineraries/<itinerary_id>', methods=['GET'])
+def get_itinerary(itinerary_id):
+    """
+    Returns a stored itinerary by id.
+    """
+    itinerary_data = result_store.load('itineraries', itinerary_id)
+    if itinerary_data is None:
+        return jsonify({
+            'status': 'error',
+            'message': f"No itinerary found for id {itinerary_id}"
+        }), 404
+    
+    return cached_json_response({
+        'status': 'success',
+        'itinerary_id': itinerary_id,
+        'itinerary_data': itinerary_data
+    }, request)
+
+@app.route('/api/generate-itinerary/stream', methods=['POST'])
+def create_itinerary_stream():
+    """
+    Streaming variant of /api/generate-itinerary. Sends each day of the
+    itinerary as a Server-Sent Event as soon as Gemini has produced it.
+    """
+    data = request.json or {}
+    print(f"Received streaming itinerary request with data: {data}")
+    
+    selected_flight = data.get('selectedFlight')
+    selected_hotel = data.get('selectedHotel')
+    outbound_date = data.get('outboundDate')
+    return_date = data.get('returnDate')
+    user_preferences = data.get('userPreferences', 'Cultural experiences, local cuisine, and historical sites')
+    
+    if not all([selected_flight, selected_hotel, outbound_date, return_date]):
+        missing = []
+        if not selected_flight: missing.append('selectedFlight')
+        if not selected_hotel: missing.append('selectedHotel')
+        if not outbound_date: missing.append('outboundDate')
+        if not return_date: missing.append('returnDate')
+        
+        return jsonify({
+            'status': 'error',
+            'message': f"Missing required parameters: {', '.join(missing)}"
+        }), 400
+    
+    return sse_response(generate_itinerary_stream(
+        selected_flight,
+        selected_hotel,
+        outbound_date,
+        return_date,
+        user_preferences
+    ))
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000) 
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(
+        debug=os.environ.get('FLASK_DEBUG', '0') == '1',
+        host=os.environ.get('WANDER_HOST', '127.0.0.1'),
+        port=int(os.environ.get('PORT', '5000')),
+        threaded=True
+    )
+
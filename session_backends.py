@@ -0,0 +1,397 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import json_codec
+from session_store import SessionBackend, SessionStore, DEFAULT_IDLE_TTL, DEFAULT_MAX_SESSIONS
+
+DEFAULT_SESSION_DB = os.environ.get(
+    "WANDER_SESSION_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.sqlite3")
+)
+DEFAULT_REDIS_URL = os.environ.get("WANDER_REDIS_URL", "redis://localhost:6379/0")
+
+# Deletes a lock key only if it still holds our token, in one atomic step
+RELEASE_LOCK_SCRIPT = (
+    'if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("del", KEYS[1]) else return 0 end'
+)
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """
+    Session backend on a shared SQLite file, usable by several worker
+    processes on one host. `locked()` claims a lock row for the one
+    session (expiring after lock_timeout in case its holder died), so a
+    read-modify-write on a session is atomic across processes while other
+    sessions proceed. Idle sessions expire and the oldest are evicted
+    beyond max_sessions.
+    """
+
+    def __init__(self, path=DEFAULT_SESSION_DB, idle_ttl=DEFAULT_IDLE_TTL,
+                 max_sessions=DEFAULT_MAX_SESSIONS, lock_timeout=30.0,
+                 encode=json_codec.dumps, decode=json_codec.loads):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.lock_timeout = lock_timeout
+        self.encode = encode
+        self.decode = decode
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"created": 0, "deleted": 0, "expired": 0, "evicted_lru": 0, "lock_waits": 0}
+        self._writes = 0
+
+        conn = self._connection()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS chat_sessions (
+                session_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chat_sessions_access ON chat_sessions (last_access)"
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS chat_session_locks (
+                session_id TEXT PRIMARY KEY,
+                token TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        conn.commit()
+
+    def _connection(self):
+        # One connection per thread; sqlite3 connections are not shareable across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.held = {}  # session_id -> (token, depth) of locks this thread holds
+        return conn
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    @contextmanager
+    def locked(self, session_id):
+        """
+        Holds the lock row of session_id for the duration of the with-block.
+        Re-entrant within a thread.
+        """
+        conn = self._connection()
+        held = self._local.held
+        if session_id in held:
+            token, depth = held[session_id]
+            held[session_id] = (token, depth + 1)
+        else:
+            token = uuid.uuid4().hex
+            deadline = time.monotonic() + self.lock_timeout
+            while not self._try_lock(conn, session_id, token):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for session lock {session_id}")
+                self._count("lock_waits")
+                time.sleep(0.01)
+            held[session_id] = (token, 1)
+        try:
+            yield
+        finally:
+            token, depth = held[session_id]
+            if depth > 1:
+                held[session_id] = (token, depth - 1)
+            else:
+                del held[session_id]
+                # Only release the lock if it is still ours (it may have expired)
+                conn.execute(
+                    "DELETE FROM chat_session_locks WHERE session_id = ? AND token = ?", (session_id, token)
+                )
+
+    def _try_lock(self, conn, session_id, token):
+        # One short write: claims a free lock row, or takes over one whose holder let it expire
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT INTO chat_session_locks (session_id, token, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+            "WHERE chat_session_locks.expires_at < ?",
+            (session_id, token, now + self.lock_timeout, now)
+        )
+        return cursor.rowcount == 1
+
+    def get(self, session_id, default=None):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT payload, last_access FROM chat_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return default
+        payload, last_access = row
+        if now - last_access >= self.idle_ttl:
+            conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+            self._count("expired")
+            return default
+        conn.execute(
+            "UPDATE chat_sessions SET last_access = ? WHERE session_id = ?", (now, session_id)
+        )
+        return self.decode(payload)
+
+    def set(self, session_id, value):
+        conn = self._connection()
+        now = time.time()
+        payload = self.encode(value)
+        cursor = conn.execute(
+            "UPDATE chat_sessions SET payload = ?, last_access = ? WHERE session_id = ?",
+            (payload, now, session_id)
+        )
+        if cursor.rowcount == 0:
+            conn.execute(
+                "INSERT INTO chat_sessions (session_id, payload, last_access) VALUES (?, ?, ?)",
+                (session_id, payload, now)
+            )
+            self._count("created")
+        # Expiry and eviction run every so often rather than on every write
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        cursor = conn.execute(
+            "DELETE FROM chat_sessions WHERE last_access < ?", (now - self.idle_ttl,)
+        )
+        self._count("expired", max(cursor.rowcount, 0))
+        total = conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        if total > self.max_sessions:
+            cursor = conn.execute(
+                "DELETE FROM chat_sessions WHERE session_id IN ("
+                "SELECT session_id FROM chat_sessions ORDER BY last_access ASC LIMIT ?)",
+                (total - self.max_sessions,)
+            )
+            self._count("evicted_lru", max(cursor.rowcount, 0))
+
+    def delete(self, session_id):
+        cursor = self._connection().execute(
+            "DELETE FROM chat_sessions WHERE session_id = ?", (session_id,)
+        )
+        if cursor.rowcount:
+            self._count("deleted")
+        return cursor.rowcount > 0
+
+    def __len__(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM chat_sessions WHERE last_access >= ?",
+            (time.time() - self.idle_ttl,)
+        ).fetchone()[0]
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["backend"] = "sqlite"
+        stats["active_sessions"] = len(self)
+        stats["max_sessions"] = self.max_sessions
+        stats["idle_ttl_seconds"] = self.idle_ttl
+        return stats
+
+
+class RedisProtocolError(Exception):
+    """
+    Raised for error replies and malformed data from a Redis-protocol server.
+    """
+
+
+class RespConnection:
+    """
+    Minimal client for the Redis serialization protocol (RESP2). Supports
+    exactly what the session backend needs, so no Redis client library is
+    required; any RESP-speaking server (Redis, KeyDB, a test stand-in) works.
+    """
+
+    def __init__(self, host, port, db=0, password=None, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by Redis server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisProtocolError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisProtocolError(f"Unexpected reply: {line!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisSessionBackend(SessionBackend):
+    """
+    Session backend on a Redis-protocol server, shared by any number of
+    workers and hosts. Idle expiry uses Redis key TTLs (refreshed on every
+    access); size limits are left to the server's maxmemory policy
+    (allkeys-lru recommended). `locked()` takes a per-session lock key
+    with SET NX PX, so it holds across processes, and is re-entrant within
+    a thread.
+    """
+
+    def __init__(self, url=DEFAULT_REDIS_URL, idle_ttl=DEFAULT_IDLE_TTL, prefix="wander:session:",
+                 lock_timeout=30.0, encode=json_codec.dumps, decode=json_codec.loads):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.idle_ttl = idle_ttl
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.encode = encode
+        self.decode = decode
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"created": 0, "deleted": 0, "lock_waits": 0}
+
+    def _execute(self, *args):
+        # One connection per thread, reconnecting once if it went away
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = RespConnection(self.host, self.port, self.db, self.password)
+                self._local.conn = conn
+            try:
+                return conn.execute(*args)
+            except (ConnectionError, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def _key(self, session_id):
+        return f"{self.prefix}{session_id}"
+
+    @contextmanager
+    def locked(self, session_id):
+        """
+        Holds a server-side lock on session_id for the duration of the with-block.
+        Re-entrant within a thread.
+        """
+        lock_key = f"{self._key(session_id)}:lock"
+        held = getattr(self._local, "held", None)
+        if held is None:
+            held = self._local.held = {}  # session_id -> (token, depth) of locks this thread holds
+        if session_id in held:
+            token, depth = held[session_id]
+            held[session_id] = (token, depth + 1)
+        else:
+            token = uuid.uuid4().hex
+            ttl_ms = int(self.lock_timeout * 1000)
+            deadline = time.monotonic() + self.lock_timeout
+            while self._execute("SET", lock_key, token, "NX", "PX", ttl_ms) is None:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for session lock {session_id}")
+                with self._stats_lock:
+                    self._stats["lock_waits"] += 1
+                time.sleep(0.01)
+            held[session_id] = (token, 1)
+        try:
+            yield
+        finally:
+            token, depth = held[session_id]
+            if depth > 1:
+                held[session_id] = (token, depth - 1)
+            else:
+                del held[session_id]
+                # Only release the lock if it is still ours (it may have expired)
+                self._execute("EVAL", RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+    def get(self, session_id, default=None):
+        key = self._key(session_id)
+        payload = self._execute("GET", key)
+        if payload is None:
+            return default
+        self._execute("EXPIRE", key, int(self.idle_ttl))
+        return self.decode(payload.decode("utf-8"))
+
+    def set(self, session_id, value):
+        key = self._key(session_id)
+        is_new = self._execute("EXISTS", key) == 0
+        self._execute("SET", key, self.encode(value), "EX", int(self.idle_ttl))
+        if is_new:
+            with self._stats_lock:
+                self._stats["created"] += 1
+
+    def delete(self, session_id):
+        removed = self._execute("DEL", self._key(session_id))
+        if removed:
+            with self._stats_lock:
+                self._stats["deleted"] += 1
+        return removed > 0
+
+    def __len__(self):
+        # Walks the whole keyspace; stats() leaves it out so health probes stay cheap
+        count = 0
+        cursor = "0"
+        while True:
+            cursor, keys = self._execute("SCAN", cursor, "MATCH", f"{self.prefix}*", "COUNT", 1000)
+            cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+            count += sum(1 for key in keys if not key.endswith(b":lock"))
+            if cursor == "0":
+                return count
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["backend"] = "redis"
+        stats["server"] = f"{self.host}:{self.port}/{self.db}"
+        stats["idle_ttl_seconds"] = self.idle_ttl
+        return stats
+
+
+def create_session_backend(kind=None, size_of=None, encode=json_codec.dumps, decode=json_codec.loads):
+    """
+    Builds the session backend named by kind (or WANDER_SESSION_BACKEND):
+    "memory" (default, single process), "sqlite" (shared file) or "redis".
+    """
+    kind = (kind or os.environ.get("WANDER_SESSION_BACKEND", "memory")).lower()
+    if kind == "memory":
+        return SessionStore(size_of=size_of) if size_of else SessionStore()
+    if kind == "sqlite":
+        return SQLiteSessionBackend(encode=encode, decode=decode)
+    if kind == "redis":
+        return RedisSessionBackend(encode=encode, decode=decode)
+    raise ValueError(f"Unknown session backend: {kind}")
@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_IDLE_TTL = float(os.environ.get("WANDER_SESSION_IDLE_TTL", str(60 * 60)))
+DEFAULT_MAX_SESSIONS = int(os.environ.get("WANDER_MAX_SESSIONS", "50000"))
+DEFAULT_MAX_BYTES = int(os.environ.get("WANDER_SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Per-session locks are striped so memory stays constant however many sessions exist
+LOCK_STRIPES = 256
+
+
+class SessionBackend(ABC):
+    """
+    Interface for chat session storage. Implementations must support
+    get/set/delete plus a `locked(session_id)` context manager that
+    serializes read-modify-write cycles on one session; shared backends
+    must make that lock hold across processes.
+    """
+
+    @abstractmethod
+    def locked(self, session_id):
+        pass
+
+    @abstractmethod
+    def get(self, session_id, default=None):
+        pass
+
+    @abstractmethod
+    def set(self, session_id, value):
+        pass
+
+    @abstractmethod
+    def delete(self, session_id):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    @abstractmethod
+    def stats(self):
+        pass
+
+
+class SessionStore(SessionBackend):
+    """
+    Bounded in-memory store for chat sessions. Sessions idle for longer than
+    idle_ttl are dropped, and the least recently used sessions are evicted
+    when either the session count or the estimated total size exceeds its
+    cap. Callers serialize read-modify-write cycles on a session with
+    `with store.locked(session_id): ...`.
+    """
+
+    def __init__(self, idle_ttl=DEFAULT_IDLE_TTL, max_sessions=DEFAULT_MAX_SESSIONS,
+                 max_bytes=DEFAULT_MAX_BYTES, size_of=sys.getsizeof):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session_id -> (value, size, last_access), oldest first
+        self._total_bytes = 0
+        self._session_locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._stats = {
+            "created": 0,
+            "deleted": 0,
+            "expired": 0,
+            "evicted_lru": 0,
+            "evicted_memory": 0,
+        }
+
+    @contextmanager
+    def locked(self, session_id):
+        """
+        Holds the lock for session_id for the duration of the with-block.
+        """
+        lock = self._session_locks[hash(session_id) % LOCK_STRIPES]
+        with lock:
+            yield
+
+    def _drop(self, session_id, reason):
+        _, size, _ = self._sessions.pop(session_id)
+        self._total_bytes -= size
+        self._stats[reason] += 1
+
+    def _expire_idle(self, now):
+        # The OrderedDict is in access order, so idle sessions are at the front
+        while self._sessions:
+            session_id, (_, _, last_access) = next(iter(self._sessions.items()))
+            if now - last_access < self.idle_ttl:
+                break
+            self._drop(session_id, "expired")
+
+    def _enforce_limits(self, keep):
+        while len(self._sessions) > self.max_sessions:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest, "evicted_lru")
+        while self._total_bytes > self.max_bytes and len(self._sessions) > 1:
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest, "evicted_memory")
+
+    def get(self, session_id, default=None):
+        """
+        Returns the session value and marks it as recently used.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return default
+            value, size, _ = entry
+            self._sessions[session_id] = (value, size, now)
+            self._sessions.move_to_end(session_id)
+            return value
+
+    def set(self, session_id, value):
+        """
+        Stores the session value, evicting other sessions if limits are exceeded.
+        """
+        now = time.monotonic()
+        size = self.size_of(value)
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            if previous is None:
+                self._stats["created"] += 1
+            else:
+                self._total_bytes -= previous[1]
+            self._sessions[session_id] = (value, size, now)
+            self._total_bytes += size
+            self._expire_idle(now)
+            self._enforce_limits(keep=session_id)
+
+    def delete(self, session_id):
+        """
+        Removes a session. Returns True if it existed.
+        """
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id, "deleted")
+            return True
+
+    def __contains__(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return entry is not None and time.monotonic() - entry[2] < self.idle_ttl
+
+    def __len__(self):
+        with self._lock:
+            self._expire_idle(time.monotonic())
+            return len(self._sessions)
+
+    def stats(self):
+        """
+        Returns session counts, estimated memory use and eviction counters.
+        """
+        with self._lock:
+            self._expire_idle(time.monotonic())
+            stats = dict(self._stats)
+            stats["active_sessions"] = len(self._sessions)
+            stats["total_bytes"] = self._total_bytes
+            stats["max_sessions"] = self.max_sessions
+            stats["max_bytes"] = self.max_bytes
+            stats["idle_ttl_seconds"] = self.idle_ttl
+            return stats
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import Future
+
+import json_codec
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls. The first caller for a key becomes
+    the leader and does the work; callers arriving while it is in flight
+    wait on the leader's future and share its result. Futures are
+    thread-safe, so sync callers and asyncio callers (via
+    asyncio.wrap_future) can wait on the same leader. With copy_result,
+    each follower gets its own copy of the result (see share()).
+    """
+
+    def __init__(self, name, copy_result=None):
+        self.name = name
+        self.copy_result = copy_result
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future of the in-flight leader
+        self._stats = {"leaders": 0, "coalesced": 0, "leader_failures": 0}
+
+    def join(self, key):
+        """
+        Returns (future, is_leader). A leader must finish the call with
+        resolve() or fail(); followers wait on the future.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats["leaders"] += 1
+            return future, True
+
+    def _finish(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def resolve(self, key, future, result):
+        self._finish(key, future)
+        if not future.done():
+            future.set_result(result)
+
+    def fail(self, key, future, error):
+        self._finish(key, future)
+        with self._lock:
+            self._stats["leader_failures"] += 1
+        if not isinstance(error, Exception):
+            # A cancelled or interrupted leader must not cancel its followers
+            error = RuntimeError(f"{self.name} call for {key} was abandoned by its leader")
+        if not future.done():
+            future.set_exception(error)
+
+    def share(self, result):
+        """
+        Returns the leader's result as handed to one follower: a copy when
+        copy_result is set, so followers cannot change each other's data.
+        """
+        return self.copy_result(result) if self.copy_result is not None else result
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) unless an identical call is already in
+        flight, in which case its result (or exception) is returned instead.
+        """
+        future, is_leader = self.join(key)
+        if not is_leader:
+            return self.share(future.result())
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.fail(key, future, e)
+            raise
+        self.resolve(key, future, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+def copy_json(result):
+    """
+    Copies a JSON-compatible result the way the search cache does, through
+    its encoded form.
+    """
+    return json_codec.loads(json_codec.dumps(result))
+
+
+# Coalesces identical SerpApi searches across all request threads and event loops
+search_singleflight = SingleFlight("serpapi_search", copy_result=copy_json)
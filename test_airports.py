@@ -0,0 +1,137 @@
+import time
+from airports import AirportIndex, airport_index
+
+def test_lookup_and_prefix_search():
+    """
+    Test code lookup, city prefix lookup and finding a city in free text.
+    """
+    assert airport_index.get("jfk").city == "New York"
+    assert airport_index.city_for("BOM") == "Mumbai"
+    assert airport_index.city_for("ZZZ", "ZZZ") == "ZZZ"
+    # Busiest airport of a city first
+    assert airport_index.codes_for_city("London")[:2] == ["LHR", "LGW"]
+    assert airport_index.codes_for_city("san fran") == ["SFO"]
+    assert airport_index.find_city("Hilton Garden Inn Austin Downtown") == "Austin"
+    assert airport_index.find_city("Hotel Plaza") is None
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        airport_index.get("JFK")
+    per_lookup = (time.perf_counter() - start) / 10000
+    print(f"Code lookup: {per_lookup * 1e6:.2f} µs")
+    assert per_lookup < 0.0001
+    print("✅ SUCCESS: Airport lookups work")
+
+def test_resolve_fixes_chat_codes():
+    """
+    Test that chat-produced airport references are corrected or rejected.
+    """
+    assert airport_index.resolve("lhr") == "LHR"
+    assert airport_index.resolve("NYC") == "JFK"
+    assert airport_index.resolve("New York (EWR)") == "EWR"
+    assert airport_index.resolve("Paris, France") == "CDG"
+    assert airport_index.resolve("Barcellona") == "BCN"
+    assert airport_index.resolve("") is None
+    assert airport_index.resolve("not an airport") is None
+    # Small airports are searched as given, also next to a nearby city's hotels
+    assert airport_index.resolve("BUF") == "BUF"
+    assert airport_index.resolve("CHS", hint="Hotels in Charleston") == "CHS"
+    assert airport_index.resolve("HPN", hint="Hotels in New York") == "HPN"
+
+    # Unknown codes are rejected, unless the destination named elsewhere fixes them,
+    # and so are small airports far away from that destination
+    assert airport_index.resolve("XYZ") is None
+    assert airport_index.resolve("XYZ", hint="Hotels in Austin") == "AUS"
+    assert airport_index.resolve("INT") == "INT"
+    assert airport_index.resolve("INT", hint="Hotels in Austin") == "AUS"
+
+    # Lenient mode searches unknown codes as given, unless a destination is named
+    lenient = AirportIndex(validation="lenient")
+    assert lenient.resolve("XYZ") == "XYZ"
+    assert lenient.resolve("XYZ", hint="Hotels in Austin") == "AUS"
+    print("✅ SUCCESS: Chat airport codes are validated and fixed")
+
+def test_unknown_codes_skip_serpapi():
+    """
+    Test that a flight search for a place no airport matches never reaches SerpApi.
+    """
+    import main
+
+    def fail_if_called(*args, **kwargs):
+        raise AssertionError("SerpApi must not be called for an unknown airport")
+
+    original = main.serpapi_client.get
+    main.serpapi_client.get = fail_if_called
+    try:
+        result = main.search_google_flights("test-key", "2030-01-10", "2030-01-17", "Atlantis", "JFK")
+    finally:
+        main.serpapi_client.get = original
+    assert not main.is_real_flight_data(result)
+    print("✅ SUCCESS: Unknown airports are rejected before any SerpApi call")
+
+def test_small_airports_are_searched():
+    """
+    Test that a real airport without traffic figures in the dataset still reaches SerpApi.
+    """
+    import main
+
+    assert airport_index.get("BUF").passengers == 0
+    searched = []
+
+    def record_search(url, params=None, **kwargs):
+        searched.append((params["departure_id"], params["arrival_id"]))
+        raise ConnectionError("stand-in: no network in tests")
+
+    original = main.serpapi_client.get
+    main.serpapi_client.get = record_search
+    try:
+        main.search_google_flights("test-key", "2030-02-10", "2030-02-17", "BUF", "SAV")
+    finally:
+        main.serpapi_client.get = original
+    assert ("BUF", "SAV") in searched
+    print("✅ SUCCESS: Small airports are still searched")
+
+def test_kdtree_matches_brute_force():
+    """
+    Test that k-nearest queries agree with a brute-force scan, across the date line too.
+    """
+    import random
+    from geo_index import KDTree, haversine_km
+
+    rng = random.Random(7)
+    points = [(rng.uniform(-80, 80), rng.uniform(-180, 180), i) for i in range(500)]
+    tree = KDTree(points)
+    for lat, lon in [(0, 179.9), (51.5, -0.1), (-33.9, 151.2), (64, -22)] + [
+        (rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(50)
+    ]:
+        expected = sorted(points, key=lambda p: haversine_km(lat, lon, p[0], p[1]))[:5]
+        assert [item for item, _ in tree.nearest(lat, lon, 5)] == [p[2] for p in expected]
+        for _, distance in tree.nearest(lat, lon, 5, max_km=1000):
+            assert distance <= 1000
+    print("✅ SUCCESS: k-d tree nearest neighbours match a brute-force scan")
+
+def test_alternative_routes_stay_near_the_request():
+    """
+    Test that fallback routes use airports near the requested ones instead of fixed city pairs.
+    """
+    nearby = [airport.code for airport, _ in airport_index.nearby("JFK")]
+    assert set(nearby[:2]) == {"EWR", "LGA"}
+
+    routes = airport_index.alternative_routes("JFK", "LHR")
+    print(f"Alternatives for JFK-LHR: {routes}")
+    assert 0 < len(routes) <= 4 and ("JFK", "LHR") not in routes
+    for dep, arr in routes:
+        assert airport_index.city_for(dep) in ("New York", "Philadelphia")
+        assert airport_index.city_for(arr) == "London"
+
+    # Nothing to try around an unknown airport
+    assert airport_index.alternative_routes("XYZ", "CDG") == []
+    print("✅ SUCCESS: Fallback routes use nearby airports")
+
+if __name__ == "__main__":
+    test_lookup_and_prefix_search()
+    test_resolve_fixes_chat_codes()
+    test_unknown_codes_skip_serpapi()
+    test_small_airports_are_searched()
+    test_kdtree_matches_brute_force()
+    test_alternative_routes_stay_near_the_request()
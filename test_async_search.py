@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Keep the test's searches out of the real cache file
+os.environ.setdefault("WANDER_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "cache.sqlite3"))
+os.environ.setdefault("WANDER_RESULTS_DIR", tempfile.mkdtemp())
+# These tests measure concurrency, not the SerpApi rate limiter
+os.environ.setdefault("SERPAPI_KEY_RATE", "1000")
+os.environ.setdefault("SERPAPI_KEY_BURST", "1000")
+
+import main
+from serpapi_client import async_serpapi_client
+from result_views import flight_items
+
+RESPONSE_DELAY = 1.0
+upstream_requests = []
+
+with open('test_flight.json', 'r') as f:
+    FLIGHT_DATA = json.load(f)
+with open('test.json', 'r') as f:
+    HOTEL_DATA = json.load(f)
+
+class SerpApiStandIn(BaseHTTPRequestHandler):
+    """
+    Answers like SerpApi after a short delay, with the fixture payloads.
+    """
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        upstream_requests.append(params)
+        time.sleep(RESPONSE_DELAY)
+        payload = FLIGHT_DATA if params["engine"][0] == "google_flights" else HOTEL_DATA
+        if params.get("q") == ["Hotels in Atlantis"]:
+            payload = {"error": "Google Hotels hasn't returned any results for this query."}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SerpApiStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    main.SERPAPI_URL = f"http://127.0.0.1:{server.server_address[1]}/search.json"
+    return server
+
+def test_sync_and_async_match():
+    """
+    Test that the sync wrapper and the async search return the same data.
+    """
+    server = start_stand_in()
+    try:
+        sync_result = main.search_google_flights("test-key", "2030-01-10", "2030-01-17", "JFK", "BOM")
+        main.search_cache.clear()
+
+        async def run():
+            try:
+                return await main.search_google_flights_async("test-key", "2030-01-10", "2030-01-17", "JFK", "BOM")
+            finally:
+                await async_serpapi_client.aclose()
+
+        async_result = asyncio.run(run())
+        assert sync_result == async_result == FLIGHT_DATA
+        print("✅ SUCCESS: Sync and async flight searches agree")
+    finally:
+        server.shutdown()
+
+def test_async_searches_overlap():
+    """
+    Test that flight and hotel searches for several trips share one event loop concurrently.
+    """
+    server = start_stand_in()
+    try:
+        async def run():
+            try:
+                return await asyncio.gather(*[
+                    main.search_trip_async("test-key", f"2030-02-{day:02d}", f"2030-02-{day + 7:02d}",
+                                           "JFK", "BOM", "Hotels in Mumbai")
+                    for day in range(1, 6)
+                ])
+            finally:
+                await async_serpapi_client.aclose()
+
+        start = time.perf_counter()
+        trips = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        print(f"10 searches took {elapsed:.2f}s with a {RESPONSE_DELAY}s upstream delay each")
+        assert len(trips) == 5
+        assert all(flights == FLIGHT_DATA and hotels == HOTEL_DATA for flights, hotels in trips)
+        assert elapsed < RESPONSE_DELAY * 4
+        print("✅ SUCCESS: Async searches run concurrently")
+    finally:
+        server.shutdown()
+
+def test_batch_destinations():
+    """
+    Test that a batch search summarizes every destination under the concurrency limit.
+    """
+    server = start_stand_in()
+    try:
+        destinations = [
+            {
+                "name": f"Mumbai {i}",
+                "departure_airport_code": "JFK",
+                "arrival_airport_code": "BOM",
+                "departure_date": f"2030-03-{i + 1:02d}",
+                "arrival_date": f"2030-03-{i + 8:02d}",
+                "Hotel_code": "Hotels in Mumbai"
+            }
+            for i in range(4)
+        ] + [{"name": "Nowhere"}]
+
+        start = time.perf_counter()
+        summaries = asyncio.run(main.search_destinations_async(destinations, "test-key", concurrency=2))
+        elapsed = time.perf_counter() - start
+        print(f"Batch of {len(destinations)} destinations took {elapsed:.2f}s")
+
+        assert [s['name'] for s in summaries] == [d['name'] for d in destinations]
+        assert summaries[-1]['status'] == 'error'
+        first = summaries[0]
+        assert first['status'] == 'success' and first['nights'] == 7
+        cheapest_price = min(f.price for f in flight_items(FLIGHT_DATA))
+        assert first['cheapest_flight']['price'] == cheapest_price
+        assert first['cheapest_hotel']['rating'] >= 4.0
+        assert first['estimated_total'] == cheapest_price + first['cheapest_hotel']['rate'] * 7
+        assert not first['mock_flight_data'] and not first['mock_hotel_data']
+        # Two destinations at a time: two rounds of upstream delay, not four
+        assert elapsed < RESPONSE_DELAY * 4
+
+        # Mock hotel prices are flagged and never produce a total to rank on
+        mocked = asyncio.run(main.search_destinations_async([{
+            "name": "Atlantis",
+            "departure_airport_code": "JFK",
+            "arrival_airport_code": "BOM",
+            "departure_date": "2030-03-01",
+            "arrival_date": "2030-03-08",
+            "Hotel_code": "Hotels in Atlantis"
+        }], "test-key"))[0]
+        assert mocked['status'] == 'success' and mocked['mock_hotel_data']
+        assert mocked['estimated_total'] is None
+        print("✅ SUCCESS: Batch search summarizes each destination")
+    finally:
+        server.shutdown()
+
+def test_identical_searches_coalesce():
+    """
+    Test that identical searches in flight at the same time, sync and async,
+    reach SerpApi only once.
+    """
+    server = start_stand_in()
+    try:
+        upstream_requests.clear()
+        search = ("test-key", "2030-04-01", "2030-04-08", "JFK", "BOM")
+        sync_results = []
+        threads = [
+            threading.Thread(target=lambda: sync_results.append(main.search_google_flights(*search)))
+            for _ in range(3)
+        ]
+        for t in threads:
+            t.start()
+
+        async def run():
+            try:
+                return await asyncio.gather(*[main.search_google_flights_async(*search) for _ in range(3)])
+            finally:
+                await async_serpapi_client.aclose()
+
+        async_results = asyncio.run(run())
+        for t in threads:
+            t.join()
+
+        print(f"6 identical searches made {len(upstream_requests)} upstream request(s)")
+        assert len(upstream_requests) == 1
+        assert all(result == FLIGHT_DATA for result in sync_results + async_results)
+        print("✅ SUCCESS: Identical in-flight searches are coalesced")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_sync_and_async_match()
+    test_async_searches_overlap()
+    test_batch_destinations()
+    test_identical_searches_coalesce()
@@ -0,0 +1,45 @@
+from chat_prompt import ChatTurn, build_chat_contents, extract_slots, estimate_tokens
+
+def test_extract_slots():
+    """
+    Test that travel details are captured from free-form user messages.
+    """
+    slots = extract_slots("I want to fly from LAX to CDG from 2025-06-01 to 2025-06-10 for 2 travelers")
+    slots = extract_slots("I love museums, food and some hiking. My budget is $3,000", slots)
+    print(f"Captured slots: {slots}")
+    assert slots["origin"] == "LAX" and slots["destination"] == "CDG"
+    assert slots["departure_date"] == "2025-06-01" and slots["return_date"] == "2025-06-10"
+    assert slots["travelers"] == "2"
+    assert "$3,000" in slots["budget"]
+    assert slots["interests"] == ["food", "hiking", "museums"]
+    print("✅ SUCCESS: Slots extracted")
+
+def test_prompt_size_stays_flat():
+    """
+    Test that the chat contents stop growing once older turns are
+    replaced by the slot summary.
+    """
+    turns = []
+    slots = {}
+    sizes = []
+    for index in range(30):
+        message = f"Turn {index}: I like beach and culture, flying from JFK to LIS. " + "details " * 20
+        slots = extract_slots(message, slots)
+        turns.append(ChatTurn("user", message))
+        contents = build_chat_contents(turns, slots, max_recent_turns=4, token_budget=400)
+        prompt = "\n".join(part for content in contents for part in content["parts"])
+        sizes.append(estimate_tokens(prompt))
+        turns.append(ChatTurn("model", "Great, tell me more. " * 10))
+
+    print(f"Prompt token estimates: first={sizes[0]}, 10th={sizes[9]}, last={sizes[-1]}")
+    assert abs(sizes[-1] - sizes[9]) <= 2
+    assert "earlier messages omitted" in prompt and "Origin: JFK" in prompt
+    # Contents are role-tagged, open with a user turn and end with the pending message
+    assert contents[0]["role"] == "user" and contents[-1]["role"] == "user"
+    assert [content["role"] for content in contents] == ["user", "model", "user", "model", "user"][-len(contents):]
+    assert "Turn 29" in prompt and "Turn 0:" not in prompt
+    print("✅ SUCCESS: Late turns cost the same as early ones")
+
+if __name__ == "__main__":
+    test_extract_slots()
+    test_prompt_size_stays_flat()
@@ -0,0 +1,150 @@
+import os
+import tempfile
+
+# Keep the test's searches and results out of the real files
+os.environ.setdefault("WANDER_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "cache.sqlite3"))
+os.environ.setdefault("WANDER_RESULTS_DIR", tempfile.mkdtemp())
+
+import json_codec
+import server
+from gemini_client import GeminiClientManager
+
+def parse_sse(body):
+    """
+    Splits a text/event-stream body into (event, data) tuples.
+    """
+    events = []
+    for message in body.split("\n\n"):
+        if not message:
+            continue
+        lines = message.split("\n")
+        assert lines[0].startswith("event: ") and lines[1].startswith("data: ")
+        events.append((lines[0][len("event: "):], json_codec.loads(lines[1][len("data: "):])))
+    return events
+
+def fake_stream(*chunks, error=None):
+    """
+    Returns a stand-in for gemini_manager.generate_stream that yields the
+    given chunks, then raises error if one is given. Records whether the
+    stream was closed early.
+    """
+    state = {"closed": False}
+
+    def generate_stream(contents, system_instruction=None):
+        try:
+            for chunk in chunks:
+                yield chunk
+            if error is not None:
+                raise error
+        except GeneratorExit:
+            state["closed"] = True
+            raise
+
+    return generate_stream, state
+
+def roles(session_id):
+    return [turn.role for turn in server.conversation_histories.get(session_id)['turns']]
+
+def stream_chat(client, session_id, generate_stream, buffered=True):
+    original = server.gemini_manager.generate_stream
+    server.gemini_manager.generate_stream = generate_stream
+    try:
+        return client.post('/api/chat/stream', json={'message': 'Hi there', 'sessionId': session_id},
+                           buffered=buffered)
+    finally:
+        server.gemini_manager.generate_stream = original
+
+def test_stream_framing():
+    """
+    Test that a chat stream sends one delta event per chunk and a final done
+    event, and records the full reply in the history.
+    """
+    client = server.app.test_client()
+    generate_stream, _ = fake_stream("Where would ", "you like to go?")
+    response = stream_chat(client, "stream-ok", generate_stream)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in response.headers
+
+    events = parse_sse(response.get_data(as_text=True))
+    assert [event for event, _ in events] == ['delta', 'delta', 'done']
+    assert events[0][1] == {'text': 'Where would '}
+    assert events[-1][1]['response'] == 'Where would you like to go?'
+    assert events[-1][1]['isRecommendation'] is False
+    assert roles("stream-ok") == ['user', 'model']
+    print("✅ SUCCESS: Chat stream events are framed correctly")
+
+def test_stream_error_event():
+    """
+    Test that a failing stream ends with an error event, keeps the partial
+    reply, and drops the user turn when nothing was generated.
+    """
+    client = server.app.test_client()
+    generate_stream, _ = fake_stream("Half a ", error=RuntimeError("quota exceeded"))
+    events = parse_sse(stream_chat(client, "stream-partial", generate_stream).get_data(as_text=True))
+    assert events == [('delta', {'text': 'Half a '}), ('error', {'error': 'quota exceeded'})]
+    assert roles("stream-partial") == ['user', 'model']
+    assert server.conversation_histories.get("stream-partial")['turns'][-1].text == 'Half a'
+
+    # A second failure with no text leaves the history as it was
+    generate_stream, _ = fake_stream(error=RuntimeError("quota exceeded"))
+    events = parse_sse(stream_chat(client, "stream-partial", generate_stream).get_data(as_text=True))
+    assert [event for event, _ in events] == ['error']
+    assert roles("stream-partial") == ['user', 'model']
+    print("✅ SUCCESS: Failed streams send an error event and keep the history consistent")
+
+def test_stream_client_disconnect():
+    """
+    Test that a client going away mid-stream closes the Gemini stream and
+    keeps what was generated as the reply.
+    """
+    client = server.app.test_client()
+    generate_stream, state = fake_stream("First part. ", "Second part.", "Never sent.")
+    response = stream_chat(client, "stream-gone", generate_stream, buffered=False)
+    body = iter(response.response)
+    assert next(body).startswith(b"event: delta")
+    response.close()
+
+    assert state["closed"]
+    assert roles("stream-gone") == ['user', 'model']
+    assert server.conversation_histories.get("stream-gone")['turns'][-1].text == 'First part.'
+
+    # The next message starts a normal turn after the partial reply
+    generate_stream, _ = fake_stream("Welcome back.")
+    stream_chat(client, "stream-gone", generate_stream).get_data()
+    assert roles("stream-gone") == ['user', 'model', 'user', 'model']
+    print("✅ SUCCESS: Disconnected streams are closed and recorded")
+
+class FakeChunk:
+    def __init__(self, text=None):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            # What the SDK raises for a chunk without parts
+            raise ValueError("The `response.text` quick accessor only works when the response contains a valid `Part`")
+        return self._text
+
+class FakeModel:
+    def generate_content(self, prompt, stream=False, **kwargs):
+        return [FakeChunk("Hello"), FakeChunk(None), FakeChunk(" world")]
+
+def test_chunks_without_text():
+    """
+    Test that chunks without parts are skipped instead of failing the stream.
+    """
+    manager = GeminiClientManager(api_key="test-key", max_concurrency=1)
+    manager._configured = True
+    manager._models[(manager.model_name, None)] = FakeModel()
+    assert list(manager.generate_stream("Hi")) == ["Hello", " world"]
+    stats = manager.stats()
+    assert stats["errors"] == 0 and stats["in_flight"] == 0
+    print("✅ SUCCESS: Chunks without text are skipped")
+
+if __name__ == "__main__":
+    test_stream_framing()
+    test_stream_error_event()
+    test_stream_client_disconnect()
+    test_chunks_without_text()
@@ -0,0 +1,84 @@
+import time
+from circuit_breaker import CircuitBreaker, NegativeCache, CLOSED, OPEN, HALF_OPEN
+
+def test_circuit_breaker():
+    """
+    Test that a route circuit opens after repeated failures, lets a single
+    trial through after the reset timeout and closes again on success.
+    """
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    route = "INT-INT"
+
+    assert breaker.allow(route)
+    breaker.record_failure(route)
+    assert breaker.state(route) == CLOSED
+    breaker.record_failure(route)
+    assert breaker.state(route) == OPEN
+    assert not breaker.allow(route)
+    print(f"Breaker stats while open: {breaker.stats()}")
+
+    time.sleep(0.06)
+    # Only one trial call is allowed while half-open
+    assert breaker.allow(route)
+    assert breaker.state(route) == HALF_OPEN
+    assert not breaker.allow(route)
+
+    # A failed trial re-opens the circuit, a successful one closes it
+    breaker.record_failure(route)
+    assert breaker.state(route) == OPEN
+    time.sleep(0.06)
+    assert breaker.allow(route)
+    breaker.record_success(route)
+    assert breaker.state(route) == CLOSED
+    print("✅ SUCCESS: Circuit breaker transitions are correct")
+
+def test_abandoned_trial():
+    """
+    Test that a half-open trial that never reports back is released or
+    expires after the reset timeout, so the circuit cannot stay half-open.
+    """
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    route = "JFK-BOM"
+    breaker.record_failure(route)
+    time.sleep(0.06)
+    assert breaker.allow(route)
+    assert not breaker.allow(route)
+
+    # Released without an outcome: the next call gets the trial
+    breaker.release(route)
+    assert breaker.allow(route)
+    assert not breaker.allow(route)
+
+    # Never reported at all: the trial expires after reset_timeout
+    time.sleep(0.06)
+    assert breaker.allow(route)
+    assert breaker.state(route) == HALF_OPEN
+
+    # Releasing a closed circuit does nothing
+    breaker.record_success(route)
+    breaker.release(route)
+    assert breaker.state(route) == CLOSED
+    print("✅ SUCCESS: Abandoned half-open trials are handed back")
+
+def test_negative_cache():
+    """
+    Test that rejected routes are remembered only for the configured TTL.
+    """
+    cache = NegativeCache(ttl=0.05, max_entries=2)
+    cache.add("INT-INT", "Unsupported departure_id")
+    assert cache.get("INT-INT") == "Unsupported departure_id"
+    assert cache.get("LAX-JFK") is None
+
+    # The cache never grows past max_entries
+    cache.add("A-B", "bad")
+    cache.add("C-D", "bad")
+    assert cache.stats()["entries"] == 2
+
+    time.sleep(0.06)
+    assert cache.get("C-D") is None
+    print("✅ SUCCESS: Negative cache expires entries")
+
+if __name__ == "__main__":
+    test_circuit_breaker()
+    test_abandoned_trial()
+    test_negative_cache()
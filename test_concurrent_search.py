@@ -0,0 +1,195 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+# Keep the test's searches out of the real cache and result files
+os.environ.setdefault("WANDER_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "cache.sqlite3"))
+os.environ.setdefault("WANDER_RESULTS_DIR", tempfile.mkdtemp())
+
+import main
+from result_store import result_store
+
+SEARCH_DELAY = 0.5
+
+def real_flights(departure_id, arrival_id):
+    return {
+        "search_metadata": {"id": f"{departure_id}-{arrival_id}"},
+        "best_flights": [{"price": 100, "flights": []}]
+    }
+
+def mock_flights(departure_id, arrival_id):
+    return {"search_metadata": {"id": "mock_search_id"}, "best_flights": []}
+
+def real_hotels(hotel_query):
+    return {"search_metadata": {"id": hotel_query}, "properties": [{"name": "Stand-in Hotel"}]}
+
+def test_race_first_success_wins():
+    """
+    Test that the first route with real data wins and routes that have not
+    started by then are cancelled.
+    """
+    started = []
+    lock = threading.Lock()
+
+    def fake_search(api_key, outbound_date, return_date, departure_id, arrival_id):
+        with lock:
+            started.append(departure_id)
+        if departure_id == "FAST":
+            time.sleep(0.05)
+            return real_flights(departure_id, arrival_id)
+        if departure_id == "MOCK":
+            return mock_flights(departure_id, arrival_id)
+        time.sleep(SEARCH_DELAY)
+        return real_flights(departure_id, arrival_id)
+
+    # More slow routes than search workers, so some are still queued when FAST wins
+    routes = [("MOCK", "BOM"), ("FAST", "BOM")] + [(f"SLOW{i}", "BOM") for i in range(main.SEARCH_WORKERS + 2)]
+    original = main.search_google_flights
+    main.search_google_flights = fake_search
+    try:
+        start = time.perf_counter()
+        result = main.race_alternative_routes("test-key", "2030-01-10", "2030-01-17", routes)
+        elapsed = time.perf_counter() - start
+        assert result["search_metadata"]["id"] == "FAST-BOM"
+        assert elapsed < SEARCH_DELAY
+        # Wait for the searches already in flight; the queued ones never run
+        time.sleep(SEARCH_DELAY * 2)
+        print(f"{len(started)} of {len(routes)} routes started before the race was decided")
+        assert len(started) < len(routes)
+    finally:
+        main.search_google_flights = original
+    print("✅ SUCCESS: First real route wins and queued routes are cancelled")
+
+def test_race_all_fail():
+    """
+    Test that the race returns None when every route fails or returns mock data.
+    """
+    def fake_search(api_key, outbound_date, return_date, departure_id, arrival_id):
+        if departure_id == "ERR":
+            raise RuntimeError("upstream unavailable")
+        return mock_flights(departure_id, arrival_id)
+
+    original = main.search_google_flights
+    main.search_google_flights = fake_search
+    try:
+        routes = [("ERR", "BOM"), ("MOCK", "BOM"), ("MOCK", "DEL")]
+        assert main.race_alternative_routes("test-key", "2030-01-10", "2030-01-17", routes) is None
+    finally:
+        main.search_google_flights = original
+    print("✅ SUCCESS: Race returns None when every route fails")
+
+def test_async_race_cancels_losers():
+    """
+    Test that the async race returns the first real result, cancels the
+    routes still running and returns None when every route fails.
+    """
+    cancelled = []
+
+    async def fake_search(api_key, outbound_date, return_date, departure_id, arrival_id):
+        try:
+            if departure_id == "FAST":
+                await asyncio.sleep(0.05)
+                return real_flights(departure_id, arrival_id)
+            if departure_id == "ERR":
+                raise RuntimeError("upstream unavailable")
+            if departure_id == "MOCK":
+                return mock_flights(departure_id, arrival_id)
+            await asyncio.sleep(SEARCH_DELAY)
+            return real_flights(departure_id, arrival_id)
+        except asyncio.CancelledError:
+            cancelled.append(departure_id)
+            raise
+
+    original = main.search_google_flights_async
+    main.search_google_flights_async = fake_search
+    try:
+        async def run():
+            won = await main.race_alternative_routes_async(
+                "test-key", "2030-01-10", "2030-01-17",
+                [("SLOW1", "BOM"), ("ERR", "BOM"), ("FAST", "BOM"), ("SLOW2", "BOM")]
+            )
+            # Let the cancellations be delivered
+            await asyncio.sleep(0)
+            lost = await main.race_alternative_routes_async(
+                "test-key", "2030-01-10", "2030-01-17", [("ERR", "BOM"), ("MOCK", "BOM")]
+            )
+            return won, lost
+
+        won, lost = asyncio.run(run())
+        assert won["search_metadata"]["id"] == "FAST-BOM"
+        assert sorted(cancelled) == ["SLOW1", "SLOW2"]
+        assert lost is None
+    finally:
+        main.search_google_flights_async = original
+    print("✅ SUCCESS: Async race cancels the losing routes")
+
+def test_cancelled_search_releases_breaker_trials():
+    """
+    Test that a flight search cancelled while its half-open trial is in
+    flight hands the trial back to both circuit breakers.
+    """
+    route_key = "JFK-BOM"
+    main.search_cache.clear()
+    for breaker, key in ((main.engine_breaker, "google_flights"), (main.route_breaker, route_key)):
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure(key)
+        # Skip the reset timeout
+        breaker._circuits[key]["opened_at"] -= breaker.reset_timeout
+    try:
+        steps = main.flight_search_steps("test-key", "2030-01-10", "2030-01-17", "JFK", "BOM")
+        params = next(steps)
+        assert params["engine"] == "google_flights"
+        assert main.engine_breaker.state("google_flights") == main.route_breaker.state(route_key) == "half_open"
+        assert not main.route_breaker.allow(route_key)
+
+        # Cancelled mid-request: the driver closes the generator
+        steps.close()
+        assert main.engine_breaker.allow("google_flights")
+        assert main.route_breaker.allow(route_key)
+    finally:
+        main.engine_breaker.record_success("google_flights")
+        main.route_breaker.record_success(route_key)
+    print("✅ SUCCESS: Cancelled searches hand back their breaker trials")
+
+def test_hotel_search_runs_alongside_flights():
+    """
+    Test that process_user_selection searches hotels while flights are being
+    searched and stores both under one search id.
+    """
+    def fake_flights(api_key, outbound_date, return_date, departure_id, arrival_id):
+        time.sleep(SEARCH_DELAY)
+        return real_flights(departure_id, arrival_id)
+
+    def fake_hotels(api_key, check_in_date, check_out_date, hotel_query):
+        time.sleep(SEARCH_DELAY)
+        return real_hotels(hotel_query)
+
+    originals = main.search_google_flights, main.search_google_hotels
+    main.search_google_flights, main.search_google_hotels = fake_flights, fake_hotels
+    try:
+        start = time.perf_counter()
+        search_id = main.process_user_selection({
+            "departure_id": "JFK",
+            "arrival_id": "BOM",
+            "outbound_date": "2030-01-10",
+            "return_date": "2030-01-17",
+            "hotel_query": "Hotels in Mumbai"
+        }, "test-key")
+        elapsed = time.perf_counter() - start
+        print(f"Flight and hotel searches took {elapsed:.2f}s with a {SEARCH_DELAY}s delay each")
+        assert search_id
+        assert elapsed < SEARCH_DELAY * 2
+        assert result_store.load('flights', search_id)["search_metadata"]["id"] == "JFK-BOM"
+        assert result_store.load('hotels', search_id)["properties"][0]["name"] == "Stand-in Hotel"
+    finally:
+        main.search_google_flights, main.search_google_hotels = originals
+    print("✅ SUCCESS: Hotel search runs alongside the flight search")
+
+if __name__ == "__main__":
+    test_race_first_success_wins()
+    test_race_all_fail()
+    test_async_race_cancels_losers()
+    test_cancelled_search_releases_breaker_trials()
+    test_hotel_search_runs_alongside_flights()
@@ -0,0 +1,123 @@
+import importlib.util
+import os
+import signal
+import tempfile
+import time
+
+# Keep the test's searches and results out of the real files
+os.environ.setdefault("WANDER_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "cache.sqlite3"))
+os.environ.setdefault("WANDER_RESULTS_DIR", tempfile.mkdtemp())
+
+import server
+from readiness import readiness
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")
+
+def load_config(**env):
+    """
+    Loads gunicorn.conf.py as gunicorn would, with the given environment
+    variables set (None removes one). Returns the config module and the
+    environment it left behind; the process environment is restored.
+    """
+    saved = dict(os.environ)
+    try:
+        for name, value in env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", CONFIG_PATH)
+        config = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(config)
+        return config, dict(os.environ)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+class FakeLog:
+    def info(self, *args):
+        pass
+
+    def warning(self, *args):
+        pass
+
+class FakeWorker:
+    pid = 12345
+    log = FakeLog()
+
+def test_config_defaults():
+    """
+    Test that several workers default to the shared SQLite session backend,
+    while a single worker or an explicit choice is left alone.
+    """
+    config, env = load_config(WANDER_WORKERS="4", WANDER_SESSION_BACKEND=None)
+    assert config.workers == 4 and config.worker_class == "gthread"
+    assert env["WANDER_SESSION_BACKEND"] == "sqlite"
+
+    config, env = load_config(WANDER_WORKERS="1", WANDER_SESSION_BACKEND=None)
+    assert "WANDER_SESSION_BACKEND" not in env
+
+    config, env = load_config(WANDER_WORKERS="4", WANDER_SESSION_BACKEND="redis")
+    assert env["WANDER_SESSION_BACKEND"] == "redis"
+
+    config, env = load_config(WANDER_WORKERS=None, WANDER_DRAIN_DELAY="2.5", WANDER_GRACEFUL_TIMEOUT="30")
+    assert 1 <= config.workers <= 8
+    assert config.drain_delay == 2.5 and config.graceful_timeout == 30
+    print("✅ SUCCESS: Gunicorn config defaults are safe for several workers")
+
+def test_drain_handler():
+    """
+    Test that SIGTERM marks the worker as draining right away and hands over
+    to gunicorn's own handler after the drain delay.
+    """
+    config, _ = load_config(WANDER_DRAIN_DELAY="0.1")
+    calls = []
+    original = signal.signal(signal.SIGTERM, lambda signum, frame: calls.append(signum))
+    try:
+        config.install_drain_handler(FakeWorker())
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        assert readiness.draining
+        assert calls == []
+        time.sleep(0.3)
+        assert calls == [signal.SIGTERM]
+    finally:
+        signal.signal(signal.SIGTERM, original)
+        readiness._draining = False
+
+    config.worker_int(FakeWorker())
+    assert readiness.draining
+    readiness._draining = False
+    print("✅ SUCCESS: SIGTERM drains before stopping the worker")
+
+def test_ready_endpoint():
+    """
+    Test that /api/ready reports not_ready while a check fails, ready once
+    they pass and draining after a shutdown began.
+    """
+    client = server.app.test_client()
+    original_key = server.gemini_manager.api_key
+    try:
+        server.gemini_manager.api_key = "ENTER_YOU_API_KEY"
+        response = client.get('/api/ready')
+        assert response.status_code == 503
+        body = response.get_json()
+        assert body['status'] == 'not_ready'
+        assert not body['checks']['gemini_api_key']['ok']
+        assert body['checks']['session_backend']['ok']
+
+        server.gemini_manager.api_key = "test-key"
+        response = client.get('/api/ready')
+        assert response.status_code == 200 and response.get_json()['status'] == 'ready'
+
+        readiness.begin_drain()
+        response = client.get('/api/ready')
+        assert response.status_code == 503 and response.get_json()['status'] == 'draining'
+    finally:
+        server.gemini_manager.api_key = original_key
+        readiness._draining = False
+    print("✅ SUCCESS: Readiness probe reports ready, not_ready and draining")
+
+if __name__ == "__main__":
+    test_config_defaults()
+    test_drain_handler()
+    test_ready_endpoint()
@@ -0,0 +1,66 @@
+import gzip
+import json
+from flask import Flask, request
+from http_responses import cached_json_response, compress_response
+
+app = Flask(__name__)
+
+def test_etag_and_not_modified():
+    """
+    Test that identical content gets the same strong ETag and a matching
+    If-None-Match (plain or compressed variant) yields 304.
+    """
+    payload = {'status': 'success', 'items': list(range(100))}
+    with app.test_request_context('/'):
+        first = cached_json_response(payload, request)
+    etag, weak = first.get_etag()
+    assert first.status_code == 200 and not weak
+
+    for tag in (etag, f"{etag}-gzip"):
+        with app.test_request_context('/', headers={'If-None-Match': f'"{tag}"'}):
+            repeat = cached_json_response(payload, request)
+        assert repeat.status_code == 304
+        assert repeat.get_data() == b''
+    print("✅ SUCCESS: ETags validate repeat requests")
+
+def test_gzip_threshold():
+    """
+    Test that large JSON bodies are gzipped and small ones are left alone.
+    """
+    large = {'hotels': [{'name': f'Hotel {i}', 'rate': i} for i in range(500)]}
+    with app.test_request_context('/', headers={'Accept-Encoding': 'gzip'}):
+        response = compress_response(cached_json_response(large, request), request)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.get_data())) == large
+        assert response.get_etag()[0].endswith('-gzip')
+        print(f"Compressed {len(json.dumps(large))} bytes to {len(response.get_data())}")
+
+        small = compress_response(cached_json_response({'ok': True}, request), request)
+        assert 'Content-Encoding' not in small.headers
+
+    with app.test_request_context('/'):
+        plain = compress_response(cached_json_response(large, request), request)
+        assert 'Content-Encoding' not in plain.headers
+    print("✅ SUCCESS: Compression respects Accept-Encoding and size threshold")
+
+def test_not_modified_repeats_encoded_etag():
+    """
+    Test that a 304 carries the same ETag as the compressed 200 the client cached.
+    """
+    large = {'hotels': [{'name': f'Hotel {i}', 'rate': i} for i in range(500)]}
+    with app.test_request_context('/', headers={'Accept-Encoding': 'gzip'}):
+        cached = compress_response(cached_json_response(large, request), request)
+    etag = cached.get_etag()[0]
+
+    with app.test_request_context('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'}):
+        repeat = compress_response(cached_json_response(large, request), request)
+    assert repeat.status_code == 304
+    assert repeat.get_etag()[0] == etag
+    assert 'Accept-Encoding' in repeat.vary
+    print(f"304 validator: {repeat.headers['ETag']}")
+    print("✅ SUCCESS: 304 responses repeat the encoded ETag")
+
+if __name__ == "__main__":
+    test_etag_and_not_modified()
+    test_gzip_threshold()
+    test_not_modified_repeats_encoded_etag()
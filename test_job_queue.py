@@ -0,0 +1,131 @@
+import tempfile
+import threading
+import time
+from result_store import ResultStore
+from job_queue import JobQueue, QueueFull, SUCCEEDED, FAILED, CANCELLED, RUNNING
+
+def make_queue(**kwargs):
+    return JobQueue(store=ResultStore(root_dir=tempfile.mkdtemp()), **kwargs)
+
+def test_priority_order_and_long_poll():
+    """
+    Test that higher-priority jobs run first and a long poll returns once the job finishes.
+    """
+    jobs = make_queue(workers=1)
+    order = []
+    gate = threading.Event()
+    busy = threading.Event()
+
+    def block():
+        busy.set()
+        gate.wait()
+
+    # Occupy the single worker so the next jobs queue up behind it
+    blocker = jobs.submit('test', block)
+    busy.wait(5)
+    low = jobs.submit('test', order.append, 'low', priority=9)
+    high = jobs.submit('test', order.append, 'high', priority=0)
+    assert jobs.stats()['queued'] == 2
+
+    gate.set()
+    status = jobs.wait(low.job_id, since='queued', timeout=5)
+    status = jobs.wait(low.job_id, since=status['status'], timeout=5)
+    assert status['status'] == SUCCEEDED
+    assert order == ['high', 'low']
+    assert jobs.get(blocker.job_id)['status'] == SUCCEEDED
+    print(f"Job queue stats: {jobs.stats()}")
+    print("✅ SUCCESS: Jobs run in priority order and long polls wake up")
+
+def test_cancel_and_failure():
+    """
+    Test cancelling queued and running jobs, and that exceptions mark a job failed.
+    """
+    jobs = make_queue(workers=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+        return {'itinerary_id': 'x'}
+
+    running = jobs.submit('test', slow)
+    queued = jobs.submit('test', lambda: 'never runs')
+    started.wait(5)
+    assert jobs.get(running.job_id)['status'] == RUNNING
+
+    assert jobs.cancel(queued.job_id)['status'] == CANCELLED
+    assert jobs.cancel(running.job_id)['cancel_requested']
+    release.set()
+    status = jobs.wait(running.job_id, since=RUNNING, timeout=5)
+    assert status['status'] == CANCELLED and status['result'] is None
+
+    def broken():
+        raise ValueError("Gemini unavailable")
+    failed = jobs.submit('test', broken)
+    status = jobs.wait(failed.job_id, since='queued', timeout=5)
+    if status['status'] == RUNNING:
+        status = jobs.wait(failed.job_id, since=RUNNING, timeout=5)
+    assert status['status'] == FAILED and 'Gemini unavailable' in status['error']
+
+    # Another process only sees the persisted status
+    other = JobQueue(store=jobs.store)
+    assert other.get(failed.job_id)['status'] == FAILED
+    print("✅ SUCCESS: Jobs can be cancelled and failures are reported")
+
+def test_queue_bound():
+    """
+    Test that submissions beyond max_queued are rejected.
+    """
+    jobs = make_queue(workers=1, max_queued=1)
+    gate = threading.Event()
+    jobs.submit('test', gate.wait)
+    time.sleep(0.1)
+    jobs.submit('test', gate.wait)
+    try:
+        jobs.submit('test', gate.wait)
+        assert False, "queue should be full"
+    except QueueFull:
+        pass
+    gate.set()
+    jobs.shutdown(wait=True)
+    print("✅ SUCCESS: Job queue is bounded")
+
+def test_cancelled_jobs_free_their_slot():
+    """
+    Test that cancelled jobs stop counting toward max_queued and that a
+    running job body can see its cancellation.
+    """
+    jobs = make_queue(workers=1, max_queued=1)
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def slow():
+        started.set()
+        release.wait()
+        seen.append(jobs.cancel_requested())
+
+    running = jobs.submit('test', slow)
+    started.wait(5)
+    waiting = jobs.submit('test', lambda: None)
+    jobs.cancel(waiting.job_id)
+    replacement = jobs.submit('test', lambda: 'ran')
+    assert jobs.stats()['queued'] == 1
+
+    jobs.cancel(running.job_id)
+    release.set()
+    status = jobs.wait(replacement.job_id, since='queued', timeout=5)
+    if status['status'] == RUNNING:
+        status = jobs.wait(replacement.job_id, since=RUNNING, timeout=5)
+    assert status['status'] == SUCCEEDED and status['result'] == 'ran'
+    assert seen == [True]
+    assert jobs.get(running.job_id)['status'] == CANCELLED
+    assert jobs.shutdown(wait=True, timeout=5)
+    print("✅ SUCCESS: Cancelled jobs free their place in the queue")
+
+if __name__ == "__main__":
+    test_priority_order_and_long_poll()
+    test_cancel_and_failure()
+    test_queue_bound()
+    test_cancelled_jobs_free_their_slot()
@@ -0,0 +1,50 @@
+import importlib
+import json
+import os
+import json_codec
+
+def test_round_trip_matches_stdlib():
+    """
+    Test that the selected backend parses and writes the same data as the standard library.
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_flight.json"), "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+    print(f"JSON backend: {json_codec.BACKEND}")
+
+    assert json_codec.loads(raw) == data
+    assert json_codec.loads(raw.decode("utf-8")) == data
+    assert json.loads(json_codec.dumps_bytes(data)) == data
+    # Compact output has no indentation; pretty output does
+    assert "\n" not in json_codec.dumps(data)
+    assert json.loads(json_codec.dumps(data, pretty=True)) == data
+    assert json_codec.dumps(data, pretty=True).startswith("{\n  ")
+    assert json_codec.dumps({"n": [2 ** 70], "city": "São Paulo"}, sort_keys=True) == \
+        '{"city":"São Paulo","n":[1180591620717411303424]}'
+    assert json_codec.dumps({1: True}) == '{"1":true}'
+    print("✅ SUCCESS: Codec output matches the standard library")
+
+def test_preview_and_errors():
+    """
+    Test log previews and that invalid JSON raises JSONDecodeError with every backend.
+    """
+    preview = json_codec.preview({"items": list(range(1000))}, limit=40)
+    assert len(preview) == 43 and preview.endswith("...")
+    assert json_codec.preview({"a": 1}) == '{"a":1}'
+
+    for backend in ("auto", "json"):
+        os.environ["WANDER_JSON_BACKEND"] = backend
+        codec = importlib.reload(json_codec)
+        try:
+            codec.loads("{not json")
+        except json.JSONDecodeError:
+            pass
+        else:
+            raise AssertionError("invalid JSON must raise")
+    del os.environ["WANDER_JSON_BACKEND"]
+    importlib.reload(json_codec)
+    print("✅ SUCCESS: Previews are short and errors are consistent")
+
+if __name__ == "__main__":
+    test_round_trip_matches_stdlib()
+    test_preview_and_errors()
@@ -0,0 +1,52 @@
+import json
+import random
+from json_stream import IncrementalJSONScanner
+
+def test_incremental_json_scanner():
+    """
+    Test that streamed itinerary JSON yields each day and each top-level
+    section as soon as it is complete, regardless of chunk boundaries.
+    """
+    with open('itinerary.json', 'r', encoding='utf-8') as f:
+        itinerary = json.load(f)
+
+    # Simulate a model response wrapped in a markdown code fence
+    raw_response = "```json\n" + json.dumps(itinerary, indent=2, ensure_ascii=False) + "\n```"
+
+    for seed in range(5):
+        rng = random.Random(seed)
+        scanner = IncrementalJSONScanner(expand=("itinerary",))
+        events = []
+        position = 0
+        while position < len(raw_response):
+            size = rng.randint(1, 40)
+            events.extend(scanner.feed(raw_response[position:position + size]))
+            position += size
+
+        assert scanner.done
+        paths = [path for path, _ in events]
+        expected_paths = [("destination_info",)]
+        expected_paths += [("itinerary", day_key) for day_key in itinerary["itinerary"]]
+        expected_paths += [(key,) for key in itinerary if key not in ("destination_info", "itinerary")]
+        assert paths == expected_paths, paths
+        for path, value in events:
+            node = itinerary
+            for key in path:
+                node = node[key]
+            assert value == node
+
+    print(f"Streamed sections: {[path[-1] for path in paths]}")
+    print("✅ SUCCESS: Incremental JSON scanner emits complete sections")
+
+def test_scanner_handles_escapes_and_scalars():
+    """
+    Test strings containing braces, quotes and escapes, plus scalar members.
+    """
+    scanner = IncrementalJSONScanner()
+    events = scanner.feed('Sure! {"a": "x}{\\"y", "b": 12, "c": [1, {"d": null}], "e": true}')
+    assert events == [(("a",), 'x}{"y'), (("b",), 12), (("c",), [1, {"d": None}]), (("e",), True)]
+    print("✅ SUCCESS: Scanner handles escapes and scalars")
+
+if __name__ == "__main__":
+    test_incremental_json_scanner()
+    test_scanner_handles_escapes_and_scalars()
@@ -0,0 +1,93 @@
+import json
+import sys
+from models import FlightOption, HotelProperty, Segment, parse_flight_options, parse_hotel_properties
+
+def test_round_trip_is_lossless():
+    """
+    Test that parsing the fixtures into models and back gives the original SerpApi items.
+    """
+    for name in ('test_flight.json', 'flight_test_result.json'):
+        with open(name, 'r') as f:
+            flight_data = json.load(f)
+        raw = (flight_data.get('best_flights') or []) + (flight_data.get('other_flights') or [])
+        options = parse_flight_options(flight_data)
+        assert [option.to_dict() for option in options] == raw
+    with open('test.json', 'r') as f:
+        hotel_data = json.load(f)
+    hotels = parse_hotel_properties(hotel_data)
+    assert [hotel.to_dict() for hotel in hotels] == hotel_data['properties']
+
+    # Unknown keys, including inside the airport objects, survive too
+    segment = {"departure_airport": {"id": "JFK", "terminal": "4"}, "airline": "Delta", "seat": "12A"}
+    assert Segment.from_dict(segment).to_dict() == segment
+
+    # Explicit nulls and empty airport objects come back as they were
+    segment = {"departure_airport": {}, "arrival_airport": None, "airline": None, "airplane": "A321",
+               "extensions": None}
+    assert Segment.from_dict(segment).to_dict() == segment
+    assert Segment.from_dict({"airline": "Delta"}).to_dict() == {"airline": "Delta"}
+    option = {"flights": None, "layovers": [{"id": "ORD", "overnight": None}], "price": None, "type": "Round trip"}
+    assert FlightOption.from_dict(option).to_dict() == option
+    hotel = {"name": "Budget Inn", "rate_per_night": None, "total_rate": {"lowest": None}, "amenities": []}
+    assert HotelProperty.from_dict(hotel).to_dict() == hotel
+    print("✅ SUCCESS: Models round-trip the fixtures losslessly")
+
+def test_round_trip_keeps_nulls_in_fixtures():
+    """
+    Test the fixture round trip again with every optional field nulled or emptied.
+    """
+    def null_out(item):
+        item = dict(item)
+        for key in list(item)[::2]:
+            item[key] = None
+        return item
+
+    with open('test_flight.json', 'r') as f:
+        flight_data = json.load(f)
+    raw = []
+    for option in (flight_data.get('best_flights') or []) + (flight_data.get('other_flights') or []):
+        segments = [
+            dict(null_out(seg), departure_airport={}, arrival_airport=null_out(seg['arrival_airport']))
+            for seg in option['flights']
+        ]
+        raw.append(dict(null_out(option), flights=segments))
+    assert [option.to_dict() for option in parse_flight_options({'best_flights': raw})] == raw
+
+    with open('test.json', 'r') as f:
+        hotel_data = json.load(f)
+    raw_hotels = [null_out(hotel) for hotel in hotel_data['properties']]
+    assert [hotel.to_dict() for hotel in parse_hotel_properties({'properties': raw_hotels})] == raw_hotels
+    print("✅ SUCCESS: Nulls and empty objects survive the round trip")
+
+def test_typed_fields():
+    """
+    Test the typed fields and helpers used by ranking and display code.
+    """
+    with open('test_flight.json', 'r') as f:
+        flight_data = json.load(f)
+    flight = parse_flight_options(flight_data)[0]
+    raw_segment = flight_data['best_flights'][0]['flights'][0]
+    assert flight.segments[0].departure_id == raw_segment['departure_airport']['id']
+    assert flight.segments[0].arrival_time == raw_segment['arrival_airport']['time']
+    assert flight.stops == len(flight.segments) - 1
+    assert flight.price_value == float(flight.price)
+    assert not hasattr(flight, '__dict__')
+
+    hotel = HotelProperty.from_dict({"name": "Budget Inn", "rate_per_night": {"extracted_lowest": 120}})
+    assert hotel.nightly_rate == 120.0 and hotel.rating_value is None
+    assert FlightOption.from_dict({"price": "N/A"}).price_value is None
+
+    # A rate that is not an object has no typed form but is kept as given
+    odd = {"name": "Odd Inn", "rate_per_night": "$106", "total_rate": ["$742"]}
+    hotel = HotelProperty.from_dict(odd)
+    assert hotel.rate_per_night is None and hotel.nightly_rate is None
+    assert hotel.to_dict() == odd
+
+    raw_size = sum(sys.getsizeof(value) for value in flight_data['best_flights'][0].values())
+    print(f"Top-level dict values of one raw flight: {raw_size} bytes; FlightOption: {sys.getsizeof(flight)} bytes")
+    print("✅ SUCCESS: Typed model fields work")
+
+if __name__ == "__main__":
+    test_round_trip_is_lossless()
+    test_round_trip_keeps_nulls_in_fixtures()
+    test_typed_fields()
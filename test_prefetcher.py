@@ -0,0 +1,109 @@
+import os
+import tempfile
+import time
+from prefetcher import SearchPrefetcher
+from search_cache import SearchCache
+
+def test_stale_entries_are_served_within_window():
+    """
+    Test that expired cache entries stay available to lookup() for the stale window only.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = SearchCache(path=os.path.join(tmp_dir, "cache.sqlite3"),
+                            engine_ttls={"google_flights": 0.1}, stale_ttl=0.5)
+        cache.set("route", {"best_flights": []}, "google_flights")
+        time.sleep(0.2)
+
+        assert cache.get("route") is None
+        value, expires_at = cache.lookup("route")
+        assert value == {"best_flights": []} and expires_at < time.time()
+        assert cache.stats()["stale_hits"] == 1
+
+        time.sleep(0.5)
+        assert cache.lookup("route") == (None, None)
+        cache.close()
+    print("✅ SUCCESS: Stale entries are served only within the stale window")
+
+def test_popular_searches_refreshed_before_expiry():
+    """
+    Test that the most requested searches close to expiry are refreshed, and only those.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = SearchCache(path=os.path.join(tmp_dir, "cache.sqlite3"),
+                            engine_ttls={"google_flights": 60})
+        prefetcher = SearchPrefetcher(enabled=True, interval=3600, top_k=2, refresh_ahead=120,
+                                      budget_per_hour=3600, min_headroom=0)
+        refreshed = []
+        prefetcher.register("flights", lambda route: refreshed.append(route))
+
+        for route, requests in (("JFK-LHR", 5), ("LAX-NRT", 3), ("SFO-CDG", 1)):
+            cache.set(route, {"route": route}, "google_flights")
+            for _ in range(requests):
+                prefetcher.record("flights", route, (route,))
+
+        assert [key for key, _, _ in prefetcher.top()] == ["JFK-LHR", "LAX-NRT"]
+        # Both top entries expire within refresh_ahead; the third is not popular enough
+        assert prefetcher.refresh_due(cache) == 2
+        assert sorted(refreshed) == ["JFK-LHR", "LAX-NRT"]
+
+        # Nothing is refreshed while entries are far from expiry
+        refreshed.clear()
+        prefetcher.refresh_ahead = 10
+        assert prefetcher.refresh_due(cache) == 0 and refreshed == []
+        prefetcher.stop()
+        cache.close()
+    print("✅ SUCCESS: Popular searches are refreshed before they expire")
+
+def test_refresh_budget_is_respected():
+    """
+    Test that refreshes stop once the hourly budget is spent, and that
+    searches without a cache entry are never refreshed.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = SearchCache(path=os.path.join(tmp_dir, "cache.sqlite3"),
+                            engine_ttls={"google_hotels": 60})
+        prefetcher = SearchPrefetcher(enabled=True, interval=3600, top_k=20, refresh_ahead=120,
+                                      budget_per_hour=36, min_headroom=0)
+        refreshed = []
+        prefetcher.register("hotels", lambda query: refreshed.append(query))
+
+        for i in range(10):
+            cache.set(f"query-{i}", {"properties": []}, "google_hotels")
+            prefetcher.record("hotels", f"query-{i}", (f"query-{i}",))
+        # Popular, but its search returned mock data, so nothing was cached
+        for _ in range(20):
+            prefetcher.record("hotels", "uncached", ("uncached",))
+
+        # A budget of 36/hour allows bursts of 3
+        assert prefetcher.refresh_due(cache) == 3
+        assert len(refreshed) == 3 and "uncached" not in refreshed
+        assert prefetcher.stats()["skipped_budget"] == 1
+        prefetcher.stop()
+        cache.close()
+    print("✅ SUCCESS: Prefetching stays within its refresh budget")
+
+def test_stale_hit_revalidates_in_background():
+    """
+    Test that revalidate() refreshes a search in the background under the prefetch session.
+    """
+    from serpapi_quota import current_search_session
+
+    prefetcher = SearchPrefetcher(enabled=True, interval=3600, budget_per_hour=3600, min_headroom=0)
+    sessions = []
+    prefetcher.register("flights", lambda route: sessions.append(current_search_session.get()))
+    prefetcher.record("flights", "JFK-LHR", ("JFK-LHR",))
+
+    prefetcher.revalidate("JFK-LHR")
+    deadline = time.time() + 2
+    while not sessions and time.time() < deadline:
+        time.sleep(0.01)
+    assert sessions == ["prefetch"]
+    assert prefetcher.stats()["revalidated"] == 1
+    prefetcher.stop()
+    print("✅ SUCCESS: Stale hits are revalidated in the background")
+
+if __name__ == "__main__":
+    test_stale_entries_are_served_within_window()
+    test_popular_searches_refreshed_before_expiry()
+    test_refresh_budget_is_respected()
+    test_stale_hit_revalidates_in_background()
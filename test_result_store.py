@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+from result_store import ResultStore
+
+def test_save_and_load():
+    """
+    Test that concurrent saves get their own ids and never overwrite each other.
+    """
+    store = ResultStore(root_dir=tempfile.mkdtemp())
+    ids = [None] * 20
+
+    def worker(i):
+        ids[i] = store.save("flights", {"request": i})
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(ids)) == 20
+    for i, result_id in enumerate(ids):
+        assert store.load("flights", result_id) == {"request": i}
+    print(f"Result store stats: {store.stats()}")
+    print("✅ SUCCESS: Concurrent results are stored separately")
+
+def test_invalid_ids_and_retention():
+    """
+    Test that malformed ids are rejected and retention removes old results.
+    """
+    store = ResultStore(root_dir=tempfile.mkdtemp(), max_entries=2)
+    assert store.load("flights", "../../etc/passwd") is None
+    try:
+        store.path_for("flights", "../secret")
+        assert False, "path_for accepted a malformed id"
+    except ValueError:
+        pass
+
+    ids = [store.save("hotels", {"n": i}) for i in range(4)]
+    for age, result_id in enumerate(reversed(ids)):
+        path = store.path_for("hotels", result_id)
+        os.utime(path, (os.path.getmtime(path) - age, os.path.getmtime(path) - age))
+    store.enforce_retention("hotels")
+    assert store.load("hotels", ids[-1]) == {"n": 3}
+    assert store.load("hotels", ids[0]) is None
+    assert store.stats()["evicted"] == 2
+
+    store.max_age = -1
+    assert store.load("hotels", ids[-1]) is None
+    print("✅ SUCCESS: Invalid ids rejected and retention enforced")
+
+def test_retention_per_kind():
+    """
+    Test that cleanup is counted per kind, so a busy kind cannot starve the
+    others of retention.
+    """
+    root_dir = tempfile.mkdtemp()
+    old_job = ResultStore(root_dir=root_dir).save("jobs", {"n": 0})
+    store = ResultStore(root_dir=root_dir, max_entries=1, cleanup_every=3)
+    path = store.path_for("jobs", old_job)
+    os.utime(path, (os.path.getmtime(path) - 10, os.path.getmtime(path) - 10))
+    for i in range(2):
+        store.save("flights", {"n": i})
+
+    # The first save of a kind cleans up what is left from earlier runs
+    store.save("jobs", {"n": 1})
+    assert store.load("jobs", old_job) is None
+    assert len(os.listdir(os.path.join(store.root_dir, "flights"))) == 2
+
+    # flights' own fourth save runs its next cleanup
+    store.save("flights", {"n": 2})
+    assert len(os.listdir(os.path.join(store.root_dir, "flights"))) == 3
+    store.save("flights", {"n": 3})
+    assert len(os.listdir(os.path.join(store.root_dir, "flights"))) == 1
+    print("✅ SUCCESS: Retention runs for every kind")
+
+def test_parsed_results_are_reused():
+    """
+    Test that a stored result is decoded and parsed once for repeated reads,
+    and parsed again when the stored file changes or expires.
+    """
+    store = ResultStore(root_dir=tempfile.mkdtemp(), parsed_entries=1)
+    parses = []
+
+    def parse(data):
+        parses.append(data)
+        return [item * 2 for item in data["items"]]
+
+    result_id = store.save("flights", {"items": [1, 2]})
+    assert store.load_parsed("flights", result_id, parse) == [2, 4]
+    assert store.load_parsed("flights", result_id, parse) == [2, 4]
+    assert len(parses) == 1 and store.stats()["parsed_hits"] == 1
+
+    # Overwritten under the same id: the new content is parsed
+    store.save("flights", {"items": [3]}, result_id)
+    path = store.path_for("flights", result_id)
+    os.utime(path, (os.path.getmtime(path) + 1, os.path.getmtime(path) + 1))
+    assert store.load_parsed("flights", result_id, parse) == [6]
+
+    assert store.load_parsed("flights", "0" * 32, parse) is None
+    store.max_age = -1
+    assert store.load_parsed("flights", result_id, parse) is None
+    print("✅ SUCCESS: Parsed results are reused until they change")
+
+if __name__ == "__main__":
+    test_save_and_load()
+    test_invalid_ids_and_retention()
+    test_retention_per_kind()
+    test_parsed_results_are_reused()
@@ -0,0 +1,56 @@
+import json
+from result_views import (
+    FLIGHT_FIELDS, HOTEL_FIELDS, DEFAULT_FLIGHT_FIELDS, DEFAULT_HOTEL_FIELDS,
+    flight_items, hotel_items, parse_fields, parse_page, paginate
+)
+
+def test_hotel_projection():
+    """
+    Test that a page of hotels from test.json is a small fraction of the raw payload.
+    """
+    with open('test.json', 'r') as f:
+        hotel_data = json.load(f)
+
+    page = paginate(hotel_items(hotel_data), 0, 5, DEFAULT_HOTEL_FIELDS, HOTEL_FIELDS)
+    first = page['items'][0]
+    assert set(first) <= set(DEFAULT_HOTEL_FIELDS)
+    assert first['name'] == hotel_data['properties'][0]['name']
+    assert first['tokens']['property_token'] == hotel_data['properties'][0]['property_token']
+    assert page['total'] == len(hotel_data['properties'])
+
+    raw_size = len(json.dumps(hotel_data))
+    page_size = len(json.dumps(page))
+    print(f"Raw hotel payload: {raw_size} bytes, projected page: {page_size} bytes")
+    assert page_size * 10 < raw_size
+    print("✅ SUCCESS: Hotel projection is compact")
+
+def test_flight_paging_and_fields():
+    """
+    Test offset/limit paging and an explicit fields selector on test_flight.json.
+    """
+    with open('test_flight.json', 'r') as f:
+        flight_data = json.load(f)
+    items = flight_items(flight_data)
+
+    offset, limit = parse_page("1", "2")
+    page = paginate(items, offset, limit, DEFAULT_FLIGHT_FIELDS, FLIGHT_FIELDS)
+    assert len(page['items']) == min(2, len(items) - 1)
+    assert page['items'][0]['price'] == items[1].price
+    assert page['items'][0]['stops'] == len(items[1].segments) - 1
+
+    fields = parse_fields("price, carbon_emissions", DEFAULT_FLIGHT_FIELDS)
+    page = paginate(items, 0, 1, fields, FLIGHT_FIELDS)
+    assert set(page['items'][0]) == {'price', 'carbon_emissions'}
+
+    # Limits are clamped, and non-integers are rejected
+    assert parse_page(None, "100000")[1] <= 50
+    try:
+        parse_page("abc", None)
+        assert False, "parse_page accepted a non-integer offset"
+    except ValueError:
+        pass
+    print("✅ SUCCESS: Flight paging and field selection work")
+
+if __name__ == "__main__":
+    test_hotel_projection()
+    test_flight_paging_and_fields()
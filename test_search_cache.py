@@ -0,0 +1,89 @@
+import gc
+import os
+import tempfile
+import threading
+import time
+from search_cache import SearchCache, make_cache_key
+
+def test_search_cache():
+    """
+    Test the two-tier SerpApi cache: key normalization, TTL expiry,
+    LRU eviction and reading back from the SQLite tier.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = os.path.join(tmp_dir, "cache.sqlite3")
+        cache = SearchCache(path=cache_path, max_memory_entries=2)
+
+        # Keys ignore the API key and normalize codes and queries
+        key = make_cache_key({"engine": "google_flights", "departure_id": " lax", "arrival_id": "jfk",
+                              "currency": "usd", "hl": "EN", "api_key": "one"})
+        same_key = make_cache_key({"engine": "google_flights", "departure_id": "LAX", "arrival_id": "JFK",
+                                   "currency": "USD", "hl": "en", "api_key": "two"})
+        assert key == same_key
+        print(f"Normalized key: {key}")
+
+        assert cache.get(key) is None
+        cache.set(key, {"best_flights": [{"price": 100}]}, "google_flights")
+        assert cache.get(key)["best_flights"][0]["price"] == 100
+
+        # Push the entry out of the memory tier and read it back from disk
+        cache.set("b", {"n": 2}, "google_hotels")
+        cache.set("c", {"n": 3}, "google_hotels")
+        assert cache.get(key)["best_flights"][0]["price"] == 100
+        stats = cache.stats()
+        print(f"Cache stats: {stats}")
+        assert stats["disk_hits"] == 1
+        assert stats["memory_evictions"] >= 1
+
+        # A fresh instance on the same file sees the stored entries
+        cache.close()
+        reopened = SearchCache(path=cache_path)
+        assert reopened.get("c") == {"n": 3}
+
+        # Expired entries are treated as misses
+        short_lived = SearchCache(path=cache_path, engine_ttls={"google_flights": 0.05})
+        short_lived.set("d", {"n": 4}, "google_flights")
+        time.sleep(0.1)
+        assert short_lived.get("d") is None
+        reopened.close()
+        short_lived.close()
+
+    print("✅ SUCCESS: Search cache behaves as expected")
+
+def test_search_cache_returns_copies():
+    """
+    Callers may modify what the cache returns without changing the cached
+    entry, and threads each read through their own SQLite connection,
+    closed when the thread ends.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = SearchCache(path=os.path.join(tmp_dir, "cache.sqlite3"), max_memory_entries=1)
+        cache.set("a", {"best_flights": [{"price": 100}]}, "google_flights")
+        cache.get("a")["best_flights"][0]["price"] = 1
+        assert cache.get("a")["best_flights"][0]["price"] == 100
+
+        # Read back from disk (evicted from memory) and modified again
+        cache.set("b", {"n": 2}, "google_hotels")
+        cache.get("a")["best_flights"].clear()
+        assert cache.get("a")["best_flights"][0]["price"] == 100
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("b"))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [{"n": 2}] * 4
+        # Finished threads do not leave their connections behind
+        del threads
+        gc.collect()
+        assert len(cache._connections) <= 1
+        cache.close()
+        assert cache.get("b") == {"n": 2}
+        cache.close()
+
+    print("✅ SUCCESS: Search cache returns independent copies")
+
+if __name__ == "__main__":
+    test_search_cache()
+    test_search_cache_returns_copies()
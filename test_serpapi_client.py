@@ -0,0 +1,188 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from serpapi_client import SerpApiClient, AsyncSerpApiClient
+from serpapi_quota import SerpApiKeyPool
+
+# Scripted (status, headers) answers, served in order; 200 once they run out
+scripted = []
+received_keys = []
+script_lock = threading.Lock()
+
+class SerpApiStandIn(BaseHTTPRequestHandler):
+    """
+    Answers with the next scripted status and records the API key used.
+    """
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        with script_lock:
+            received_keys.append(params.get("api_key", [None])[0])
+            status, headers = scripted.pop(0) if scripted else (200, {})
+        body = json.dumps({"status": status}).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stand_in(*answers):
+    with script_lock:
+        scripted[:] = list(answers)
+        received_keys.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SerpApiStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/search.json"
+
+def make_client(keys=(), **kwargs):
+    pool = SerpApiKeyPool(keys=list(keys), key_rate=100, key_burst=100,
+                          session_rate=100, session_burst=100, queue_timeout=2, cooldown=60)
+    kwargs.setdefault("backoff_base", 0.01)
+    return SerpApiClient(key_pool=pool, **kwargs)
+
+def test_retries_transient_errors():
+    """
+    Test that 429 and 5xx answers are retried and the final answer is returned,
+    and that the retries show up in the stats.
+    """
+    server, url = start_stand_in((503, {}), (502, {}))
+    client = make_client(max_retries=2)
+    try:
+        response = client.get(url, params={"engine": "google_flights", "api_key": "caller-key-1234"})
+        assert response.status_code == 200
+        stats = client.stats()["google_flights"]
+        print(f"Client stats: {stats}")
+        assert stats["calls"] == 1 and stats["retries"] == 2 and stats["errors"] == 0
+
+        # Out of retries: the last error response is returned and counted
+        with script_lock:
+            scripted[:] = [(500, {})] * 3
+        response = client.get(url, params={"engine": "google_flights", "api_key": "caller-key-1234"})
+        assert response.status_code == 500
+        stats = client.stats()["google_flights"]
+        assert stats["calls"] == 2 and stats["retries"] == 4 and stats["errors"] == 1
+        assert stats["p50_seconds"] is not None and stats["max_seconds"] >= stats["avg_seconds"]
+
+        # Client errors are not retried
+        with script_lock:
+            scripted[:] = [(400, {})]
+            received_keys.clear()
+        assert client.get(url, params={"engine": "google_hotels", "api_key": "caller-key-1234"}).status_code == 400
+        assert len(received_keys) == 1
+    finally:
+        client.close()
+        server.shutdown()
+    print("✅ SUCCESS: Transient errors are retried")
+
+def test_retry_after_and_jitter():
+    """
+    Test that Retry-After sets the delay (capped at backoff_max) and that the
+    default backoff is jittered below the exponential bound.
+    """
+    server, url = start_stand_in((503, {"Retry-After": "0.3"}))
+    client = make_client(max_retries=1, backoff_max=5)
+    try:
+        start = time.perf_counter()
+        assert client.get(url, params={"engine": "google_flights", "api_key": "caller-key-1234"}).status_code == 200
+        assert time.perf_counter() - start >= 0.3
+
+        with script_lock:
+            scripted[:] = [(503, {"Retry-After": "60"})]
+        client.backoff_max = 0.2
+        start = time.perf_counter()
+        assert client.get(url, params={"engine": "google_flights", "api_key": "caller-key-1234"}).status_code == 200
+        assert time.perf_counter() - start < 2
+    finally:
+        client.close()
+        server.shutdown()
+
+    client = SerpApiClient(backoff_base=0.5, backoff_max=8.0)
+    random.seed(7)
+    for attempt in range(6):
+        delays = [client._backoff_delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= min(8.0, 0.5 * 2 ** attempt) for delay in delays)
+        assert len(set(delays)) > 1
+    client.close()
+    print("✅ SUCCESS: Backoff honors Retry-After and is jittered")
+
+def test_throttled_key_is_rotated():
+    """
+    Test that a 429 on one key retries right away on another key instead of
+    backing off.
+    """
+    server, url = start_stand_in((429, {}))
+    client = make_client(keys=["key-aaaa-1111", "key-bbbb-2222"], max_retries=2, backoff_base=5)
+    try:
+        start = time.perf_counter()
+        response = client.get(url, params={"engine": "google_flights"})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200
+        assert len(received_keys) == 2 and received_keys[0] != received_keys[1]
+        assert elapsed < 1
+        assert client.key_pool.stats()["throttled"] == 1
+    finally:
+        client.close()
+        server.shutdown()
+    print("✅ SUCCESS: Throttled keys are swapped without backing off")
+
+def test_connection_errors():
+    """
+    Test that connection failures are retried and re-raised once retries run out.
+    """
+    server, url = start_stand_in()
+    server.shutdown()
+    server.server_close()
+    client = make_client(max_retries=2)
+    try:
+        client.get(url, params={"engine": "google_flights", "api_key": "caller-key-1234"})
+        assert False, "get should have raised"
+    except requests.ConnectionError:
+        pass
+    stats = client.stats()["google_flights"]
+    assert stats["calls"] == 1 and stats["retries"] == 2 and stats["errors"] == 1
+    client.close()
+    print("✅ SUCCESS: Connection errors are retried, then raised")
+
+def test_async_client_retries():
+    """
+    Test that the async client follows the same retry and key rotation policy
+    and records into the same stats.
+    """
+    server, url = start_stand_in((503, {}), (429, {}))
+    client = make_client(keys=["key-aaaa-1111", "key-bbbb-2222"], max_retries=2)
+    async_client = AsyncSerpApiClient(client)
+
+    async def run():
+        try:
+            return await async_client.get(url, params={"engine": "google_hotels"})
+        finally:
+            await async_client.aclose()
+
+    try:
+        response = asyncio.run(run())
+        assert response.status_code == 200
+        assert len(received_keys) == 3 and received_keys[1] != received_keys[2]
+        stats = client.stats()["google_hotels"]
+        assert stats["calls"] == 1 and stats["retries"] == 2
+    finally:
+        client.close()
+        server.shutdown()
+    print("✅ SUCCESS: Async client retries like the sync client")
+
+if __name__ == "__main__":
+    test_retries_transient_errors()
+    test_retry_after_and_jitter()
+    test_throttled_key_is_rotated()
+    test_connection_errors()
+    test_async_client_retries()
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from serpapi_quota import SerpApiKeyPool, TokenBucket, RateLimitExceeded, current_search_session
+
+def test_token_bucket():
+    """
+    Test that a bucket allows its burst, then refills at the configured rate.
+    """
+    bucket = TokenBucket(rate=10, capacity=3)
+    now = time.monotonic()
+    for _ in range(3):
+        assert bucket.wait_time(now) == 0
+        bucket.take()
+    wait = bucket.wait_time(now)
+    assert 0.09 < wait <= 0.1
+    assert bucket.wait_time(now + 0.11) == 0
+    print("✅ SUCCESS: Token bucket enforces burst and rate")
+
+def test_pool_spreads_and_falls_back():
+    """
+    Test that requests are spread across keys and a throttled key is skipped.
+    """
+    pool = SerpApiKeyPool(keys=["key-aaaa-1111", "key-bbbb-2222"], key_rate=0.01, key_burst=2,
+                          session_rate=100, session_burst=100, queue_timeout=0.1, cooldown=60)
+    used = [pool.acquire() for _ in range(2)]
+    assert sorted(used) == ["key-aaaa-1111", "key-bbbb-2222"]
+
+    pool.report("key-aaaa-1111", 429)
+    assert pool.has_alternative("key-aaaa-1111")
+    assert pool.acquire() == "key-bbbb-2222"
+
+    # Both keys are now out of tokens or resting
+    try:
+        pool.acquire()
+        assert False, "acquire should have timed out"
+    except RateLimitExceeded:
+        pass
+    stats = pool.stats()
+    print(f"Key pool stats: {stats}")
+    assert stats["throttled"] == 1 and stats["rejected"] == 1
+    assert "key-aaaa-1111" not in str(stats)
+    print("✅ SUCCESS: Key pool spreads load and skips throttled keys")
+
+def test_session_fairness():
+    """
+    Test that one busy session cannot take the whole budget from others.
+    """
+    pool = SerpApiKeyPool(keys=[], key_rate=0.01, key_burst=10,
+                          session_rate=0.01, session_burst=3, queue_timeout=0.05)
+    for _ in range(3):
+        assert pool.acquire("caller-key-1234", session="busy") == "caller-key-1234"
+    try:
+        pool.acquire("caller-key-1234", session="busy")
+        assert False, "busy session should be limited"
+    except RateLimitExceeded:
+        pass
+
+    async def other_session():
+        return await pool.acquire_async("caller-key-1234", session="quiet")
+
+    assert asyncio.run(other_session()) == "caller-key-1234"
+    print("✅ SUCCESS: Sessions get a fair share of the SerpApi budget")
+
+def test_session_bucket_ignores_client_ids():
+    """
+    Test that rotating sessionId or X-Session-Id does not give a client a fresh bucket.
+    """
+    from server import app
+
+    buckets = set()
+    for i in range(3):
+        with app.test_request_context('/api/fetch-travel-data', method='POST', json={'sessionId': f'rotated-{i}'},
+                                      headers={'X-Session-Id': f'header-{i}'},
+                                      environ_base={'REMOTE_ADDR': '203.0.113.7'}):
+            app.preprocess_request()
+            buckets.add(current_search_session.get())
+    assert buckets == {'client:203.0.113.7'}
+    print("✅ SUCCESS: SerpApi sessions are keyed on the client address")
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_pool_spreads_and_falls_back()
+    test_session_fairness()
+    test_session_bucket_ignores_client_ids()
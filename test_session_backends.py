@@ -0,0 +1,200 @@
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from chat_prompt import ChatTurn, encode_session, decode_session
+from session_backends import SQLiteSessionBackend, RedisSessionBackend, RELEASE_LOCK_SCRIPT
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """
+    Tiny in-process server speaking the Redis protocol, implementing only
+    the commands the session backend uses.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.data = {}
+        self.expiry = {}
+        self.lock = threading.Lock()
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def reply(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, str):
+            self.wfile.write(b"+%s\r\n" % value.encode())
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self.reply(item)
+        else:
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            with server.lock:
+                now = time.monotonic()
+                for key in [k for k, t in server.expiry.items() if t <= now]:
+                    server.data.pop(key, None)
+                    server.expiry.pop(key, None)
+                if command == b"GET":
+                    self.reply(server.data.get(args[1]))
+                elif command == b"SET":
+                    options = [a.upper() for a in args[3:]]
+                    if b"NX" in options and args[1] in server.data:
+                        self.reply(None)
+                        continue
+                    server.data[args[1]] = args[2]
+                    server.expiry.pop(args[1], None)
+                    for unit, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+                        if unit in options:
+                            server.expiry[args[1]] = now + int(args[3 + options.index(unit) + 1]) * scale
+                    self.reply("OK")
+                elif command == b"EXISTS":
+                    self.reply(int(args[1] in server.data))
+                elif command == b"EXPIRE":
+                    server.expiry[args[1]] = now + int(args[2])
+                    self.reply(int(args[1] in server.data))
+                elif command == b"DEL":
+                    removed = 0
+                    for key in args[1:]:
+                        removed += server.data.pop(key, None) is not None
+                        server.expiry.pop(key, None)
+                    self.reply(removed)
+                elif command == b"EVAL" and args[1].decode() == RELEASE_LOCK_SCRIPT:
+                    # Compare-and-delete, atomic under the server lock like a real script
+                    key, token = args[3], args[4]
+                    if server.data.get(key) == token:
+                        del server.data[key]
+                        server.expiry.pop(key, None)
+                        self.reply(1)
+                    else:
+                        self.reply(0)
+                elif command == b"SCAN":
+                    prefix = args[3].rstrip(b"*")
+                    self.reply([b"0", [k for k in server.data if k.startswith(prefix)]])
+                else:
+                    self.wfile.write(b"-ERR unknown command\r\n")
+
+
+def check_backend(backend):
+    session = {"turns": [ChatTurn("user", "From LAX please")], "slots": {"origin": "LAX"}}
+    backend.set("abc", session)
+    restored = backend.get("abc")
+    assert restored["turns"][0] == ChatTurn("user", "From LAX please")
+    assert restored["slots"] == {"origin": "LAX"}
+    assert len(backend) == 1
+
+    # Concurrent turns from several workers must not lose updates
+    def append_turns():
+        for _ in range(25):
+            with backend.locked("abc"):
+                current = backend.get("abc")
+                current["turns"].append(ChatTurn("model", "ok"))
+                backend.set("abc", current)
+
+    threads = [threading.Thread(target=append_turns) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(backend.get("abc")["turns"]) == 101
+
+    assert backend.delete("abc")
+    assert backend.get("abc") is None
+    print(f"Backend stats: {backend.stats()}")
+
+def test_sqlite_session_backend():
+    """
+    Test the shared SQLite session backend, including two backend instances
+    (standing in for two workers) seeing the same sessions.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "sessions.sqlite3")
+        backend = SQLiteSessionBackend(path=path, encode=encode_session, decode=decode_session)
+        check_backend(backend)
+
+        other_worker = SQLiteSessionBackend(path=path, encode=encode_session, decode=decode_session)
+        backend.set("shared", {"turns": [], "slots": {"budget": "$2000"}})
+        assert other_worker.get("shared")["slots"]["budget"] == "$2000"
+
+        # A held session lock only blocks that session, and re-entering it does not deadlock
+        with backend.locked("shared"):
+            with backend.locked("shared"):
+                started = time.monotonic()
+                with other_worker.locked("another"):
+                    other_worker.set("another", {"turns": [], "slots": {}})
+                assert time.monotonic() - started < 1
+
+                blocked = SQLiteSessionBackend(path=path, lock_timeout=0.2)
+                try:
+                    with blocked.locked("shared"):
+                        assert False, "the session lock must be exclusive"
+                except TimeoutError:
+                    pass
+        with other_worker.locked("shared"):
+            assert other_worker.get("shared") is not None
+    print("✅ SUCCESS: SQLite session backend works across instances")
+
+def test_redis_session_backend():
+    """
+    Test the Redis-protocol session backend against a local stand-in server.
+    """
+    server = RespStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"redis://127.0.0.1:{server.server_address[1]}/0"
+        backend = RedisSessionBackend(url=url, encode=encode_session, decode=decode_session)
+        check_backend(backend)
+
+        other_worker = RedisSessionBackend(url=url, encode=encode_session, decode=decode_session)
+        backend.set("shared", {"turns": [], "slots": {"budget": "$2000"}})
+        assert other_worker.get("shared")["slots"]["budget"] == "$2000"
+
+        # Re-entering a held lock does not deadlock, and the lock stays exclusive
+        blocked = RedisSessionBackend(url=url, lock_timeout=0.2)
+        with backend.locked("shared"):
+            with backend.locked("shared"):
+                pass
+            try:
+                with blocked.locked("shared"):
+                    assert False, "the session lock must be exclusive"
+            except TimeoutError:
+                pass
+
+        # A lock that expired and was taken over is not released by its old holder
+        short = RedisSessionBackend(url=url, lock_timeout=0.05)
+        with short.locked("expiring"):
+            time.sleep(0.1)
+            assert other_worker._execute("SET", "wander:session:expiring:lock", "other-token", "NX", "PX", 5000) == "OK"
+        assert server.data[b"wander:session:expiring:lock"] == b"other-token"
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("✅ SUCCESS: Redis session backend works against the stand-in")
+
+if __name__ == "__main__":
+    test_sqlite_session_backend()
+    test_redis_session_backend()
@@ -0,0 +1,68 @@
+import threading
+import time
+from session_store import SessionBackend, SessionStore
+
+def test_session_store_eviction():
+    """
+    Test idle expiry, LRU eviction by session count and by total size.
+    """
+    store = SessionStore(idle_ttl=0.05, max_sessions=3, max_bytes=10 ** 6, size_of=len)
+    for session_id in ("a", "b", "c"):
+        store.set(session_id, "hello")
+    store.get("a")  # "a" is now the most recently used
+    store.set("d", "hello")
+    assert "b" not in store and "a" in store
+    print(f"After LRU eviction: {store.stats()}")
+
+    time.sleep(0.06)
+    assert len(store) == 0
+    assert store.stats()["expired"] == 3
+
+    sized = SessionStore(idle_ttl=60, max_sessions=100, max_bytes=25, size_of=len)
+    sized.set("x", "0123456789")
+    sized.set("y", "0123456789")
+    sized.set("z", "0123456789")
+    stats = sized.stats()
+    assert stats["total_bytes"] <= 25 and stats["evicted_memory"] == 1
+    assert sized.get("x") is None and sized.get("z") == "0123456789"
+    print("✅ SUCCESS: Session store evicts idle, old and oversized sessions")
+
+def test_session_store_locking():
+    """
+    Test that concurrent appends to one session are not lost when callers
+    use the per-session lock.
+    """
+    store = SessionStore(idle_ttl=60, size_of=len)
+
+    def append_turns():
+        for _ in range(200):
+            with store.locked("shared"):
+                store.set("shared", store.get("shared", "") + "x")
+
+    threads = [threading.Thread(target=append_turns) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get("shared")) == 1600
+    print("✅ SUCCESS: Per-session locking keeps concurrent updates")
+
+def test_incomplete_backend_is_rejected():
+    """
+    Test that a backend missing part of the interface fails when it is created.
+    """
+    class GetOnlyBackend(SessionBackend):
+        def get(self, session_id, default=None):
+            return default
+
+    try:
+        GetOnlyBackend()
+        assert False, "an incomplete backend must not be instantiable"
+    except TypeError as e:
+        print(f"Rejected incomplete backend: {str(e)}")
+    print("✅ SUCCESS: Session backends must implement the whole interface")
+
+if __name__ == "__main__":
+    test_session_store_eviction()
+    test_session_store_locking()
+    test_incomplete_backend_is_rejected()
@@ -0,0 +1,94 @@
+import threading
+import time
+from singleflight import SingleFlight, copy_json
+
+def test_identical_calls_coalesce():
+    """
+    Test that concurrent calls with the same key run the function once and share its result.
+    """
+    flight = SingleFlight("test")
+    calls = []
+
+    def slow_search(route):
+        calls.append(route)
+        time.sleep(0.2)
+        return {"route": route}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("JFK-BOM", slow_search, "JFK-BOM")))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["JFK-BOM"]
+    assert len(results) == 10 and all(r is results[0] for r in results)
+    stats = flight.stats()
+    print(f"Single-flight stats: {stats}")
+    assert stats["leaders"] == 1 and stats["coalesced"] == 9 and stats["in_flight"] == 0
+
+    # Once the call has finished, the next one runs again
+    flight.do("JFK-BOM", slow_search, "JFK-BOM")
+    assert len(calls) == 2
+    print("✅ SUCCESS: Identical in-flight calls are coalesced")
+
+def test_followers_get_copies():
+    """
+    Test that with copy_result each follower gets its own copy of the result.
+    """
+    flight = SingleFlight("test", copy_result=copy_json)
+    leader_result = {"best_flights": [{"price": 100}]}
+
+    def slow_search():
+        time.sleep(0.2)
+        return leader_result
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow_search))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(r == leader_result for r in results)
+    assert sum(r is leader_result for r in results) == 1
+    for r in results:
+        if r is not leader_result:
+            r["best_flights"].clear()
+    assert leader_result["best_flights"] == [{"price": 100}]
+    print("✅ SUCCESS: Followers get their own copy of the result")
+
+def test_leader_failure_reaches_followers():
+    """
+    Test that a leader's exception is shared and the key is released afterwards.
+    """
+    flight = SingleFlight("test")
+    errors = []
+
+    def failing():
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == ["upstream down"] * 3
+    assert flight.do("key", lambda: "recovered") == "recovered"
+    print("✅ SUCCESS: Leader failures are shared and released")
+
+if __name__ == "__main__":
+    test_identical_calls_coalesce()
+    test_followers_get_copies()
+    test_leader_failure_reaches_followers()